@@ -0,0 +1,12 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+"""
+Performance benchmarks for python-stix.
+
+Run the benchmarks from the repository root with::
+
+    $ python -m benchmarks --sizes 10,1000 --save baseline.json
+    $ python -m benchmarks --sizes 10,1000 --compare baseline.json
+
+See :mod:`benchmarks.runner` for the available options.
+"""
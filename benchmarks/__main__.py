@@ -0,0 +1,8 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+import sys
+
+from .runner import main
+
+sys.exit(main())
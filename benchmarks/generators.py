@@ -0,0 +1,181 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+"""
+Synthetic STIX Package generators.
+
+Packages are built deterministically from their size so results can be
+compared between runs: ids, titles and timestamps are derived from the index
+of each component.
+"""
+
+# stdlib
+import datetime
+
+# external
+from cybox.core import Observable
+from cybox.objects.address_object import Address
+from cybox.objects.domain_name_object import DomainName
+from cybox.objects.file_object import File
+from mixbox.vendor.six.moves import range
+
+# internal
+from stix.common import InformationSource
+from stix.core import STIXPackage, STIXHeader
+from stix.data_marking import Marking, MarkingSpecification
+from stix.extensions.identity import ciq_identity_3_0 as ciq
+from stix.extensions.marking.simple_marking import SimpleMarkingStructure
+from stix.extensions.marking.tlp import TLPMarkingStructure
+from stix.incident import Incident
+from stix.indicator import Indicator
+from stix.ttp import TTP
+from stix.ttp.behavior import Behavior
+from stix.ttp.malware_instance import MalwareInstance
+
+#: The timestamp of every generated component.
+TIMESTAMP = datetime.datetime(2017, 1, 1, 12, 0, 0)
+
+#: TLP colors assigned to components in turn.
+TLP_COLORS = ("WHITE", "GREEN", "AMBER", "RED")
+
+
+def _id(kind, idx):
+    return "example:%s-%08d" % (kind, idx)
+
+
+def _address(idx):
+    value = "10.%d.%d.%d" % ((idx >> 16) & 255, (idx >> 8) & 255, idx & 255)
+    return Address(value, Address.CAT_IPV4)
+
+
+def _observable(idx):
+    """Returns a CybOX Observable with an Address, DomainName or File
+    object.
+
+    """
+    kind = idx % 3
+
+    if kind == 0:
+        obj = _address(idx)
+    elif kind == 1:
+        obj = DomainName()
+        obj.value = "host%d.example.com" % idx
+    else:
+        obj = File()
+        obj.file_name = "sample%d.exe" % idx
+        obj.add_hash("%032x" % idx)
+
+    return Observable(obj, id_=_id("Observable", idx))
+
+
+def _marking(idx):
+    """Returns a handling Marking with a TLP and a simple marking
+    structure.
+
+    """
+    spec = MarkingSpecification(controlled_structure="../../../descendant-or-self::node()")
+    spec.marking_structures.append(TLPMarkingStructure(TLP_COLORS[idx % 4]))
+    spec.marking_structures.append(SimpleMarkingStructure("Statement %d" % idx))
+    return Marking(spec)
+
+
+def _ciq_identity(idx):
+    """Returns a CIQ identity with a person name, an organisation name and an
+    address.
+
+    """
+    party_name = ciq.PartyName(
+        person_names=("Analyst %d" % idx,),
+        organisation_names=("Organisation %d" % (idx % 100),)
+    )
+
+    spec = ciq.STIXCIQIdentity3_0(party_name=party_name)
+    spec.add_electronic_address_identifier("analyst%d@example.com" % idx)
+    spec.add_address(ciq.Address(country="US", administrative_area="VA"))
+
+    return ciq.CIQIdentity3_0Instance(specification=spec)
+
+
+def make_indicator(idx):
+    """Returns an Indicator with an Observable, a handling Marking and,
+    for every other Indicator, a CIQ producer identity.
+
+    """
+    indicator = Indicator(
+        id_=_id("indicator", idx),
+        timestamp=TIMESTAMP,
+        title="Indicator %d" % idx,
+        description="Synthetic indicator %d" % idx
+    )
+
+    indicator.add_indicator_type("IP Watchlist")
+    indicator.add_observable(_observable(idx))
+    indicator.handling = _marking(idx)
+
+    if idx % 2:
+        indicator.producer = InformationSource(identity=_ciq_identity(idx))
+
+    return indicator
+
+
+def make_ttp(idx):
+    """Returns a TTP with a malware instance."""
+    ttp = TTP(id_=_id("ttp", idx), timestamp=TIMESTAMP, title="TTP %d" % idx)
+    ttp.behavior = Behavior()
+    ttp.behavior.add_malware_instance(MalwareInstance(title="Malware %d" % idx))
+    return ttp
+
+
+def make_incident(idx):
+    """Returns an Incident with a category and a related Indicator
+    reference.
+
+    """
+    incident = Incident(
+        id_=_id("incident", idx),
+        timestamp=TIMESTAMP,
+        title="Incident %d" % idx
+    )
+
+    incident.add_category("Denial of Service")
+    incident.add_related_indicator(Indicator(idref=_id("indicator", idx)))
+    return incident
+
+
+#: Component generators and the STIXPackage method which adds their
+#: components. Components are generated in this order.
+COMPONENTS = (
+    (make_indicator, STIXPackage.add_indicator),
+    (_observable, STIXPackage.add_observable),
+    (make_indicator, STIXPackage.add_indicator),
+    (make_ttp, STIXPackage.add_ttp),
+    (make_incident, STIXPackage.add_incident),
+)
+
+
+def make_package(size):
+    """Returns a STIXPackage with `size` top-level components.
+
+    Components are a mix of Indicators (with CybOX Observables, markings and
+    CIQ identities), standalone Observables, TTPs and Incidents.
+
+    """
+    package = STIXPackage(id_=_id("Package", size), timestamp=TIMESTAMP)
+    package.stix_header = STIXHeader(title="Benchmark package (%d)" % size)
+    package.stix_header.handling = _marking(size)
+
+    for idx in range(size):
+        factory, add = COMPONENTS[idx % len(COMPONENTS)]
+        add(package, factory(idx))
+
+    return package
+
+
+def component_ids(size):
+    """Returns the ids of the Indicators in a package of `size`
+    components.
+
+    """
+    return [
+        _id("indicator", idx) for idx in range(size)
+        if COMPONENTS[idx % len(COMPONENTS)][0] is make_indicator
+    ]
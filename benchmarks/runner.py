@@ -0,0 +1,331 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+"""
+Times each python-stix pipeline stage for synthetic packages of several
+sizes and compares the results against a saved baseline.
+
+Each stage is run `repeat` times and the fastest run is recorded. Peak
+memory is measured in a separate run with :mod:`tracemalloc` (Python 3.4+),
+since tracing allocations slows the stage down.
+
+Results are saved as JSON::
+
+    {
+        "python": "3.6.1",
+        "stix": "1.2.0.4",
+        "results": {
+            "1000": {"to_xml": {"seconds": 0.41, "peak_bytes": 5120000}}
+        }
+    }
+"""
+
+# stdlib
+import argparse
+import gc
+import json
+import platform
+import sys
+import timeit
+import warnings
+
+# external
+from mixbox.vendor.six import BytesIO, iteritems
+
+# internal
+import stix
+from stix.core import STIXPackage
+
+from . import generators
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+#: The default package sizes, in top-level components.
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+
+#: The default relative slowdown or memory growth reported as a regression.
+DEFAULT_THRESHOLD = 0.25
+
+#: The number of Indicator ids looked up by the ``find`` stage.
+FIND_COUNT = 100
+
+
+class Workload(object):
+    """The inputs of each stage for a package of `size` components. Each
+    input is built the first time it is needed.
+
+    """
+    def __init__(self, size):
+        self.size = size
+        self._package = None
+        self._xml = None
+        self._dict = None
+
+    @property
+    def package(self):
+        if self._package is None:
+            self._package = generators.make_package(self.size)
+        return self._package
+
+    @property
+    def xml(self):
+        if self._xml is None:
+            self._xml = self.package.to_xml()
+        return self._xml
+
+    @property
+    def dict(self):
+        if self._dict is None:
+            self._dict = self.package.to_dict()
+        return self._dict
+
+    @property
+    def ids(self):
+        ids = generators.component_ids(self.size)
+        step = max(1, len(ids) // FIND_COUNT)
+        return ids[::step][:FIND_COUNT]
+
+
+def _package_xml(workload):
+    return (BytesIO(workload.xml),)
+
+
+def _package_dict(workload):
+    return (workload.dict,)
+
+
+def _package(workload):
+    return (workload.package,)
+
+
+def _fresh_package(workload):
+    # Search a package built for each run, so an id index built by an
+    # earlier run is not reused.
+    return (STIXPackage.from_dict(workload.dict), workload.ids)
+
+
+def _find(package, ids):
+    return [package.find(x) for x in ids]
+
+
+#: Stage names, the setup function which returns the arguments of each run
+#: of the stage, and the stage function. Setup is not measured.
+STAGES = (
+    ("generate", lambda w: (w.size,), generators.make_package),
+    ("from_xml", _package_xml, STIXPackage.from_xml),
+    ("to_xml", _package, STIXPackage.to_xml),
+    ("from_dict", _package_dict, STIXPackage.from_dict),
+    ("to_dict", _package, STIXPackage.to_dict),
+    ("walk", _package, lambda x: sum(1 for _ in x.walk())),
+    ("find", _fresh_package, _find),
+)
+
+
+def time_stage(setup, func, workload, repeat=3):
+    """Returns the fastest of `repeat` runs of `func`, in seconds. The
+    arguments of each run are returned by `setup`.
+
+    """
+    best = None
+
+    for _ in range(repeat):
+        args = setup(workload)
+        gc.collect()
+
+        start = timeit.default_timer()
+        func(*args)
+        elapsed = timeit.default_timer() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best
+
+
+def measure_memory(setup, func, workload):
+    """Returns the peak memory allocated while running `func`, in bytes, or
+    ``None`` if :mod:`tracemalloc` is not available.
+
+    """
+    if tracemalloc is None:
+        return None
+
+    args = setup(workload)
+    gc.collect()
+    tracemalloc.start()
+
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(sizes=DEFAULT_SIZES, stages=None, repeat=3, memory=True, out=None):
+    """Runs the benchmarks and returns the results dictionary.
+
+    Args:
+        sizes: The package sizes to benchmark.
+        stages: The names of the stages to run. If ``None``, all stages are
+            run.
+        repeat: The number of timed runs of each stage.
+        memory: Measure the peak memory of each stage.
+        out: An optional file-like object which each result is reported to
+            as it is measured.
+
+    Raises:
+        ValueError: If `stages` contains an unknown stage name.
+
+    """
+    names = [x[0] for x in STAGES]
+    stages = stages or names
+
+    unknown = set(stages) - set(names)
+    if unknown:
+        raise ValueError("Unknown stages: %s" % ", ".join(sorted(unknown)))
+
+    results = {}
+
+    for size in sizes:
+        workload = Workload(size)
+        measured = results[str(size)] = {}
+
+        for name, setup, func in STAGES:
+            if name not in stages:
+                continue
+
+            result = {"seconds": time_stage(setup, func, workload, repeat)}
+
+            if memory:
+                result["peak_bytes"] = measure_memory(setup, func, workload)
+
+            measured[name] = result
+
+            if out:
+                out.write(_format_result(size, name, result) + "\n")
+
+    return {
+        "python": platform.python_version(),
+        "stix": stix.__version__,
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """Returns the regressions of `current` results against `baseline`
+    results.
+
+    A regression is a stage whose time or peak memory grew by more than
+    `threshold` (e.g., ``0.25`` for 25%). Stages and sizes missing from
+    either result are ignored.
+
+    Returns:
+        A list of ``(size, stage, metric, baseline value, current value)``
+        tuples.
+
+    """
+    regressions = []
+
+    for size, stages in sorted(iteritems(current["results"])):
+        base_stages = baseline["results"].get(size, {})
+
+        for name, result in sorted(iteritems(stages)):
+            base_result = base_stages.get(name, {})
+
+            for metric in ("seconds", "peak_bytes"):
+                old = base_result.get(metric)
+                new = result.get(metric)
+
+                if not old or new is None:
+                    continue
+
+                if (new - old) / float(old) > threshold:
+                    regressions.append((int(size), name, metric, old, new))
+
+    return sorted(regressions)
+
+
+def _format_result(size, name, result):
+    peak = result.get("peak_bytes")
+    peak = "-" if peak is None else "%.1f MB" % (peak / 1e6)
+    return "%8d  %-10s %10.4f s  %12s" % (size, name, result["seconds"], peak)
+
+
+def _get_arg_parser():
+    parser = argparse.ArgumentParser(
+        description="Benchmark python-stix parsing and serialization."
+    )
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(x) for x in DEFAULT_SIZES),
+        help="Comma-separated package sizes, in top-level components "
+             "(default: %(default)s)."
+    )
+    parser.add_argument(
+        "--stages",
+        default=None,
+        help="Comma-separated stages to run (default: all). One or more of: "
+             + ", ".join(x[0] for x in STAGES)
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Timed runs of each stage (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="Do not measure peak memory."
+    )
+    parser.add_argument(
+        "--save",
+        metavar="FILE",
+        help="Save the results to FILE as JSON."
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="FILE",
+        help="Compare the results against the baseline JSON in FILE. Exits "
+             "with status 1 if there are regressions."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Relative growth reported as a regression "
+             "(default: %(default)s)."
+    )
+    return parser
+
+
+def main(argv=None):
+    args = _get_arg_parser().parse_args(argv)
+    sizes = [int(x) for x in args.sizes.split(",")]
+    stages = args.stages.split(",") if args.stages else None
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        results = run(sizes, stages, repeat=args.repeat,
+                      memory=not args.no_memory, out=sys.stdout)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+
+    if not args.compare:
+        return 0
+
+    with open(args.compare) as f:
+        baseline = json.load(f)
+
+    regressions = compare(baseline, results, threshold=args.threshold)
+
+    for size, name, metric, old, new in regressions:
+        print("REGRESSION %8d  %-10s %-10s %g -> %g (%+.0f%%)" % (
+            size, name, metric, old, new, (new - old) * 100.0 / old
+        ))
+
+    return 1 if regressions else 0
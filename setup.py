@@ -52,7 +52,7 @@ setup(
     description="An API for parsing and generating STIX content.",
     long_description=readme,
     url="http://stix.mitre.org",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     install_requires=install_requires,
     extras_require=extras_require,
     classifiers=[
@@ -2,14 +2,65 @@
 # See LICENSE.txt for complete terms.
 
 # Make sure base gets imported before common.
-from .base import (Entity, EntityList, TypedCollection, TypedList,  # noqa
-                   BaseCoreComponent)
+from .base import (Entity, EntityList, EntityFactory, TypedCollection,  # noqa
+                   TypedList, BaseCoreComponent, LazyField, DateTimeField)
+
+import importlib
 
 from mixbox.vendor.six import string_types, iteritems
 
+from .bindings import TypeInfo
+
 #: Mapping of xsi:types to implementation/extension classes
 _EXTENSION_MAP = {}
 
+#: Mapping of ``stix.bindings.TypeInfo`` namespace/typename pairs to
+#: implementation/extension classes.
+_TYPEINFO_MAP = {}
+
+#: Mapping of unprefixed XML type names to the first xsi:type registered
+#: with that name.
+_TYPENAME_MAP = {}
+
+#: Extension modules which are imported the first time an extension class is
+#: looked up.
+_EXTENSION_MODULES = (
+    "stix.extensions.identity.ciq_identity_3_0",
+    "stix.extensions.malware.maec_4_1_malware",
+    "stix.extensions.marking.simple_marking",
+    "stix.extensions.marking.terms_of_use_marking",
+    "stix.extensions.marking.tlp",
+    "stix.extensions.test_mechanism.generic_test_mechanism",
+    "stix.extensions.test_mechanism.open_ioc_2010_test_mechanism",
+    "stix.extensions.test_mechanism.snort_test_mechanism",
+    "stix.extensions.test_mechanism.yara_test_mechanism",
+)
+
+_extensions_loaded = False
+
+
+def _load_extensions():
+    """Imports the ``_EXTENSION_MODULES`` so their classes are registered.
+
+    This only happens once. If an import fails, the modules are imported
+    again on the next lookup.
+
+    """
+    global _extensions_loaded
+
+    if _extensions_loaded:
+        return
+
+    # Set this first, since the imports may look up extensions themselves.
+    _extensions_loaded = True
+
+    try:
+        for name in _EXTENSION_MODULES:
+            importlib.import_module(name)
+    except Exception:
+        _extensions_loaded = False
+        raise
+
 
 def _lookup_unprefixed(typename):
     """Attempts to resolve a class for the input XML type `typename`.
@@ -26,6 +77,12 @@ def _lookup_unprefixed(typename):
         ValueError: If no class has been registered for the input `typename`.
 
     """
+    xsi_type = _TYPENAME_MAP.get(typename)
+
+    if xsi_type is not None:
+        return _EXTENSION_MAP[xsi_type]
+
+    # Partial type names are matched against the full xsi:types.
     for xsi_type, klass in iteritems(_EXTENSION_MAP):
         if typename in xsi_type:
             return klass
@@ -47,14 +104,31 @@ def _lookup_extension(xsi_type):
         ValueError: If no class has been registered for the `xsi_type`.
 
     """
-    import stix.extensions.malware.maec_4_1_malware
-    
-    if xsi_type in _EXTENSION_MAP:
-        return _EXTENSION_MAP[xsi_type]
+    klass = _EXTENSION_MAP.get(xsi_type)
+
+    if klass is not None:
+        return klass
 
     raise ValueError("Unregistered xsi:type %s" % xsi_type)
 
 
+def _lookup_typeinfo(typeinfo):
+    """Returns a Python class for the ``stix.bindings.TypeInfo`` value
+    `typeinfo`.
+
+    Raises:
+        ValueError: If no class has been registered for the `typeinfo`.
+
+    """
+    klass = _TYPEINFO_MAP.get(typeinfo)
+
+    if klass is not None:
+        return klass
+
+    error = "Unregistered extension type: {%s}%s"
+    raise ValueError(error % (typeinfo.ns, typeinfo.typename))
+
+
 def lookup_extension(typeinfo, default=None):
     """Returns a stix.Entity class for that has been registered for the
     `typeinfo` value.
@@ -64,7 +138,8 @@ def lookup_extension(typeinfo, default=None):
 
     Args:
         typeinfo: An object or string containing type information. This can be
-            either an xsi:type attribute value or a stix.bindings object.
+            an xsi:type attribute value, a ``stix.bindings.TypeInfo``
+            namespace/typename pair or a stix.bindings object.
         default: Return class if typeinfo is None or contains no xml type
             information.
 
@@ -78,10 +153,23 @@ def lookup_extension(typeinfo, default=None):
     if typeinfo is None and default:
         return default
 
+    if not _extensions_loaded:
+        _load_extensions()
+
     # If the `typeinfo` was a string, consider it a  full xsi:type value.
     if isinstance(typeinfo, string_types):
         return _lookup_extension(typeinfo)
 
+    if isinstance(typeinfo, TypeInfo):
+        return _lookup_typeinfo(typeinfo)
+
+    # Extension binding classes declare their namespace and type name.
+    xmlns = getattr(typeinfo, 'xmlns', None)
+
+    if xmlns and hasattr(typeinfo, 'xml_type'):
+        typeinfo = TypeInfo(ns=xmlns, typename=typeinfo.xml_type)
+        return _lookup_typeinfo(typeinfo)
+
     # Most extension bindings include this attribute.
     if not hasattr(typeinfo, 'xml_type'):
         if default:
@@ -110,7 +198,13 @@ def add_extension(cls):
         This was designed for internal use.
 
     """
-    _EXTENSION_MAP[cls._XSI_TYPE] = cls  # noqa
+    xsi_type = cls._XSI_TYPE
+    _, _, typename = xsi_type.rpartition(":")
+    typeinfo = TypeInfo(ns=getattr(cls, "_namespace", None), typename=typename)
+
+    _EXTENSION_MAP[xsi_type] = cls  # noqa
+    _TYPEINFO_MAP[typeinfo] = cls
+    _TYPENAME_MAP.setdefault(typename, xsi_type)
 
 
 def register_extension(cls):
@@ -2,6 +2,7 @@
 # See LICENSE.txt for complete terms.
 
 # stdlib
+import copy
 import json
 import collections
 import itertools
@@ -13,20 +14,256 @@ from mixbox import entities
 from mixbox import fields
 from mixbox import binding_utils
 from mixbox import namespaces
-from mixbox.vendor.six import StringIO, iteritems, itervalues, text_type, binary_type
+from mixbox import signals
+from mixbox.vendor.six import (StringIO, iteritems, itervalues, text_type,
+                                binary_type, integer_types)
 
 # internal
 from . import utils
+from .bindings import TypeInfo
+from .utils import dictcodec
+from .utils.serializer import NamespaceCollector, Serializer
 
 def _override(*args, **kwargs):
     raise NotImplementedError()
 
 
+#: Attribute values which can be shared by the instances built from a
+#: template.
+_SHAREABLE_TYPES = (
+    (type(None), bool, float, text_type, binary_type) + tuple(integer_types)
+)
+
+#: Per-class templates used by :meth:`Entity._new_parsed`. A value of
+#: ``None`` means instances must be built by calling the constructor.
+_TEMPLATES = {}
+
+
+def _template(entity):
+    """Returns a ``(field order, attributes)`` tuple describing the state
+    `entity` was left in by its constructor, or ``None`` if that state
+    cannot be reproduced without calling the constructor.
+
+    """
+    attrs = dict(vars(entity))
+    del attrs["_fields"]
+
+    # Mutable attributes (e.g., an empty list) cannot be shared.
+    for val in itervalues(attrs):
+        if not isinstance(val, _SHAREABLE_TYPES):
+            return None
+
+    return tuple(entity._fields), attrs
+
+
+#: Per-class sets of the TypedFields which can be removed from ``_fields``
+#: while unset.
+_DROPPABLE = {}
+
+
+def _droppable(klass):
+    """Returns the TypedFields of `klass` which are exported the same way
+    whether they are unset or missing from ``_fields``.
+
+    Missing fields keep the default value of the binding object, so only
+    fields whose binding attribute defaults to ``None`` or an empty list
+    qualify. Other defaults (e.g., a ``scope`` of ``"exclusive"``) are only
+    suppressed by exporting the unset value.
+
+    """
+    try:
+        return _DROPPABLE[klass]
+    except KeyError:
+        pass
+
+    binding_class = getattr(klass, "_binding_class", None)
+    defaults = binding_class() if binding_class is not None else None
+
+    droppable = frozenset(
+        x for x in klass.typed_fields()
+        if getattr(defaults, x.name, None) in (None, [])
+    )
+
+    _DROPPABLE[klass] = droppable
+    return droppable
+
+
+def _compact(entity):
+    """Removes the unset values of `entity` from its ``_fields`` and
+    releases cached data held by its collections.
+
+    """
+    values = getattr(entity, "_fields", None)
+
+    # Some extensions (e.g., CIQ identities) do not use TypedFields.
+    if not values:
+        return
+
+    droppable = _droppable(type(entity))
+
+    kept = dict(
+        (field, val) for field, val in iteritems(values)
+        if field not in droppable or not (
+            val is None or (field.multiple and not val)
+        )
+    )
+
+    if len(kept) < len(values):
+        # Bypass any __setattr__ overrides.
+        entity.__dict__["_fields"] = kept
+
+    for val in itervalues(kept):
+        if isinstance(val, TypedCollection):
+            val._compact()
+
+
+def _set_values(entity):
+    """Returns a dictionary of the set TypedField values of `entity` keyed by
+    their key names.
+
+    This mirrors ``to_dict()`` without converting the values: unset fields
+    and empty lists are left out, and lists are returned as plain lists.
+
+    """
+    values = {}
+
+    for field, val in iteritems(entity._fields):
+        if val is None:
+            continue
+        elif field.multiple:
+            if not val:
+                continue
+            val = list(val)
+
+        values[field.key_name] = val
+
+    return values
+
+
+def _invalidate_value_key(instance, value):
+    """Drops the key cached by :func:`_value_key` when a field of `instance`
+    is set.
+
+    """
+    instance.__dict__.pop("_value_key", None)
+
+
+def _value_key(entity):
+    """Returns a hashable key for the set TypedField values of `entity`.
+
+    The key is cached on `entity`, so every TypedField of its class must
+    have :func:`_invalidate_value_key` as a ``postset_hook`` and hold
+    immutable values.
+
+    Raises:
+        TypeError: If a field value is not hashable.
+
+    """
+    try:
+        return entity.__dict__["_value_key"]
+    except KeyError:
+        pass
+
+    key = frozenset(iteritems(_set_values(entity)))
+
+    # Bypass __setattr__ overrides.
+    entity.__dict__["_value_key"] = key
+    return key
+
+
 class Entity(entities.Entity):
     """Base class for all classes in the STIX API."""
     _namespace = None
     _XSI_TYPE = None
 
+    #: Names of instance attributes which hold cached data rather than
+    #: content. These are not visited by :mod:`stix.utils.walk`.
+    _walk_skip = ()
+
+    @classmethod
+    def _new_parsed(cls):
+        """Returns an instance of this class which will have every TypedField
+        set from parsed input.
+
+        Constructors initialize fields with values which parsing immediately
+        overwrites (e.g., a new id, the current time or empty collections).
+        The constructor is called once per class to record the order of its
+        fields and its other attributes. Later instances are created from
+        that record without calling the constructor.
+
+        Note:
+            The caller must set every TypedField on the returned instance, or
+            call :meth:`_set_defaults` for the fields it did not set.
+
+        """
+        try:
+            template = _TEMPLATES[cls]
+        except KeyError:
+            entity = cls()
+            _TEMPLATES[cls] = _template(entity)
+            return entity
+
+        if template is None:
+            return cls()
+
+        order, attrs = template
+        entity = cls.__new__(cls)
+        entity.__dict__.update(attrs)
+
+        # Preserve the field order the constructor would have produced.
+        entity._fields = dict.fromkeys(order)
+        return entity
+
+    def _set_defaults(self, fields_):
+        """Sets the TypedFields in `fields_` to the values the constructor
+        would have given them.
+
+        """
+        defaults = type(self)()._fields
+
+        for field in fields_:
+            if field in defaults:
+                self._fields[field] = defaults[field]
+            else:
+                self._fields.pop(field, None)
+
+    @classmethod
+    def from_obj(cls, cls_obj):
+        """Returns an instance of this class built from the generateDS
+        binding object `cls_obj`.
+
+        """
+        if not cls_obj:
+            return None
+
+        entity = cls._new_parsed()
+        missing = []
+
+        for field in cls.typed_fields():
+            try:
+                val = getattr(cls_obj, field.name)
+            except AttributeError:
+                # The binding object may be a "Base" binding type which does
+                # not have every field of this class.
+                missing.append(field)
+                continue
+
+            transformer = field.transformer
+
+            if transformer:
+                if field.multiple and val is not None:
+                    val = [transformer.from_obj(x) for x in val]
+                else:
+                    val = transformer.from_obj(val)
+
+            field.__set__(entity, val)
+
+        if missing:
+            entity._set_defaults(missing)
+
+        signals.emit("Entity.created.from_obj", entity, cls_obj)
+        return entity
+
     def _set_var(self, klass, try_cast=True, arg=None, **kwargs):
         """Sets an instance property value.
 
@@ -128,8 +365,6 @@ class Entity(entities.Entity):
 
         """
 
-        from mixbox.entities import NamespaceCollector
-
         if (not auto_namespace) and (not ns_dict):
             raise Exception(
                 "Auto-namespacing was disabled but ns_dict was empty "
@@ -138,7 +373,8 @@ class Entity(entities.Entity):
 
         ns_info = NamespaceCollector()
 
-        obj = self.to_obj(ns_info=ns_info if auto_namespace else None)
+        serializer = Serializer(ns_info=ns_info if auto_namespace else None)
+        serializer.collect(self)
 
         ns_info.finalize(ns_dict=ns_dict, schemaloc_dict=schemaloc_dict)
 
@@ -163,7 +399,8 @@ class Entity(entities.Entity):
 
         with binding_utils.save_encoding(encoding):
             sio = StringIO()
-            obj.export(
+            serializer.export(
+                self,
                 sio.write,                    # output buffer
                 0,                            # output level
                 obj_ns_dict,                  # namespace dictionary
@@ -179,8 +416,66 @@ class Entity(entities.Entity):
 
         return s
 
-    def walk(self):
-        return utils.walk.iterwalk(self)
+    def to_dict(self):
+        """Returns a dictionary representation of this :class:`Entity`.
+
+        Subclasses can override this function.
+
+        """
+        return dictcodec.to_dict(self)
+
+    @classmethod
+    def from_dict(cls, cls_dict):
+        """Returns an instance of this class built from the dictionary
+        representation `cls_dict`.
+
+        """
+        return dictcodec.from_dict(cls, cls_dict)
+
+    def to_json(self, file_=None):
+        """Returns a JSON string representation of this :class:`Entity`.
+
+        Args:
+            file_: An optional file-like object which accepts strings. If set,
+                the JSON is written to `file_` in fragments instead of being
+                returned.
+
+        """
+        return dictcodec.to_json(self, file_=file_)
+
+    def walk(self, types=None):
+        """Returns a generator which yields the descendants of this
+        :class:`Entity` depth-first.
+
+        Args:
+            types: An optional class or tuple of classes. If set, only
+                descendants which are instances of `types` are yielded, and
+                descendants which cannot contain an instance of `types` are
+                not walked.
+
+        """
+        return utils.walk.iterwalk(self, types=types)
+
+    def compact(self):
+        """Reduces the memory used by this :class:`Entity` and its
+        descendants.
+
+        Parsing sets every field of every object, so most field storage
+        holds ``None`` or an empty list. This drops those values from the
+        per-object storage and releases cached lookup structures. Field
+        values, serialized output and the TypedField API are unchanged:
+        unset fields still read as ``None``, and list fields still return
+        a new empty list when read.
+
+        Note:
+            Empty lists read from this object's fields before calling this
+            method are no longer held by the object.
+
+        """
+        _compact(self)
+
+        for entity in self.walk():
+            _compact(entity)
 
     def find(self, id_):
         """Searches the children of a :class:`Entity` implementation for an
@@ -200,6 +495,27 @@ class EntityList(entities.EntityList, Entity):
         return Entity.to_xml(self, *args, **kwargs)
 
 
+class EntityFactory(entities.EntityFactory):
+    """Base class for factories which resolve extension classes with
+    :func:`stix.lookup_extension`.
+
+    """
+    @classmethod
+    def objkey(cls, obj):
+        """Returns the ``stix.bindings.TypeInfo`` namespace/typename pair of
+        the extension binding object `obj`, or its xsi:type value if `obj`
+        does not declare one.
+
+        """
+        xmlns = getattr(obj, "xmlns", None)
+        xml_type = getattr(obj, "xml_type", None)
+
+        if xmlns and xml_type:
+            return TypeInfo(ns=xmlns, typename=xml_type)
+
+        return super(EntityFactory, cls).objkey(obj)
+
+
 class TypedCollection(object):
     """Abstract base class for non-STIX collections of entities.
 
@@ -209,6 +525,9 @@ class TypedCollection(object):
     """
     _contained_type = _override
 
+    #: See :attr:`Entity._walk_skip`.
+    _walk_skip = ()
+
     def __init__(self, *args):
         self._inner = []
         self._initialize_inner(*args)
@@ -231,6 +550,13 @@ class TypedCollection(object):
         # it's probably better to use self._contained_type.istypeof(value)
         return isinstance(value, self._contained_type)
 
+    def _compact(self):
+        """Releases cached data held by the collection. See
+        :meth:`Entity.compact`.
+
+        """
+        pass
+
     def _fix_value(self, value):
         """Attempt to coerce value into the correct type.
 
@@ -348,6 +674,90 @@ class TypedList(TypedCollection, collections.MutableSequence):
         self._inner.insert(idx, value)
 
 
+def _identity(value):
+    return value
+
+
+class _DeferredNode(object):
+    """Holds an unparsed lxml element for a :class:`LazyField` value.
+
+    The element relies on the namespace declarations of its document, so
+    copies and pickles hold the built API object instead.
+
+    """
+
+    def __init__(self, field, node):
+        self.field = field
+        self.node = node
+
+    def build(self):
+        """Builds the API object for the field from the held element."""
+        field = self.field
+        binding_obj = field.type_._binding_class.factory()
+        binding_obj.build(self.node)
+        return field.transformer.from_obj(binding_obj)
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(self.build(), memo)
+
+    def __reduce__(self):
+        return (_identity, (self.build(),))
+
+
+class LazyField(fields.TypedField):
+    """A TypedField whose value can be held as an unparsed lxml element.
+
+    Deferred values are converted into API objects the first time the field
+    is accessed. This allows large, parsed documents to skip the conversion
+    of content that is never used.
+
+    Note:
+        The ``type_`` of a LazyField must define a ``_binding_class``.
+
+    """
+
+    def defer(self, instance, node):
+        """Sets the value of this field on `instance` to the unparsed lxml
+        element `node`.
+
+        """
+        instance._fields[self] = _DeferredNode(self, node)
+
+    def is_deferred(self, instance):
+        """Returns ``True`` if the value of this field on `instance` has not
+        been built yet.
+
+        """
+        return isinstance(instance._fields.get(self), _DeferredNode)
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+
+        value = instance._fields.get(self)
+
+        if isinstance(value, _DeferredNode):
+            self.__set__(instance, value.build())
+
+        return super(LazyField, self).__get__(instance, owner)
+
+
+class DateTimeField(fields.DateTimeField):
+    """A TypedField for ``xs:dateTime`` values which parses timestamp strings
+    with :func:`stix.utils.dates.parse_value`.
+
+    """
+
+    def _clean(self, value):
+        return utils.dates.parse_value(value)
+
+    def dict_value(self, value):
+        return utils.dates.serialize_value(value)
+
+    def binding_value(self, value):
+        return utils.dates.serialize_value(value)
+
+
 def _validate_version(instance, value):
     if value:
         utils.check_version(instance._ALL_VERSIONS, value)
@@ -363,7 +773,7 @@ class BaseCoreComponent(Entity):
     descriptions = fields.TypedField("Description", type_="stix.common.StructuredTextList", )
     short_descriptions = fields.TypedField("Short_Description", type_="stix.common.StructuredTextList")
     version = fields.TypedField("version", preset_hook=_validate_version)
-    timestamp = fields.DateTimeField("timestamp")
+    timestamp = DateTimeField("timestamp")
     handling = fields.TypedField("Handling", type_="stix.data_marking.Marking")
 
 
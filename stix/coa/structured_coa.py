@@ -2,7 +2,6 @@
 # See LICENSE.txt for complete terms.
 
 # external
-from mixbox import entities
 from mixbox import fields
 
 # internal
@@ -10,7 +9,7 @@ import stix
 from stix.bindings import course_of_action as coa_binding
 
 
-class StructuredCOAFactory(entities.EntityFactory):
+class StructuredCOAFactory(stix.EntityFactory):
     @classmethod
     def entity_class(cls, key):
         import stix.extensions.structured_coa.generic_structured_coa  # noqa
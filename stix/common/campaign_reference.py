@@ -18,7 +18,7 @@ class CampaignRef(stix.Entity):
     _binding_class = common_binding.CampaignReferenceType
 
     idref = fields.TypedField("idref")
-    timestamp = fields.DateTimeField("timestamp")
+    timestamp = stix.DateTimeField("timestamp")
     names = fields.TypedField("Names", Names)
 
     def __init__(self, idref=None, timestamp=None):
@@ -21,7 +21,7 @@ class Confidence(stix.Entity):
 
     value = VocabField("Value")
     descriptions = fields.TypedField("Description", StructuredTextList)
-    timestamp = fields.DateTimeField("timestamp")
+    timestamp = stix.DateTimeField("timestamp")
     timestamp_precision = fields.TypedField("timestamp_precision", preset_hook=validate_precision)
     source = fields.TypedField("Source", type_="stix.common.InformationSource")
     
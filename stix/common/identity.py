@@ -3,7 +3,6 @@
 
 # external
 from mixbox import fields
-from mixbox import entities
 
 # internal
 import stix
@@ -11,10 +10,9 @@ import stix.bindings.stix_common as common_binding
 from stix.bindings.stix_common import IdentityType
 
 
-class IdentityFactory(entities.EntityFactory):
+class IdentityFactory(stix.EntityFactory):
     @classmethod
     def entity_class(cls, key):
-        import stix.extensions.identity.ciq_identity_3_0  # noqa
         return stix.lookup_extension(key, default=Identity)
 
 
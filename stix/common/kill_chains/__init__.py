@@ -7,6 +7,7 @@ from mixbox import typedlist
 # internal
 import stix
 import stix.bindings.stix_common as common_binding
+from stix.base import _set_values, _value_key, _invalidate_value_key
 
 from mixbox.vendor.six import string_types
 
@@ -42,7 +43,7 @@ class KillChain(stix.Entity):
         if not isinstance(other, self.__class__):
             return False
 
-        return other.to_dict() == self.to_dict()
+        return _set_values(other) == _set_values(self)
 
     def __ne__(self, other):
         return not self.__eq__(other)
@@ -65,9 +66,11 @@ class KillChainPhase(stix.Entity):
     _namespace = 'http://stix.mitre.org/common-1'
     _binding_class = _binding.KillChainPhaseType
 
-    phase_id = fields.TypedField("phase_id")
-    name = fields.TypedField("name")
-    ordinality = fields.IntegerField("ordinality")
+    phase_id = fields.TypedField("phase_id", postset_hook=_invalidate_value_key)
+    name = fields.TypedField("name", postset_hook=_invalidate_value_key)
+    ordinality = fields.IntegerField("ordinality", postset_hook=_invalidate_value_key)
+
+    _walk_skip = ("_value_key",)
 
     def __init__(self, phase_id=None, name=None, ordinality=None):
         super(KillChainPhase, self).__init__()
@@ -83,14 +86,19 @@ class KillChainPhase(stix.Entity):
         if not isinstance(other, KillChainPhase):
             return False
 
-        return other.to_dict() == self.to_dict()
+        try:
+            return _value_key(other) == _value_key(self)
+        except TypeError:
+            # Unhashable field values.
+            return _set_values(other) == _set_values(self)
 
     def __ne__(self, other):
         return not self.__eq__(other)
 
     def __hash__(self):
-        # TODO (bworrell): Is all the tuple(sorted(...))) needed?
-        return hash(tuple(sorted(self.to_dict().items())))
+        # Phases are equal if their set field values are equal, so they
+        # hash the same regardless of class.
+        return hash(_value_key(self))
 
 
 class KillChainPhaseReference(KillChainPhase):
@@ -98,8 +106,8 @@ class KillChainPhaseReference(KillChainPhase):
     _namespace = 'http://stix.mitre.org/common-1'
     _binding_class = _binding.KillChainPhaseReferenceType
 
-    kill_chain_id = fields.TypedField("kill_chain_id")
-    kill_chain_name = fields.TypedField("kill_chain_name")
+    kill_chain_id = fields.TypedField("kill_chain_id", postset_hook=_invalidate_value_key)
+    kill_chain_name = fields.TypedField("kill_chain_name", postset_hook=_invalidate_value_key)
 
     def __init__(self, phase_id=None, name=None, ordinality=None, kill_chain_id=None, kill_chain_name=None):
         super(KillChainPhaseReference, self).__init__(phase_id, name, ordinality)
@@ -63,7 +63,7 @@ class RelatedPackageRef(GenericRelationship):
     _binding_class = common_binding.RelatedPackageRefType
 
     idref = fields.IdrefField("idref")
-    timestamp = fields.DateTimeField("timestamp")
+    timestamp = stix.DateTimeField("timestamp")
 
     def __init__(self, idref=None, timestamp=None, confidence=None,
                  information_source=None, relationship=None):
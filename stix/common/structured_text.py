@@ -3,6 +3,7 @@
 import itertools
 import contextlib
 import collections
+import weakref
 from sys import version_info
 
 from mixbox import fields
@@ -10,6 +11,7 @@ from mixbox import fields
 import stix
 import stix.utils as utils
 import stix.bindings.stix_common as stix_common_binding
+from stix.base import _set_values, _value_key, _invalidate_value_key
 from mixbox.vendor.six import text_type
 
 
@@ -17,6 +19,38 @@ from mixbox.vendor.six import text_type
 DEFAULT_ORDINALITY = 1
 
 
+def _track_ordinality(instance, value):
+    """Drops the index of each StructuredTextList which holds `instance` when
+    the ordinality of `instance` changes.
+
+    """
+    owners = instance.__dict__.get("_owners")
+
+    if not owners or instance.ordinality == value:
+        return
+
+    for key, ref in list(owners.items()):
+        owner = ref()
+
+        if owner is None:
+            del owners[key]
+        else:
+            owner._ordinality_index = None
+
+
+def _add_owner(text, owner):
+    """Records that the StructuredTextList `owner` holds `text`, so that
+    changes to the ordinality of `text` drop the index of `owner`.
+
+    """
+    owners = text.__dict__.get("_owners")
+
+    if owners is None:
+        owners = text.__dict__["_owners"] = {}
+
+    owners[id(owner)] = weakref.ref(owner)
+
+
 class StructuredText(stix.Entity):
     """Used for storing descriptive text elements.
 
@@ -31,11 +65,18 @@ class StructuredText(stix.Entity):
     _binding_class = _binding.StructuredTextType
     _namespace = 'http://stix.mitre.org/common-1'
 
-    id_ = fields.IdField("id")
-    ordinality = fields.TypedField("ordinality")
-    value = fields.TypedField("valueOf_", key_name="value")
-    structuring_format = fields.TypedField("structuring_format")
+    id_ = fields.IdField("id", postset_hook=_invalidate_value_key)
+    ordinality = fields.TypedField(
+        "ordinality",
+        preset_hook=_track_ordinality,
+        postset_hook=_invalidate_value_key
+    )
+    value = fields.TypedField("valueOf_", key_name="value", postset_hook=_invalidate_value_key)
+    structuring_format = fields.TypedField("structuring_format", postset_hook=_invalidate_value_key)
 
+    #: ``_owners`` holds weak references to the StructuredTextLists which
+    #: have indexed this object.
+    _walk_skip = ("_value_key", "_owners")
 
     def __init__(self, value=None, ordinality=None):
         super(StructuredText, self).__init__()
@@ -45,6 +86,31 @@ class StructuredText(stix.Entity):
         self.structuring_format = None
         self.ordinality = ordinality
 
+    def __getstate__(self):
+        # Copies do not belong to the lists which hold this object.
+        state = self.__dict__.copy()
+        state.pop("_owners", None)
+        return state
+
+    def __eq__(self, other):
+        if other is self:
+            return True
+
+        if self.__class__ != other.__class__:
+            return False
+
+        try:
+            return _value_key(other) == _value_key(self)
+        except TypeError:
+            # Unhashable field values.
+            return _set_values(other) == _set_values(self)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash((self.__class__, _value_key(self)))
+
     def is_plain(self):
         plain = (
             (not self.id_) and
@@ -105,6 +171,28 @@ def _unset_default(text):
         text.ordinality = ordinality
 
 
+class _OrdinalityIndex(object):
+    """The StructuredText objects of a StructuredTextList keyed by their
+    ordinality, along with a lazily built copy sorted by ordinality.
+
+    """
+    __slots__ = ("size", "items", "sorted")
+
+    def __init__(self, inner):
+        items = {}
+
+        for text in inner:
+            # Keep the first object for each ordinality, like a linear scan.
+            items.setdefault(text.ordinality, text)
+
+        self.size = len(inner)
+        self.items = items
+        self.sorted = None
+
+    def is_current(self, inner):
+        return self.size == len(inner)
+
+
 class StructuredTextList(stix.TypedCollection, collections.Sequence):
     """A sequence type used to store StructureText objects.
 
@@ -117,9 +205,25 @@ class StructuredTextList(stix.TypedCollection, collections.Sequence):
     _contained_type = StructuredText
     _try_cast = True
 
+    #: An _OrdinalityIndex for the collection, or ``None`` if it must be
+    #: rebuilt.
+    _ordinality_index = None
+
+    _walk_skip = ("_ordinality_index",)
+
     def __init__(self, *args):
         stix.TypedCollection.__init__(self, *args)
 
+    def __getstate__(self):
+        # The index is rebuilt when needed.
+        state = self.__dict__.copy()
+        state.pop("_ordinality_index", None)
+        return state
+
+    def _compact(self):
+        # The index is rebuilt when needed.
+        self._ordinality_index = None
+
     def _initialize_inner(self, *args):
         # Check if it was initialized with args=None
         if not any(args):
@@ -131,6 +235,33 @@ class StructuredTextList(stix.TypedCollection, collections.Sequence):
             else:
                 self.add(arg)
 
+    def _index(self):
+        """Returns an up-to-date _OrdinalityIndex for the collection."""
+        index = self._ordinality_index
+
+        if index is None or not index.is_current(self._inner):
+            for text in self._inner:
+                _add_owner(text, self)
+
+            index = _OrdinalityIndex(self._inner)
+            self._ordinality_index = index
+
+        return index
+
+    def _sorted(self):
+        """Returns the cached list of contained objects sorted by ordinality.
+
+        The list is only ever appended to in place, so callers which iterate
+        over it must stop at its current length.
+
+        """
+        index = self._index()
+
+        if index.sorted is None:
+            index.sorted = sorted(self._inner, key=lambda x: int(x.ordinality))
+
+        return index.sorted
+
     def with_id(self, id):
         """Returns a :class:`.StructuredText` object with a matching `id` or
         ``None`` if not found.
@@ -158,7 +289,7 @@ class StructuredTextList(stix.TypedCollection, collections.Sequence):
         :class:`.StructuredText` objects, sorted by their ``ordinality``.
 
         """
-        return sorted(self._inner, key=lambda x: int(x.ordinality))
+        return list(self._sorted())
 
     @property
     def ordinalities(self):
@@ -166,25 +297,26 @@ class StructuredTextList(stix.TypedCollection, collections.Sequence):
         values of the internal :class:`StructuredTex` objects.
 
         """
-        return tuple(x.ordinality for x in self.sorted)
+        return tuple(x.ordinality for x in self._sorted())
 
     @property
     def next_ordinality(self):
         """Returns the "+1" of the highest ordinality in the collection.
 
         """
-        ords = self.ordinalities
+        ordered = self._sorted()
 
-        if not ords:
+        if not ordered:
             return 1
 
-        return ords[-1] + 1
+        return ordered[-1].ordinality + 1
 
     def __iter__(self):
         """Returns an iterator for the collection sorted by ordinality.
 
         """
-        return iter(self.sorted)
+        ordered = self._sorted()
+        return itertools.islice(ordered, len(ordered))
 
     def __getitem__(self, key):
         """Returns the :class:`.StructuredText` object with a matching
@@ -199,10 +331,10 @@ class StructuredTextList(stix.TypedCollection, collections.Sequence):
 
         """
         o = int(key)
+        item = self._index().items.get(o)
 
-        for item in self._inner:
-            if item.ordinality == o:
-                return item
+        if item is not None:
+            return item
 
         error = "No item found with an ordinality of {0}".format(o)
         raise KeyError(error)
@@ -218,7 +350,7 @@ class StructuredTextList(stix.TypedCollection, collections.Sequence):
                 in the collection.
 
         """
-        self._inner.remove(self[key])
+        self.remove(self[key])
 
     def __reversed__(self):
         """Yields the :class:`StructuredText` collection in descending order
@@ -228,6 +360,42 @@ class StructuredTextList(stix.TypedCollection, collections.Sequence):
         for text in reversed(self.sorted):
             yield text
 
+    def _append(self, value):
+        """Appends `value` to the collection, updating the index if `value`
+        does not share its ordinality with an existing object.
+
+        """
+        index = self._index()
+        self._inner.append(value)
+        _add_owner(value, self)
+
+        ordinality = value.ordinality
+
+        if ordinality is None or ordinality in index.items:
+            self._ordinality_index = None
+            return
+
+        index.items[ordinality] = value
+        index.size += 1
+
+        ordered = index.sorted
+
+        if ordered is None:
+            return
+
+        try:
+            in_order = (
+                not ordered or
+                int(ordinality) >= int(ordered[-1].ordinality)
+            )
+        except (TypeError, ValueError):
+            in_order = False
+
+        if in_order:
+            ordered.append(value)
+        else:
+            index.sorted = None
+
     def add(self, value):
         """Adds the :class:`.StructuredText` `value` to the collection.
 
@@ -253,7 +421,7 @@ class StructuredTextList(stix.TypedCollection, collections.Sequence):
         with utils.ignored(KeyError):
             del self[value.ordinality]
 
-        self._inner.append(value)
+        self._append(value)
 
     def update(self, iterable):
         """Adds each item of `iterable` to the collection.
@@ -308,13 +476,14 @@ class StructuredTextList(stix.TypedCollection, collections.Sequence):
             self.add(value)
         else:
             self._shift(value.ordinality)
-            self._inner.append(value)
+            self._append(value)
 
     def remove(self, value):
         """Removes the value from the collection.
 
         """
         self._inner.remove(value)
+        self._ordinality_index = None
 
     def to_obj(self, ns_info=None):
         """Returns a binding object list for the StructuredTextList.
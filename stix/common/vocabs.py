@@ -2,6 +2,8 @@
 # See LICENSE.txt for complete terms.
 
 # stdlib
+import contextlib
+import threading
 from functools import partial
 
 # mixbox
@@ -14,6 +16,26 @@ import stix
 import stix.bindings.stix_common as stix_common_binding
 
 
+#: Per-class ``(_ALLOWED_VALUES, frozenset)`` pairs used for membership
+#: tests.
+_ALLOWED_SETS = {}
+
+
+def _allowed_set(klass, allowed):
+    """Returns a frozenset of the `allowed` values of `klass`."""
+    try:
+        cached, members = _ALLOWED_SETS[klass]
+    except KeyError:
+        cached = members = None
+
+    # _ALLOWED_VALUES may be reassigned after the set was built.
+    if cached is not allowed:
+        members = frozenset(allowed)
+        _ALLOWED_SETS[klass] = (allowed, members)
+
+    return members
+
+
 def validate_value(instance, value):
     allowed = instance._ALLOWED_VALUES
 
@@ -21,9 +43,14 @@ def validate_value(instance, value):
         return
     elif not allowed:
         return
-    elif value in allowed:
-        return
-    else:
+
+    try:
+        valid = value in _allowed_set(type(instance), allowed)
+    except TypeError:
+        # Unhashable values can still be compared with the allowed values.
+        valid = value in allowed
+
+    if not valid:
         error = "Value must be one of {allowed}. Received '{value}'"
         error = error.format(**locals())
         raise ValueError(error)
@@ -68,6 +95,103 @@ class VocabField(fields.TypedField):
         return isinstance(value, VocabString)
 
 
+#: Holds the ``shared`` dictionary of VocabString instances keyed by class
+#: and field values while :func:`interned` is active in a thread.
+_state = threading.local()
+
+#: Per-class cache of whether VocabString instances can be interned.
+_INTERNABLE = {}
+
+
+@contextlib.contextmanager
+def interned():
+    """Shares VocabString instances parsed inside the ``with`` block.
+
+    Large documents repeat the same few vocabulary terms many times. While
+    the context manager is active, VocabString values parsed from XML or
+    dictionaries with the same class, ``xsi:type``, value, ``vocab_name``
+    and ``vocab_reference`` are a single shared instance. Only values
+    parsed by the thread which entered the ``with`` block are shared.
+
+    Shared instances cannot be modified. Setting a field on one raises an
+    ``AttributeError``; assign a new VocabString to the parent field
+    instead. Copies made with :mod:`copy` or :mod:`pickle` are not shared.
+
+    Example:
+        >>> with interned():
+        ...     package = STIXPackage.from_xml("feed.xml")
+
+    """
+    previous = getattr(_state, "shared", None)
+
+    if previous is None:
+        _state.shared = {}
+
+    try:
+        yield
+    finally:
+        _state.shared = previous
+
+
+def _shared():
+    """Returns the shared VocabString instances of the current thread, or
+    ``None`` if :func:`interned` is not active.
+
+    """
+    return getattr(_state, "shared", None)
+
+
+def _func(method):
+    """Returns the function behind an (unbound) method."""
+    return getattr(method, "__func__", method)
+
+
+def _is_internable(klass):
+    """Returns ``True`` if the state of a parsed `klass` instance is fully
+    described by the VocabString fields.
+
+    """
+    try:
+        return _INTERNABLE[klass]
+    except KeyError:
+        pass
+
+    internable = (
+        isinstance(klass, type) and
+        issubclass(klass, VocabString) and
+        _func(klass.from_obj) is _func(stix.Entity.from_obj) and
+        _func(klass.from_dict) is _func(VocabString.from_dict) and
+        set(klass.typed_fields()) == set(VocabString.typed_fields())
+    )
+
+    _INTERNABLE[klass] = internable
+    return internable
+
+
+def _intern(klass, key, build):
+    """Returns the shared `klass` instance for `key`, calling `build` to
+    create it if needed.
+
+    """
+    if not _is_internable(klass):
+        return build()
+
+    shared = _shared()
+    key = (klass,) + key
+
+    try:
+        return shared[key]
+    except KeyError:
+        pass
+    except TypeError:
+        return build()  # unhashable field values
+
+    vocab = build()
+    vocab._interned = True
+    shared[key] = vocab
+    return vocab
+
+
 class VocabFactory(entities.EntityFactory):
     _convert_strings = True
     
@@ -78,6 +202,58 @@ class VocabFactory(entities.EntityFactory):
         except ValueError:
             return VocabString
 
+    @classmethod
+    def from_obj(cls, cls_obj):
+        if cls_obj is None or _shared() is None:
+            return super(VocabFactory, cls).from_obj(cls_obj)
+
+        klass = cls.entity_class(cls.objkey(cls_obj))
+        key = (
+            cls_obj.xsi_type,
+            cls_obj.valueOf_,
+            cls_obj.vocab_name,
+            cls_obj.vocab_reference,
+        )
+
+        return _intern(klass, key, lambda: klass.from_obj(cls_obj))
+
+    @classmethod
+    def from_dict(cls, cls_dict, fallback_xsi_type=None):
+        if not cls_dict or _shared() is None:
+            return super(VocabFactory, cls).from_dict(
+                cls_dict, fallback_xsi_type
+            )
+
+        if isinstance(cls_dict, dict):
+            klass = cls.entity_class(cls.dictkey(cls_dict))
+            key = (
+                cls_dict.get("xsi:type"),
+                cls_dict.get("value"),
+                cls_dict.get("vocab_name"),
+                cls_dict.get("vocab_reference"),
+            )
+        else:
+            # Plain values are given the default xsi:type of their class.
+            klass = cls.entity_class(fallback_xsi_type)
+            key = (klass._XSI_TYPE, cls_dict, None, None)
+
+        return _intern(klass, key, lambda: klass.from_dict(cls_dict))
+
+
+def _check_shared(instance, value):
+    """Raises an ``AttributeError`` if `instance` is a shared VocabString.
+    See :func:`interned`.
+
+    """
+    if instance._interned:
+        error = "Cannot modify a shared VocabString instance (see interned())"
+        raise AttributeError(error)
+
+
+def _preset_value(instance, value):
+    _check_shared(instance, value)
+    validate_value(instance, value)
+
 
 class VocabString(stix.Entity):
     _binding = stix_common_binding
@@ -88,16 +264,27 @@ class VocabString(stix.Entity):
     _XSI_TYPE = None
     _ALLOWED_VALUES = None
 
-    value = fields.TypedField("valueOf_", key_name="value", preset_hook=validate_value)
-    vocab_name = fields.TypedField("vocab_name")
-    vocab_reference = fields.TypedField("vocab_reference")
-    xsi_type = fields.TypedField("xsi_type", key_name="xsi:type")
+    #: ``True`` on instances shared by :func:`interned`.
+    _interned = False
+
+    value = fields.TypedField("valueOf_", key_name="value", preset_hook=_preset_value)
+    vocab_name = fields.TypedField("vocab_name", preset_hook=_check_shared)
+    vocab_reference = fields.TypedField("vocab_reference", preset_hook=_check_shared)
+    xsi_type = fields.TypedField("xsi_type", key_name="xsi:type", preset_hook=_check_shared)
+
+    _walk_skip = ("_interned",)
 
     def __init__(self, value=None):
         super(VocabString, self).__init__()
         self.value = value
         self.xsi_type = self._XSI_TYPE
 
+    def __getstate__(self):
+        # Copies are not shared.
+        state = self.__dict__.copy()
+        state.pop("_interned", None)
+        return state
+
     def __str__(self):
         return str(self.value)
 
@@ -108,6 +295,13 @@ class VocabString(stix.Entity):
 
         return other == self.value
 
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        # Consistent with __eq__, which compares values only.
+        return hash(self.value)
+
     def is_plain(self):
         """Whether the VocabString can be represented as a single value."""
         return (
@@ -157,12 +351,14 @@ def register_vocab(cls):
 
     Also, calculate all the permitted values for class being decorated by
     adding an ``_ALLOWED_VALUES`` tuple of all the values of class members
-    beginning with ``TERM_``.
+    beginning with ``TERM_``. A frozenset of the values is built for
+    :func:`validate_value` membership tests.
 
     """
     add_vocab(cls)
 
     cls._ALLOWED_VALUES = tuple(_get_terms(cls))
+    _allowed_set(cls, cls._ALLOWED_VALUES)
     return cls
 
 
@@ -120,4 +120,6 @@ class Reports(stix.EntityList):
 
 # Namespace flattening
 from .stix_package import STIXPackage  # noqa
-from .stix_header import STIXHeader  # noqa
\ No newline at end of file
+from .stix_header import STIXHeader  # noqa
+from .writer import STIXPackageWriter  # noqa
+from .merger import merge  # noqa
\ No newline at end of file
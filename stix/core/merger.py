@@ -0,0 +1,391 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+"""
+Merges the top-level components of several STIX Packages into one package,
+removing duplicates.
+
+Every step builds or probes dictionaries keyed by id or content, so merging
+runs in time linear in the total size of the input packages.
+"""
+
+# stdlib
+import copy
+import itertools
+import json
+
+# external
+from cybox.core import Observable
+from dateutil.tz import tzutc
+
+# internal
+from ..utils import walk
+from .stix_package import STIXPackage
+from .ttps import TTPs
+
+#: Supported ``dedupe`` modes.
+DEDUPE_ID = "id"
+DEDUPE_CONTENT = "content"
+
+#: The top-level collections of a STIX Package and the STIXPackage methods
+#: which add components to them, in document order.
+_COLLECTIONS = (
+    ("observables", "add_observable"),
+    ("indicators", "add_indicator"),
+    ("ttps", "add_ttp"),
+    ("exploit_targets", "add_exploit_target"),
+    ("incidents", "add_incident"),
+    ("courses_of_action", "add_course_of_action"),
+    ("campaigns", "add_campaign"),
+    ("threat_actors", "add_threat_actor"),
+    ("reports", "add_report"),
+)
+
+#: Component dictionary keys which are not compared by ``dedupe="content"``.
+_VOLATILE_KEYS = ("id", "timestamp")
+
+
+def _timestamp(component):
+    """Returns a value for ordering the versions of `component`.
+
+    Components without a timestamp sort before any timestamp. Timestamps
+    without a timezone are assumed to be UTC.
+
+    """
+    timestamp = getattr(component, "timestamp", None)
+
+    if timestamp is None:
+        return (0,)
+    elif timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=tzutc())
+
+    return (1, timestamp)
+
+
+def _newest(components):
+    """Returns the components with an id from `components`, keeping only the
+    newest version of each id, and the components without one.
+
+    Versions with the same timestamp are resolved in favor of the first one.
+    Components keep the position of the first version of their id.
+
+    """
+    order = []
+    kept = {}
+    anonymous = []
+
+    for component in components:
+        id_ = component.id_
+
+        if not id_:
+            anonymous.append(component)
+            continue
+
+        current = kept.get(id_)
+
+        if current is None:
+            order.append(id_)
+
+        if current is None or _timestamp(component) > _timestamp(current):
+            kept[id_] = component
+
+    return [kept[x] for x in order], anonymous
+
+
+def _references(components, defined):
+    """Returns the idref-only entries of `components`, dropping duplicates
+    and references to ids in `defined`.
+
+    """
+    seen = set(defined)
+    references = []
+
+    for component in components:
+        idref = getattr(component, "idref", None)
+
+        if not idref:
+            references.append(component)
+        elif idref not in seen:
+            seen.add(idref)
+            references.append(component)
+
+    return references
+
+
+def _content_key(component):
+    """Returns a string which is equal for components of the same type with
+    the same content, apart from their id and timestamp.
+
+    """
+    d = component.to_dict()
+
+    for key in _VOLATILE_KEYS:
+        d.pop(key, None)
+
+    return "%s.%s:%s" % (
+        type(component).__module__,
+        type(component).__name__,
+        json.dumps(d, sort_keys=True, default=str)
+    )
+
+
+def _by_content(components, aliases):
+    """Returns `components` without content duplicates, keeping the newest
+    copy. The ids of dropped components are mapped to the id of the copy
+    kept in `aliases`.
+
+    """
+    order = []
+    kept = {}
+
+    for component in components:
+        key = _content_key(component)
+        current = kept.get(key)
+
+        if current is None:
+            order.append(key)
+            kept[key] = component
+        elif _timestamp(component) > _timestamp(current):
+            aliases[current.id_] = component.id_
+            kept[key] = component
+        else:
+            aliases[component.id_] = current.id_
+
+    return [kept[x] for x in order]
+
+
+def _resolve(aliases):
+    """Points every id in `aliases` at the id which was finally kept."""
+    for id_ in list(aliases):
+        target = aliases[id_]
+        path = []
+
+        while target in aliases and target not in path:
+            path.append(target)
+            target = aliases[target]
+
+        aliases[id_] = target
+
+
+def _rewrite_idrefs(components, aliases):
+    """Points the idrefs in `components` which refer to dropped components
+    at the components which were kept.
+
+    """
+    for component in components:
+        for entity in [component] + list(walk.iterwalk(component)):
+            idref = getattr(entity, "idref", None)
+
+            if idref in aliases:
+                entity.idref = aliases[idref]
+
+
+def _as_reference(observable):
+    """Turns the nested `observable` into a reference to its own id."""
+    id_ = observable.id_
+
+    for field in observable.typed_fields():
+        field.__set__(observable, None)
+
+    observable.idref = id_
+
+
+def _dedupe_nested_observables(components, observables):
+    """Turns nested Observables in `components` which repeat the id of
+    an Observable already in the package into idref references.
+
+    """
+    defined = dict((x.id_, x) for x in observables if x.id_)
+
+    for component in components:
+        for observable in walk.iterwalk(component, types=Observable):
+            id_ = observable.id_
+
+            if not id_:
+                continue
+
+            current = defined.get(id_)
+
+            if current is None:
+                defined[id_] = observable
+            elif current is not observable:
+                _as_reference(observable)
+
+
+def _kill_chains(packages):
+    """Returns the TTPs kill chains of `packages`, keeping the first
+    definition of each id.
+
+    """
+    seen = set()
+    kill_chains = []
+
+    for package in packages:
+        ttps = package.ttps
+
+        for kill_chain in (ttps.kill_chains if ttps else None) or ():
+            id_ = kill_chain.id_
+
+            if id_ and id_ in seen:
+                continue
+
+            seen.add(id_)
+            kill_chains.append(kill_chain)
+
+    return kill_chains
+
+
+def _related_packages(packages):
+    """Returns the related packages of `packages`, keeping the first entry
+    for each related package id.
+
+    """
+    seen = set()
+    related = []
+
+    for package in packages:
+        for relationship in package.related_packages or ():
+            item = relationship.item
+            key = item and (item.id_ or item.idref)
+
+            if key and key in seen:
+                continue
+
+            seen.add(key)
+            related.append(relationship)
+
+    return related
+
+
+def _header(packages):
+    """Returns the STIX Header shared by `packages`, or ``None`` if none of
+    them has one.
+
+    Raises:
+        ValueError: If the packages have different headers.
+
+    """
+    header = None
+
+    for package in packages:
+        current = package.stix_header
+
+        if current is None:
+            continue
+
+        if header is None:
+            header, header_dict, owner = current, current.to_dict(), package
+        elif current.to_dict() != header_dict:
+            error = ("Packages {0} and {1} have different STIX Headers. Pass "
+                     "the header of the merged package as stix_header.")
+            raise ValueError(error.format(owner.id_, package.id_))
+
+    return header
+
+
+def merge(packages, dedupe=DEDUPE_ID, stix_header=None):
+    """Returns a new :class:`.STIXPackage` holding the top-level components
+    of `packages` without duplicates.
+
+    Components which share an ``id_`` are reduced to the version with the
+    newest ``timestamp``. With ``dedupe="content"``, components of the same
+    type whose dictionary representations are equal apart from their id and
+    timestamp are also reduced to the newest one, and idrefs to the dropped
+    components are pointed at the one that was kept.
+
+    Top-level idref entries which repeat another entry, or which refer to a
+    component in the same collection, are dropped. Observables nested in
+    the merged components (e.g., an Indicator ``observable``) which repeat
+    the id of an Observable seen earlier become idref references to it.
+
+    The related packages of `packages` are merged the same way, keeping the
+    first entry for each related package id. The ``STIX_Header`` of the
+    merged package is `stix_header`, or the header of `packages` if they
+    all have the same one.
+
+    The merged package holds copies of the kept components, related
+    packages and header, so `packages` are not modified.
+
+    Args:
+        packages: An iterable of :class:`.STIXPackage` instances.
+        dedupe: ``"id"`` or ``"content"``.
+        stix_header: An optional :class:`.STIXHeader` for the merged
+            package. This is required if `packages` have different headers.
+
+    Returns:
+        A :class:`.STIXPackage`.
+
+    Raises:
+        ValueError: If `dedupe` is not a supported mode, or if `packages`
+            have different headers and `stix_header` is ``None``.
+
+    """
+    if dedupe not in (DEDUPE_ID, DEDUPE_CONTENT):
+        error = "dedupe must be '{0}' or '{1}'. Received '{2}'"
+        raise ValueError(error.format(DEDUPE_ID, DEDUPE_CONTENT, dedupe))
+
+    packages = list(packages)
+
+    if stix_header is None:
+        stix_header = _header(packages)
+        copy_header = True
+    else:
+        copy_header = False
+
+    aliases = {}
+    collections_ = []
+
+    for name, _ in _COLLECTIONS:
+        components = []
+
+        for package in packages:
+            components.extend(getattr(package, name) or ())
+
+        defined, anonymous = _newest(components)
+
+        if dedupe == DEDUPE_CONTENT:
+            defined = _by_content(defined, aliases)
+
+        ids = [x.id_ for x in defined]
+        collections_.append(defined + _references(anonymous, ids))
+
+    # The kept components are rewritten below. A single memo keeps objects
+    # which several components share as one object in the copies.
+    memo = {}
+    collections_ = [copy.deepcopy(x, memo) for x in collections_]
+    kill_chains = copy.deepcopy(_kill_chains(packages), memo)
+    related = copy.deepcopy(_related_packages(packages), memo)
+
+    if copy_header:
+        stix_header = copy.deepcopy(stix_header, memo)
+
+    if aliases:
+        _resolve(aliases)
+
+        for idx, components in enumerate(collections_):
+            _rewrite_idrefs(components, aliases)
+
+            # Rewritten references may now repeat each other.
+            defined = [x for x in components if x.id_]
+            anonymous = [x for x in components if not x.id_]
+            ids = [x.id_ for x in defined]
+            collections_[idx] = defined + _references(anonymous, ids)
+
+    nested = itertools.chain.from_iterable(collections_[1:])
+    _dedupe_nested_observables(nested, collections_[0])
+
+    merged = STIXPackage(stix_header=stix_header)
+
+    for (_, add), components in zip(_COLLECTIONS, collections_):
+        for component in components:
+            getattr(merged, add)(component)
+
+    for kill_chain in kill_chains:
+        if merged.ttps is None:
+            merged.ttps = TTPs()
+
+        merged.ttps.kill_chains.append(kill_chain)
+
+    for relationship in related:
+        merged.add_related_package(relationship)
+
+    return merged
@@ -15,6 +15,7 @@ import stix
 from .. import utils
 from ..utils import parser
 from ..utils import deprecated
+from ..utils import walk
 
 # component imports
 from ..campaign import Campaign
@@ -38,6 +39,154 @@ from . import (Campaigns, CoursesOfAction, ExploitTargets, Incidents,
 # binding imports
 import stix.bindings.stix_core as stix_core_binding
 import mixbox.entities
+from mixbox.vendor.six import iteritems, string_types
+
+
+def _invalidate_index(package, value):
+    """Drops the id index and evaluated markings of `package` when a
+    top-level collection is replaced.
+
+    """
+    package._id_index = None
+    package._markings = None
+
+
+class _IdIndex(object):
+    """The entities of a package keyed by id, along with where each entity
+    was found, so that entities which have since been removed from the
+    package are not returned.
+
+    Attributes:
+        entities: A dictionary of id to entity.
+        slots: A dictionary which maps the ``id()`` of each indexed node to a
+            ``(node, parent, key, position)`` tuple. See
+            :func:`stix.utils.walk._child_slots`. A `key` of ``None`` means
+            the slot of `node` in `parent` has not been looked up yet.
+
+    """
+    __slots__ = ("entities", "slots")
+
+    def __init__(self):
+        self.entities = {}
+        self.slots = {}
+
+    def add(self, parent, children=None):
+        """Indexes `children` of `parent` and their descendants, in
+        :func:`.iterwalk` order. The first entity found for an id wins.
+
+        Args:
+            parent: The entity holding `children`.
+            children: A list of ``(child, key, position)`` triples. If
+                ``None``, every child of `parent` is indexed.
+
+        """
+        entities = self.entities
+        slots = self.slots
+
+        if children is None:
+            children = walk._child_slots(parent)
+
+        stack = [(parent,) + x for x in children]
+        stack.reverse()
+
+        while stack:
+            parent, node, key, position = stack.pop()
+            slots[id(node)] = (node, parent, key, position)
+
+            id_ = getattr(node, "id_", None)
+
+            if id_ and id_ not in entities:
+                entities[id_] = node
+
+            children = [(node,) + x for x in walk._child_slots(node)]
+            children.reverse()
+            stack.extend(children)
+
+    def is_reachable(self, entity, root):
+        """Returns ``True`` if `entity` is still held where it was indexed,
+        and so is every ancestor up to `root`.
+
+        """
+        node = entity
+
+        while node is not root:
+            try:
+                held, parent, key, position = self.slots[id(node)]
+            except KeyError:
+                return False
+
+            if held is not node:
+                return False
+
+            if key is None:
+                if not self._locate(node, parent):
+                    return False
+            elif position is None:
+                if walk._slot_value(parent, key) is not node:
+                    return False
+            else:
+                value = walk._slot_value(parent, key)
+
+                if not self._holds(parent, key, value, node, position):
+                    return False
+
+            node = parent
+
+        return True
+
+    def _locate(self, node, parent):
+        """Records the slot of `node` in `parent`. Returns ``False`` if
+        `parent` does not hold `node`.
+
+        """
+        slots = self.slots
+
+        # Entities are usually appended by the add_* methods.
+        for key, value in iteritems(getattr(parent, "_fields", {})):
+            if value is node:
+                slots[id(node)] = (node, parent, key, None)
+                return True
+            elif utils.is_sequence(value) and value and value[-1] is node:
+                slots[id(node)] = (node, parent, key, len(value) - 1)
+                return True
+
+        for child, key, position in walk._child_slots(parent):
+            if child is node:
+                slots[id(node)] = (node, parent, key, position)
+                return True
+
+        return False
+
+    def _holds(self, parent, key, sequence, node, position):
+        """Returns ``True`` if the `sequence` held by `parent` under `key`
+        holds `node`, checking the indexed `position` first.
+
+        """
+        try:
+            if sequence[position] is node:
+                return True
+        except (IndexError, KeyError, TypeError):
+            pass
+
+        if not utils.is_sequence(sequence):
+            return False
+
+        # Items before `node` were added or removed, so the positions of
+        # the other indexed items in `sequence` are updated as well.
+        slots = self.slots
+        found = False
+
+        for position, item in enumerate(sequence):
+            slot = slots.get(id(item))
+
+            if (slot is not None and slot[0] is item and slot[1] is parent
+                    and (slot[2] is key or slot[2] is None)):
+                slots[id(item)] = (item, parent, key, position)
+
+            found = found or item is node
+
+        return found
+
 
 class STIXPackage(stix.Entity):
     """A STIX Package object.
@@ -72,18 +221,56 @@ class STIXPackage(stix.Entity):
     id_ = fields.IdField("id")
     idref = fields.IdrefField("idref", preset_hook=deprecated.field)
     version = fields.TypedField("version")
-    timestamp = fields.DateTimeField("timestamp", preset_hook=deprecated.field)
+    timestamp = stix.DateTimeField("timestamp", preset_hook=deprecated.field)
     stix_header = fields.TypedField("STIX_Header", STIXHeader)
-    campaigns = fields.TypedField("Campaigns", Campaigns)
-    courses_of_action = fields.TypedField("Courses_Of_Action", CoursesOfAction)
-    exploit_targets = fields.TypedField("Exploit_Targets", ExploitTargets)
-    observables = fields.TypedField("Observables", Observables)
-    indicators = fields.TypedField("Indicators", Indicators)
-    incidents = fields.TypedField("Incidents", Incidents)
-    threat_actors = fields.TypedField("Threat_Actors", ThreatActors)
-    ttps = fields.TypedField("TTPs", TTPs)
-    related_packages = fields.TypedField("Related_Packages", RelatedPackages)
-    reports = fields.TypedField("Reports", Reports)
+    campaigns = stix.LazyField(
+        "Campaigns", Campaigns,
+        postset_hook=_invalidate_index
+    )
+    courses_of_action = stix.LazyField(
+        "Courses_Of_Action", CoursesOfAction,
+        postset_hook=_invalidate_index
+    )
+    exploit_targets = stix.LazyField(
+        "Exploit_Targets", ExploitTargets,
+        postset_hook=_invalidate_index
+    )
+    observables = stix.LazyField(
+        "Observables", Observables,
+        postset_hook=_invalidate_index
+    )
+    indicators = stix.LazyField(
+        "Indicators", Indicators,
+        postset_hook=_invalidate_index
+    )
+    incidents = stix.LazyField(
+        "Incidents", Incidents,
+        postset_hook=_invalidate_index
+    )
+    threat_actors = stix.LazyField(
+        "Threat_Actors", ThreatActors,
+        postset_hook=_invalidate_index
+    )
+    ttps = stix.LazyField(
+        "TTPs", TTPs,
+        postset_hook=_invalidate_index
+    )
+    related_packages = fields.TypedField(
+        "Related_Packages", RelatedPackages,
+        postset_hook=_invalidate_index
+    )
+    reports = stix.LazyField(
+        "Reports", Reports,
+        postset_hook=_invalidate_index
+    )
+
+    #: An _IdIndex for the package, or ``None`` if it must be rebuilt.
+    _id_index = None
+
+    #: Evaluated markings. See :func:`stix.data_marking.apply_markings`.
+    _markings = None
+
+    _walk_skip = ("_id_index", "_markings")
 
     def __init__(self, id_=None, idref=None, timestamp=None, stix_header=None,
                  courses_of_action=None, exploit_targets=None, indicators=None,
@@ -92,7 +279,7 @@ class STIXPackage(stix.Entity):
                  reports=None):
         
         super(STIXPackage, self).__init__()
-        
+
         self.id_ = id_ or idgen.create_id("Package")
         self.idref = idref
         self.version = STIXPackage._version
@@ -109,6 +296,140 @@ class STIXPackage(stix.Entity):
         self.reports = reports or Reports()
         self.timestamp = timestamp
 
+    def __getstate__(self):
+        # The caches are rebuilt when needed.
+        state = self.__dict__.copy()
+
+        for name in self._walk_skip:
+            state.pop(name, None)
+
+        return state
+
+    def _load_lazy_fields(self):
+        """Builds any top-level collections which were deferred during a
+        lazy parse.
+
+        """
+        for field in self.typed_fields():
+            if isinstance(field, stix.LazyField):
+                field.__get__(self)
+
+    def to_obj(self, ns_info=None):
+        self._load_lazy_fields()
+        return super(STIXPackage, self).to_obj(ns_info=ns_info)
+
+    def to_dict(self):
+        self._load_lazy_fields()
+        return super(STIXPackage, self).to_dict()
+
+    def walk(self, types=None):
+        self._load_lazy_fields()
+        return super(STIXPackage, self).walk(types=types)
+
+    def _build_index(self):
+        """Returns an _IdIndex of every entity with an ``id_`` in this
+        package. The first entity found for an id wins, which matches the
+        behavior of a :meth:`walk` search.
+
+        """
+        self._load_lazy_fields()
+
+        index = _IdIndex()
+        index.add(self)
+        self._id_index = index
+        return index
+
+    def _update_index(self, collection, entity):
+        """Adds `entity`, which was added to the top-level `collection`, and
+        its descendants to the id index if it has been built. Evaluated
+        markings are dropped.
+
+        """
+        self._markings = None
+        index = self._id_index
+
+        if index is None:
+            return
+
+        if id(collection) not in index.slots:
+            # The collection was created by the add_* method.
+            self._id_index = None
+            return
+
+        index.add(collection, [(entity, None, None)])
+
+    def find(self, id_):
+        """Searches this package for an object with an ``id_`` property that
+        matches `id_`.
+
+        Lookups use an id index which is built on the first call and updated
+        by the ``add_*`` methods. An indexed object is only returned if it
+        still has the id and is still held where it was found, so objects
+        removed from the package (e.g., with ``indicators.remove()``) are not
+        returned. Ids which are not in the index are searched for in the
+        package, and the index is rebuilt if they are found.
+
+        """
+        if not id_:
+            return
+
+        index = self._id_index
+
+        if index is None:
+            index = self._build_index()
+
+        entity = index.entities.get(id_)
+
+        if entity is not None and getattr(entity, "id_", None) == id_:
+            if index.is_reachable(entity, self):
+                return entity
+
+            # The package was changed since the index was built.
+            return self._build_index().entities.get(id_)
+
+        entity = super(STIXPackage, self).find(id_)
+
+        if entity is not None:
+            entity = self._build_index().entities.get(id_)
+
+        return entity
+
+    def resolve(self, idref):
+        """Returns the object in this package which is referenced by `idref`.
+
+        Args:
+            idref: An id string, or an object with an ``idref`` property
+                (e.g., an :class:`.Indicator` reference).
+
+        Returns:
+            The referenced object or ``None`` if it is not in this package.
+
+        """
+        if not isinstance(idref, string_types):
+            idref = getattr(idref, "idref", None)
+
+        return self.find(idref)
+
+    def resolve_all_idrefs(self):
+        """Resolves every ``idref`` found in this package.
+
+        Returns:
+            A dictionary which maps each ``idref`` value to the object in this
+            package with a matching ``id_``, or ``None`` if the referenced
+            object is not in this package.
+
+        """
+        index = self._build_index()
+        resolved = {}
+
+        for entity in self.walk():
+            idref = getattr(entity, "idref", None)
+
+            if idref and idref not in resolved:
+                resolved[idref] = index.entities.get(idref)
+
+        return resolved
+
     def add_indicator(self, indicator):
         """Adds an :class:`.Indicator` object to the :attr:`indicators`
         collection.
@@ -117,6 +438,7 @@ class STIXPackage(stix.Entity):
         if self.indicators is None:
             self.indicators = Indicators()
         self.indicators.append(indicator)
+        self._update_index(self.indicators, indicator)
 
     def add_campaign(self, campaign):
         """Adds a :class:`Campaign` object to the :attr:`campaigns` collection.
@@ -125,6 +447,7 @@ class STIXPackage(stix.Entity):
         if self.campaigns is None:
             self.campaigns = Campaigns()
         self.campaigns.append(campaign)
+        self._update_index(self.campaigns, campaign)
 
     def add_observable(self, observable):
         """Adds an ``Observable`` object to the :attr:`observables` collection.
@@ -138,6 +461,8 @@ class STIXPackage(stix.Entity):
         else:
             self.observables.add(observable)
 
+        self._update_index(self.observables, observable)
+
     def add_incident(self, incident):
         """Adds an :class:`.Incident` object to the :attr:`incidents`
         collection.
@@ -146,6 +471,7 @@ class STIXPackage(stix.Entity):
         if self.incidents is None:
             self.incidents = Incidents()
         self.incidents.append(incident)
+        self._update_index(self.incidents, incident)
 
     def add_threat_actor(self, threat_actor):
         """Adds an :class:`.ThreatActor` object to the :attr:`threat_actors`
@@ -155,6 +481,7 @@ class STIXPackage(stix.Entity):
         if self.threat_actors is None:
             self.threat_actors = ThreatActors()
         self.threat_actors.append(threat_actor)
+        self._update_index(self.threat_actors, threat_actor)
 
     def add_course_of_action(self, course_of_action):
         """Adds an :class:`.CourseOfAction` object to the
@@ -164,6 +491,7 @@ class STIXPackage(stix.Entity):
         if self.courses_of_action is None:
             self.courses_of_action = CoursesOfAction()
         self.courses_of_action.append(course_of_action)
+        self._update_index(self.courses_of_action, course_of_action)
 
     def add_exploit_target(self, exploit_target):
         """Adds an :class:`.ExploitTarget` object to the
@@ -173,6 +501,7 @@ class STIXPackage(stix.Entity):
         if self.exploit_targets is None:
             self.exploit_targets = ExploitTargets()
         self.exploit_targets.append(exploit_target)
+        self._update_index(self.exploit_targets, exploit_target)
 
     def add_ttp(self, ttp):
         """Adds an :class:`.TTP` object to the :attr:`ttps` collection.
@@ -181,6 +510,7 @@ class STIXPackage(stix.Entity):
         if self.ttps is None:
             self.ttps = TTPs()
         self.ttps.append(ttp)
+        self._update_index(self.ttps, ttp)
 
     def add_report(self, report):
         """Adds a :class:`.Report` object to the :attr:`reports` collection.
@@ -189,6 +519,7 @@ class STIXPackage(stix.Entity):
         if self.reports is None:
             self.reports = Reports()
         self.reports.append(report)
+        self._update_index(self.reports, report)
 
     def add_related_package(self, related_package):
         """Adds a :class:`.RelatedPackage` object to the
@@ -198,6 +529,7 @@ class STIXPackage(stix.Entity):
         if self.related_packages is None:
             self.related_packages = RelatedPackages()
         self.related_packages.append(related_package)
+        self._update_index(self.related_packages, related_package)
 
     def add(self, entity):
         """Adds `entity` to a top-level collection. For example, if `entity` is
@@ -230,7 +562,7 @@ class STIXPackage(stix.Entity):
             raise TypeError(error)
 
     @classmethod
-    def from_xml(cls, xml_file, encoding=None):
+    def from_xml(cls, xml_file, encoding=None, lazy=False):
         """Parses the `xml_file` file-like object and returns a
         :class:`STIXPackage` instance.
 
@@ -240,10 +572,37 @@ class STIXPackage(stix.Entity):
             encoding: The character encoding of the `xml_file` input. If
                 ``None``, an attempt will be made to determine the input
                 character encoding. Default is ``None``.
+            lazy: If ``True``, the top-level component collections (e.g.,
+                ``indicators``) are kept as lxml elements and are only
+                converted into API objects when first accessed. Default is
+                ``False``.
 
         Returns:
             An instance of :class:`STIXPackage`.
 
         """
         entity_parser = parser.EntityParser()
-        return entity_parser.parse_xml(xml_file, encoding=encoding)
+        return entity_parser.parse_xml(xml_file, encoding=encoding, lazy=lazy)
+
+    @classmethod
+    def iter_components(cls, xml_file, encoding=None):
+        """Incrementally parses the `xml_file` file-like object and yields
+        each top-level component (e.g., :class:`.Indicator`, :class:`.TTP`,
+        :class:`.Incident` or ``cybox.core.Observable``) as soon as it has
+        been read.
+
+        Parsed XML elements are discarded after each component is built, so
+        memory usage stays flat regardless of the size of `xml_file`.
+
+        Args:
+            xml_file: A filename/path or a binary file-like object.
+            encoding: The character encoding of the `xml_file` input. If
+                ``None``, an attempt will be made to determine the input
+                character encoding. Default is ``None``.
+
+        Returns:
+            A generator of top-level component instances.
+
+        """
+        entity_parser = parser.EntityParser()
+        return entity_parser.iter_components(xml_file, encoding=encoding)
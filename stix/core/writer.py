@@ -0,0 +1,367 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+# mixbox
+from mixbox import binding_utils
+from mixbox.vendor.six import iteritems, text_type
+
+# cybox
+from cybox.core import Observable
+
+# internal
+from .. import utils
+from ..utils.parser import COMPONENT_FIELDS
+from ..utils.serializer import NamespaceCollector, Serializer
+from .stix_package import STIXPackage
+
+
+class _Marker(object):
+    """Stands in for a binding object during export and records the
+    arguments it was exported with.
+
+    The marker writes itself to the output so the surrounding output can be
+    split around it.
+
+    """
+    def __init__(self):
+        self.args = None
+        self.kwargs = None
+
+    def export(self, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        args[0](self)
+
+    def replay(self, export, lwrite, **kwargs):
+        """Calls `export` with the recorded arguments, writing to `lwrite`
+        instead of the original output.
+
+        """
+        args = (lwrite,) + self.args[1:]
+        kwargs = dict(self.kwargs, **kwargs)
+        export(*args, **kwargs)
+
+
+def _split(parts, marker):
+    """Returns the output fragments in `parts` before and after `marker`."""
+    idx = parts.index(marker)
+    return parts[:idx], parts[idx + 1:]
+
+
+class _Section(object):
+    """A top-level component collection (e.g., ``Indicators``) of the package
+    being written.
+
+    """
+    def __init__(self, field, package):
+        self.field = field
+        self.marker = _Marker()
+        self.collection = field.__get__(package)
+        self.item_type = field.type_._multiple_field().type_
+        self.item_marker = None
+        self.tail = None
+
+    @property
+    def has_items(self):
+        return bool(self.collection is not None and len(self.collection))
+
+
+class STIXPackageWriter(object):
+    """Writes a STIX Package to a file-like object one top-level component at
+    a time.
+
+    The ``STIX_Package`` element, namespace declarations and ``STIX_Header``
+    are written when the writer is opened. Each component passed to
+    :meth:`write` is serialized immediately into its top-level collection
+    (e.g., ``Indicators``), so the full package never needs to be held in
+    memory.
+
+    Namespaces found in the `package` and the namespaces of every component
+    type are declared on the ``STIX_Package`` element. Any other namespaces
+    used by a component are declared on the component's own element.
+
+    Components must be written in the order their collections appear in a
+    STIX Package: Observables, Indicators, TTPs, Exploit Targets, Incidents,
+    Courses of Action, Campaigns, Threat Actors and Reports.
+
+    Example:
+        >>> with STIXPackageWriter(open("out.xml", "wb")) as writer:
+        ...     for indicator in feed:
+        ...         writer.write(indicator)
+
+    Args:
+        file_: A file-like object to write to. This must accept bytes unless
+            `encoding` is ``None``.
+        package: A :class:`.STIXPackage` which provides the package
+            attributes, ``STIX_Header`` and ``Related_Packages``. Components
+            already in its collections are written before any components
+            passed to :meth:`write`. If ``None``, an empty package is used.
+        ns_dict: Dictionary of XML namespace definitions (namespace is key,
+            alias is value) to declare on the ``STIX_Package`` element.
+        schemaloc_dict: Dictionary of XML ``namespace: schema location``
+            mappings to include in the ``xsi:schemaLocation`` attribute.
+        include_schemalocs: Write an ``xsi:schemaLocation`` attribute on
+            the ``STIX_Package`` element.
+        pretty: Pretty-print the XML.
+        encoding: The output character encoding. If ``None``, strings are
+            written instead of bytes.
+
+    """
+    def __init__(self, file_, package=None, ns_dict=None, schemaloc_dict=None,
+                 include_schemalocs=False, pretty=True, encoding='utf-8'):
+        self._file = file_
+        self._package = package or STIXPackage()
+        self._ns_dict = ns_dict
+        self._schemaloc_dict = schemaloc_dict
+        self._include_schemalocs = include_schemalocs
+        self._pretty = pretty
+        self._encoding = encoding
+
+        self._sections = [
+            _Section(getattr(STIXPackage, x), self._package)
+            for x in COMPONENT_FIELDS
+        ]
+
+        self._serializer = None
+        self._nsmap = None
+        self._declared = None
+        self._tail = None
+        self._current = -1
+        self._closed = False
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+    @property
+    def is_open(self):
+        return self._tail is not None and not self._closed
+
+    def _output(self, parts):
+        """Writes the output fragments in `parts` to the file."""
+        s = text_type().join(parts)
+
+        if self._encoding:
+            s = s.encode(self._encoding)
+
+        self._file.write(s)
+
+    def _collect(self):
+        """Returns a finalized NamespaceCollector for the package and the
+        component types.
+
+        """
+        ns_info = NamespaceCollector()
+        self._serializer = Serializer(ns_info)
+        self._serializer.collect(self._package)
+
+        for section in self._sections:
+            for klass in (section.field.type_, section.item_type):
+                ns_info.collect(klass.__new__(klass))
+
+        ns_info.finalize(ns_dict=self._ns_dict,
+                         schemaloc_dict=self._schemaloc_dict)
+        return ns_info
+
+    def open(self):
+        """Writes the ``STIX_Package`` start tag, namespace declarations and
+        ``STIX_Header``.
+
+        This is called automatically when the writer is used as a context
+        manager.
+
+        """
+        if self._tail is not None:
+            raise ValueError("STIXPackageWriter is already open")
+
+        ns_info = self._collect()
+        self._nsmap = dict(ns_info.binding_namespaces)
+        self._declared = frozenset(self._nsmap)
+
+        delim = "\n\t" if self._pretty else " "
+        namespace_def = delim + ns_info.get_xmlns_string(delim)
+
+        if self._include_schemalocs:
+            schemaloc = ns_info.get_schema_location_string(delim)
+            namespace_def += (delim + schemaloc)
+
+        # Replace every collection with a marker which records where and how
+        # the collection would have been exported.
+        obj = self._serializer.binding_obj(self._package)
+
+        for section in self._sections:
+            setattr(obj, section.field.name, section.marker)
+
+        parts = []
+
+        with binding_utils.save_encoding(self._encoding):
+            obj.export(
+                parts.append,
+                0,
+                self._nsmap,
+                pretty_print=self._pretty,
+                namespacedef_=namespace_def
+            )
+
+        head, _ = _split(parts, self._sections[0].marker)
+        _, self._tail = _split(parts, self._sections[-1].marker)
+
+        self._output(head)
+
+    def _export(self, export, marker, **kwargs):
+        """Returns the output fragments of `export` called with the arguments
+        recorded by `marker`.
+
+        """
+        parts = []
+
+        with binding_utils.save_encoding(self._encoding):
+            marker.replay(export, parts.append, **kwargs)
+
+        return parts
+
+    def _open_section(self, idx):
+        """Writes the start tag of the collection at `idx`, followed by any
+        components already in the package collection.
+
+        """
+        section = self._sections[idx]
+        collection = section.collection
+
+        if collection is None:
+            collection = section.field.type_()
+
+        # Append a marker to the collection items so the output can be split
+        # between the start and end tags.
+        obj = self._serializer.binding_obj(collection)
+        name = collection._multiple_field().name
+        items = getattr(obj, name) or []
+        section.item_marker = _Marker()
+        setattr(obj, name, list(items) + [section.item_marker])
+
+        parts = self._export(obj.export, section.marker)
+        head, section.tail = _split(parts, section.item_marker)
+
+        self._output(head)
+        self._current = idx
+
+    def _close_section(self):
+        """Writes the end tag of the open collection."""
+        if self._current < 0:
+            return
+
+        section = self._sections[self._current]
+        self._output(section.tail)
+        section.tail = None
+
+    def _advance(self, idx):
+        """Closes the open collection and opens the collection at `idx`.
+        Package collections in between which have components are written
+        in full.
+
+        """
+        self._close_section()
+
+        for pending in range(self._current + 1, idx):
+            if self._sections[pending].has_items:
+                self._open_section(pending)
+                self._close_section()
+
+        if idx < len(self._sections):
+            self._open_section(idx)
+        else:
+            self._current = idx
+
+    def _section_index(self, component):
+        """Returns the index of the collection `component` belongs to."""
+        for idx, section in enumerate(self._sections):
+            if isinstance(component, section.item_type):
+                return idx
+
+        error = "Cannot write type '{0}' to a top-level collection"
+        raise TypeError(error.format(type(component)))
+
+    def _serializer_for(self, component):
+        """Returns a Serializer for `component` and the namespace declarations
+        for namespaces it uses which were not declared on the
+        ``STIX_Package`` element.
+
+        """
+        ns_info = NamespaceCollector()
+        serializer = Serializer(ns_info)
+        serializer.collect(component)
+        ns_info.finalize(ns_dict=self._ns_dict)
+
+        undeclared = sorted(
+            (uri, prefix)
+            for uri, prefix in iteritems(ns_info.binding_namespaces)
+            if uri not in self._declared
+        )
+
+        # The bindings look up prefixes in the nsmap which is shared by
+        # every component.
+        self._nsmap.update(undeclared)
+
+        xmlns = ['xmlns:%s="%s"' % (prefix, uri) for uri, prefix in undeclared]
+        return serializer, " ".join(xmlns)
+
+    def write(self, component):
+        """Serializes `component` and writes it to its top-level collection.
+
+        Args:
+            component: A top-level STIX component (e.g., an
+                :class:`.Indicator`) or a CybOX ``Observable`` or
+                ``ObjectProperties`` instance.
+
+        Raises:
+            TypeError: If `component` cannot be written to a top-level
+                collection.
+            ValueError: If the writer is not open, or if the collection for
+                `component` precedes a collection that has already been
+                written.
+
+        """
+        if not self.is_open:
+            raise ValueError("STIXPackageWriter is not open")
+
+        if utils.is_cybox(component) and not isinstance(component, Observable):
+            component = Observable(component)
+
+        idx = self._section_index(component)
+
+        if idx < self._current:
+            error = (
+                "Cannot write to {0} after {1} has been written. Components "
+                "must be written in STIX Package collection order."
+            )
+            error = error.format(self._sections[idx].field.name,
+                                 self._sections[self._current].field.name)
+            raise ValueError(error)
+        elif idx > self._current:
+            self._advance(idx)
+
+        serializer, namespace_def = self._serializer_for(component)
+        obj = serializer.binding_obj(component)
+
+        parts = self._export(obj.export, self._sections[idx].item_marker,
+                             namespacedef_=namespace_def)
+        self._output(parts)
+
+    def close(self):
+        """Writes any remaining package collections and the ``STIX_Package``
+        end tag.
+
+        This is called automatically when the writer is used as a context
+        manager.
+
+        """
+        if not self.is_open:
+            return
+
+        self._advance(len(self._sections))
+        self._output(self._tail)
+        self._closed = True
@@ -2,8 +2,8 @@
 # See LICENSE.txt for complete terms.
 
 # external
+from lxml import etree
 from mixbox import fields
-from mixbox import entities
 
 # internal
 import stix
@@ -13,12 +13,9 @@ from stix.common import InformationSource
 import stix.bindings.data_marking as stix_data_marking_binding
 
 
-class MarkingStructureFactory(entities.EntityFactory):
+class MarkingStructureFactory(stix.EntityFactory):
     @classmethod
     def entity_class(cls, key):
-        import stix.extensions.marking.tlp  # noqa
-        import stix.extensions.marking.simple_marking  # noqa
-        import stix.extensions.marking.terms_of_use_marking  # noqa
         return stix.lookup_extension(key, default=MarkingStructure)
 
 
@@ -90,5 +87,225 @@ class Marking(stix.EntityList):
         self.marking.append(value)
 
 
+#: Compiled ``controlled_structure`` XPath expressions, keyed by the
+#: expression and the namespace mappings in scope. This is cleared when it
+#: holds ``_XPATHS_SIZE`` expressions.
+_XPATHS = {}
+_XPATHS_SIZE = 256
+
+_MARKING_NS = 'http://data-marking.mitre.org/Marking-1'
+_TAG_MARKING = "{%s}Marking" % _MARKING_NS
+_TAG_CONTROLLED_STRUCTURE = "{%s}Controlled_Structure" % _MARKING_NS
+
+
+def _localname(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def _compile(xpath, node):
+    """Returns a compiled ``lxml.etree.XPath`` for the `xpath` expression,
+    using the namespace mappings in scope on `node`.
+
+    Raises:
+        ValueError: If `xpath` is not a valid XPath expression.
+
+    """
+    namespaces = tuple(
+        sorted((k, v) for k, v in node.nsmap.items() if k is not None)
+    )
+    key = (xpath, namespaces)
+
+    try:
+        return _XPATHS[key]
+    except KeyError:
+        pass
+
+    try:
+        compiled = etree.XPath(xpath, namespaces=dict(namespaces))
+    except etree.XPathError as ex:
+        error = "Invalid controlled_structure XPath '{0}': {1}"
+        raise ValueError(error.format(xpath, ex))
+
+    if len(_XPATHS) >= _XPATHS_SIZE:
+        _XPATHS.clear()
+
+    _XPATHS[key] = compiled
+    return compiled
+
+
+def _handling_owner(package, handling):
+    """Returns the API object which holds the ``Handling`` element
+    `handling`, or ``None`` if it cannot be found.
+
+    """
+    parent = handling.getparent()
+    id_ = parent.get("id")
+
+    if id_:
+        return package.find(id_)
+
+    name = _localname(parent.tag)
+    grandparent = parent.getparent()
+
+    if name == "STIX_Header" and grandparent is handling.getroottree().getroot():
+        return package.stix_header
+
+    # Report headers are held by their Report.
+    if name == "Header" and grandparent is not None and grandparent.get("id"):
+        return getattr(package.find(grandparent.get("id")), "header", None)
+
+    return None
+
+
+def _specifications(package, handling):
+    """Returns ``(element, MarkingSpecification)`` pairs for the ``Marking``
+    elements under the ``Handling`` element `handling`.
+
+    The objects held by `package` are returned where they can be matched to
+    their elements. Other elements are parsed.
+
+    """
+    nodes = [x for x in handling if x.tag == _TAG_MARKING]
+    owner = _handling_owner(package, handling)
+    specs = list(getattr(owner, "handling", None) or ())
+
+    if len(specs) == len(nodes):
+        return list(zip(nodes, specs))
+
+    pairs = []
+
+    for node in nodes:
+        binding_obj = MarkingSpecification._binding_class.factory()
+        binding_obj.build(node)
+        pairs.append((node, MarkingSpecification.from_obj(binding_obj)))
+
+    return pairs
+
+
+def _handlings(root):
+    """Yields the ``Handling`` elements under `root`, found through their
+    first ``Marking`` child.
+
+    """
+    for node in root.iter(_TAG_MARKING):
+        previous = node.getprevious()
+
+        if previous is None or previous.tag != _TAG_MARKING:
+            yield node.getparent()
+
+
+def _select(node):
+    """Returns the elements selected by the ``Controlled_Structure`` of the
+    ``Marking`` element `node`.
+
+    """
+    controlled = node.find(_TAG_CONTROLLED_STRUCTURE)
+
+    if controlled is None or not (controlled.text or "").strip():
+        return []
+
+    xpath = _compile(controlled.text.strip(), controlled)
+
+    try:
+        result = xpath(controlled)
+    except etree.XPathError as ex:
+        error = "Cannot evaluate controlled_structure XPath '{0}': {1}"
+        raise ValueError(error.format(xpath.path, ex))
+
+    # Expressions may select attributes and text, or return a number.
+    if not isinstance(result, list):
+        return []
+
+    return [x for x in result if isinstance(x, etree._Element)]
+
+
+def _evaluate(package, root):
+    """Returns a dictionary which maps the id of each element under `root`
+    to the list of MarkingStructure objects which apply to it.
+
+    """
+    markings = {}
+
+    for handling in _handlings(root):
+        for node, spec in _specifications(package, handling):
+            structures = [x for x in spec.marking_structures if x is not None]
+
+            if not structures:
+                continue
+
+            for element in _select(node):
+                id_ = element.get("id")
+
+                if not id_:
+                    continue
+
+                applied = markings.setdefault(id_, [])
+                applied.extend(
+                    x for x in structures
+                    if not any(x is y for y in applied)
+                )
+
+    return markings
+
+
+def apply_markings(package, refresh=False):
+    """Evaluates the ``controlled_structure`` XPath of every marking in
+    `package` and returns the markings which apply to each component.
+
+    The package is serialized to XML once and each XPath is evaluated with
+    its ``Controlled_Structure`` element as the context node. A component
+    is marked if its own element is selected, so expressions should select
+    elements (e.g., ``../../../descendant-or-self::node()``). Each distinct
+    XPath is compiled once per process.
+
+    The result is cached on `package`. Adding or replacing top-level
+    components drops the cached result. Other changes to the package are
+    not tracked, so `refresh` must be set after making them.
+
+    Args:
+        package: A :class:`.STIXPackage` instance.
+        refresh: If ``True``, evaluate the markings even if a cached result
+            exists.
+
+    Returns:
+        A dictionary which maps each ``id`` in the package to a list of the
+        :class:`MarkingStructure` objects which apply to it. Ids without
+        markings are not included.
+
+    Raises:
+        ValueError: If a ``controlled_structure`` is not a valid XPath
+            expression or cannot be evaluated.
+
+    """
+    markings = getattr(package, "_markings", None)
+
+    if markings is not None and not refresh:
+        return markings
+
+    root = etree.fromstring(package.to_xml())
+    markings = _evaluate(package, root)
+    package._markings = markings
+    return markings
+
+
+def markings_for(package, entity, refresh=False):
+    """Returns the markings in `package` which apply to `entity`.
+
+    See :func:`apply_markings`.
+
+    Args:
+        package: A :class:`.STIXPackage` instance.
+        entity: An object with an ``id_`` in `package`, or an id string.
+        refresh: If ``True``, evaluate the markings even if a cached result
+            exists.
+
+    Returns:
+        A list of :class:`MarkingStructure` objects.
+
+    """
+    id_ = getattr(entity, "id_", entity)
+    return list(apply_markings(package, refresh=refresh).get(id_, ()))
+
+
 # Backwards compatibility
 add_extension = stix.add_extension
@@ -0,0 +1,388 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+"""
+Indexes the relationships between the components of a STIX Package.
+
+STIX relationships (``RelatedIndicator``, ``RelatedTTP``,
+``RelatedCampaignRef``, etc.) are held by many different fields, most of
+them ``GenericRelationshipList`` subclasses. A :class:`RelationshipGraph`
+scans a package once and records every relationship as an edge between the
+ids of two components, whether the related component is embedded or
+referenced by ``idref``.
+
+Ids are interned to integers and the edges of each node are stored in
+compact arrays, so neighborhood queries only follow array offsets.
+"""
+
+# stdlib
+import array
+import collections
+
+# external
+from cybox.core import Observable
+from mixbox import entities
+from mixbox.vendor.six import text_type
+
+# internal
+import stix
+from stix.common.related import GenericRelationship, RelatedPackageRef
+
+#: Edge directions.
+OUT = "out"
+IN = "in"
+BOTH = "both"
+
+
+class Edge(collections.namedtuple("Edge",
+                                  "source target name relationship "
+                                  "confidence")):
+    """A relationship between two components.
+
+    Attributes:
+        source: The id of the component which holds the relationship.
+        target: The id of the related component.
+        name: The name of the field on the source component which holds the
+            relationship (e.g., ``"related_indicators"`` or
+            ``"attributed_threat_actors"``).
+        relationship: The ``relationship`` value of the relationship, or
+            ``None``.
+        confidence: The ``confidence`` value of the relationship, or
+            ``None``.
+
+    """
+    __slots__ = ()
+
+
+def _text(vocab):
+    """Returns the value of a VocabString (or any other value) as text."""
+    value = getattr(vocab, "value", vocab)
+
+    if value is None:
+        return None
+
+    return text_type(value)
+
+
+def _confidence(relationship):
+    confidence = relationship.confidence
+
+    if confidence is None:
+        return None
+
+    return _text(confidence.value)
+
+
+def _target(relationship):
+    """Returns a ``(target id, embedded item)`` tuple for a
+    GenericRelationship. The item is ``None`` if it only holds a reference.
+
+    """
+    if isinstance(relationship, RelatedPackageRef):
+        return relationship.idref, None
+
+    item = getattr(relationship, "item", None)
+
+    if item is None:
+        return None, None
+
+    idref = getattr(item, "idref", None)
+
+    if idref:
+        return idref, None
+
+    return getattr(item, "id_", None), item
+
+
+def _is_component(entity):
+    """Returns ``True`` if `entity` is a graph node when it has an id."""
+    # Avoid a circular import.
+    from stix.core import STIXPackage
+
+    return isinstance(entity, (stix.BaseCoreComponent, STIXPackage,
+                               Observable))
+
+
+def _children(entity):
+    """Yields ``(field name, value)`` pairs for the TypedField values of
+    `entity` and the items of collections.
+
+    """
+    if isinstance(entity, stix.TypedCollection):
+        for item in entity:
+            yield None, item
+        return
+
+    for field, value in list(getattr(entity, "_fields", {}).items()):
+        if isinstance(field, stix.LazyField):
+            value = field.__get__(entity)
+
+        if value is None:
+            continue
+
+        name = getattr(field, "key_name", None) or field.name
+
+        if field.multiple:
+            for item in value:
+                yield name, item
+        else:
+            yield name, value
+
+
+def _is_container(value):
+    """Returns ``True`` if `value` may hold relationships."""
+    # Observable content never holds STIX relationships, but cybox
+    # Observables collections hold Observables.
+    if isinstance(value, Observable):
+        return False
+
+    return isinstance(value, (stix.Entity, stix.TypedCollection,
+                              entities.EntityList))
+
+
+class RelationshipGraph(object):
+    """A graph of the relationships between the components of a STIX
+    Package.
+
+    Nodes are component ids. Components which are only referenced by an
+    ``idref`` are nodes without content.
+
+    Args:
+        package: A :class:`.STIXPackage`.
+
+    """
+    def __init__(self, package):
+        # Interned ids.
+        self._ids = []
+        self._index = {}
+
+        # Embedded components by node.
+        self._content = {}
+
+        # Interned (name, relationship, confidence) edge types.
+        self._types = []
+        self._type_index = {}
+
+        edges = self._scan(package)
+        self._out = self._adjacency(edges, 0, 1)
+        self._in = self._adjacency(edges, 1, 0)
+
+    @classmethod
+    def from_package(cls, package):
+        """Returns a :class:`RelationshipGraph` for `package`."""
+        return cls(package)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, id_):
+        return id_ in self._index
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def _node(self, id_):
+        try:
+            return self._index[id_]
+        except KeyError:
+            node = self._index[id_] = len(self._ids)
+            self._ids.append(id_)
+            return node
+
+    def _type(self, key):
+        try:
+            return self._type_index[key]
+        except KeyError:
+            idx = self._type_index[key] = len(self._types)
+            self._types.append(key)
+            return idx
+
+    def _scan(self, package):
+        """Returns a list of ``(source, target, type)`` node index triples
+        for the relationships in `package`.
+
+        """
+        edges = []
+        stack = [(package, None, None)]
+
+        while stack:
+            entity, owner, name = stack.pop()
+
+            if isinstance(entity, GenericRelationship):
+                target, item = _target(entity)
+
+                if target and owner is not None:
+                    key = (name, _text(entity.relationship),
+                           _confidence(entity))
+                    edges.append((owner, self._node(target), self._type(key)))
+
+                if item is not None:
+                    stack.append((item, owner, name))
+
+                continue
+
+            id_ = getattr(entity, "id_", None)
+
+            if id_ and _is_component(entity) and not getattr(entity, "idref", None):
+                owner = self._node(id_)
+                name = None
+                self._content.setdefault(owner, entity)
+
+            children = []
+
+            for field_name, value in _children(entity):
+                if isinstance(value, GenericRelationship) or _is_container(value):
+                    children.append((value, owner, name or field_name))
+                elif isinstance(value, Observable) and value.id_:
+                    self._content.setdefault(self._node(value.id_), value)
+
+            # Visit children in document order.
+            children.reverse()
+            stack.extend(children)
+
+        return edges
+
+    def _adjacency(self, edges, source, target):
+        """Returns ``(offsets, targets, types)`` arrays. The edges of node
+        ``n`` are at ``offsets[n]`` up to ``offsets[n + 1]``.
+
+        """
+        count = len(self._ids)
+        offsets = array.array("l", [0] * (count + 1))
+
+        for edge in edges:
+            offsets[edge[source] + 1] += 1
+
+        for idx in range(count):
+            offsets[idx + 1] += offsets[idx]
+
+        position = array.array("l", offsets[:-1])
+        targets = array.array("l", [0] * len(edges))
+        types = array.array("l", [0] * len(edges))
+
+        for edge in edges:
+            node = edge[source]
+            targets[position[node]] = edge[target]
+            types[position[node]] = edge[2]
+            position[node] += 1
+
+        return offsets, targets, types
+
+    def _lookup(self, id_):
+        try:
+            return self._index[id_]
+        except KeyError:
+            raise KeyError("No component with id '%s'" % id_)
+
+    def _adjacent(self, node, direction, names):
+        """Yields ``(neighbor, type index, outgoing)`` triples for `node`."""
+        if direction not in (OUT, IN, BOTH):
+            raise ValueError("Unknown direction '%s'" % direction)
+
+        tables = []
+
+        if direction in (OUT, BOTH):
+            tables.append((self._out, True))
+        if direction in (IN, BOTH):
+            tables.append((self._in, False))
+
+        for (offsets, targets, types), outgoing in tables:
+            for pos in range(offsets[node], offsets[node + 1]):
+                type_ = types[pos]
+
+                if names is None or self._types[type_][0] in names:
+                    yield targets[pos], type_, outgoing
+
+    def entity(self, id_):
+        """Returns the component with the id `id_`, or ``None`` if the
+        package only refers to it.
+
+        Raises:
+            KeyError: If `id_` is not in the graph.
+
+        """
+        return self._content.get(self._lookup(id_))
+
+    def edges(self, id_, direction=OUT, names=None):
+        """Returns the relationships of the component `id_`.
+
+        Args:
+            id_: A component id.
+            direction: ``"out"`` for the relationships held by the component,
+                ``"in"`` for the relationships which refer to it, or
+                ``"both"``.
+            names: An optional collection of relationship field names
+                (e.g., ``["related_indicators"]``) to follow.
+
+        Returns:
+            A list of :class:`Edge` tuples.
+
+        """
+        node = self._lookup(id_)
+        found = []
+
+        for neighbor, type_, outgoing in self._adjacent(node, direction, names):
+            name, relationship, confidence = self._types[type_]
+
+            if outgoing:
+                source, target = id_, self._ids[neighbor]
+            else:
+                source, target = self._ids[neighbor], id_
+
+            found.append(Edge(source, target, name, relationship, confidence))
+
+        return found
+
+    def neighbors(self, id_, direction=BOTH, names=None):
+        """Returns the ids of the components related to `id_`, without
+        duplicates. See :meth:`edges` for the arguments.
+
+        """
+        node = self._lookup(id_)
+        seen = set()
+        found = []
+
+        for neighbor, _, _ in self._adjacent(node, direction, names):
+            if neighbor not in seen:
+                seen.add(neighbor)
+                found.append(self._ids[neighbor])
+
+        return found
+
+    def bfs(self, id_, depth=None, direction=BOTH, names=None):
+        """Yields ``(id, distance)`` pairs for the components reachable from
+        `id_` in breadth-first order, starting with ``(id_, 0)``.
+
+        Args:
+            id_: The id of the component to start from.
+            depth: The maximum number of relationships to follow, or ``None``
+                for no limit.
+            direction: See :meth:`edges`.
+            names: See :meth:`edges`.
+
+        """
+        start = self._lookup(id_)
+        distances = {start: 0}
+        queue = collections.deque([start])
+
+        if names is not None:
+            names = frozenset(names)
+
+        while queue:
+            node = queue.popleft()
+            distance = distances[node]
+            yield self._ids[node], distance
+
+            if depth is not None and distance >= depth:
+                continue
+
+            for neighbor, _, _ in self._adjacent(node, direction, names):
+                if neighbor not in distances:
+                    distances[neighbor] = distance + 1
+                    queue.append(neighbor)
+
+    def neighborhood(self, id_, k, direction=BOTH, names=None):
+        """Returns a dictionary which maps the ids of the components within
+        `k` relationships of `id_` (including `id_`) to their distance.
+
+        """
+        return dict(self.bfs(id_, k, direction, names))
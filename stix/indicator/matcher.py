@@ -0,0 +1,588 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+"""
+Evaluates the observable patterns of STIX Indicators against events.
+
+A :class:`Matcher` compiles a set of Indicators once:
+
+* Every value an Indicator tests for (a hash, domain name, URL, e-mail
+  address, IP address or CIDR block) becomes an entry in a single lookup
+  table. IP addresses and CIDR blocks are keyed by their network prefix, so
+  an event address is looked up once per prefix length in use.
+* The boolean structure of each Indicator (observable compositions,
+  composite indicator expressions and ``negate``) becomes an evaluation plan
+  over the table entries.
+
+:meth:`Matcher.match` looks up the values of an event and only evaluates the
+plans which refer to a matched entry, so the cost of matching an event does
+not depend on the number of compiled Indicators.
+
+Events are dictionaries which map the keys below to a value or a list of
+values:
+
+* ``"address"``: IPv4 or IPv6 addresses (``Address`` objects).
+* ``"domain"``: Domain names (``DomainName`` objects).
+* ``"url"``: URLs (``URI`` objects).
+* ``"email"``: E-mail addresses (``Address`` objects with the ``e-mail``
+  category).
+* ``"md5"``, ``"sha1"``, ``"sha256"``, etc.: File hashes, keyed by the
+  lowercase hash type (``File`` objects). Hashes without a type are keyed by
+  ``"hash"``.
+
+Only the properties listed above are evaluated, with the ``Equals`` and
+``DoesNotEqual`` conditions (or no condition). The hashes of a ``File`` match
+if any one of them matches. Patterns which cannot be evaluated, such as other
+object types, other conditions and CybOX Events, never match.
+"""
+
+# stdlib
+import binascii
+import socket
+
+# external
+from cybox.objects.address_object import Address
+from cybox.objects.domain_name_object import DomainName
+from cybox.objects.file_object import File
+from cybox.objects.uri_object import URI
+from mixbox.vendor.six import iteritems, text_type
+
+#: Event keys.
+ADDRESS = "address"
+DOMAIN = "domain"
+URL = "url"
+EMAIL = "email"
+HASH = "hash"
+
+#: Lookup table key for URLs which are not case sensitive.
+_URL_NOCASE = "url-nocase"
+
+#: Evaluation plan operators.
+_TERM = "term"
+_AND = "AND"
+_OR = "OR"
+_NOT = "NOT"
+
+#: An OR from which operands that cannot be evaluated were dropped. It
+#: matches like an OR, but its negation cannot be evaluated.
+_PARTIAL_OR = "PARTIAL_OR"
+
+#: Address families and their address sizes in bits.
+_FAMILIES = (
+    (4, socket.AF_INET, 32),
+    (6, socket.AF_INET6, 128),
+)
+
+
+def _parse_address(value):
+    """Returns a ``(version, bits, address)`` tuple for an IP address string,
+    or ``None`` if `value` is not an IP address.
+
+    """
+    for version, family, bits in _FAMILIES:
+        try:
+            packed = socket.inet_pton(family, value)
+        except (socket.error, ValueError, TypeError):
+            continue
+
+        return version, bits, int(binascii.hexlify(packed), 16)
+
+    return None
+
+
+def _parse_network(value):
+    """Returns a ``(version, prefix length, network)`` tuple for an IP
+    address or CIDR block string, or ``None`` if it cannot be parsed.
+
+    The network is the address shifted right by the number of host bits.
+
+    """
+    address, _, prefix = value.strip().partition("/")
+    parsed = _parse_address(address)
+
+    if parsed is None:
+        return None
+
+    version, bits, address = parsed
+
+    if not prefix:
+        return version, bits, address
+
+    try:
+        prefix = int(prefix)
+    except ValueError:
+        return None
+
+    if not 0 <= prefix <= bits:
+        return None
+
+    return version, prefix, address >> (bits - prefix)
+
+
+def _domain(value):
+    return value.strip().lower().rstrip(".")
+
+
+def _lower(value):
+    return value.strip().lower()
+
+
+def _url(value):
+    return value.strip()
+
+
+def _hash_key(hash_):
+    """Returns the event key for the type of a cybox ``Hash``."""
+    type_ = getattr(hash_.type_, "value", hash_.type_)
+
+    if not type_:
+        return HASH
+
+    return str(type_).lower().replace("-", "")
+
+
+def _make_and(plans):
+    # Patterns which cannot be evaluated make the whole expression unusable.
+    if not plans or any(x is None for x in plans):
+        return None
+    elif len(plans) == 1:
+        return plans[0]
+
+    return (_AND, tuple(plans))
+
+
+def _make_or(plans):
+    # Patterns which cannot be evaluated never match, so they can be dropped
+    # as long as the result is not negated.
+    evaluable = [x for x in plans if x is not None]
+
+    if not evaluable:
+        return None
+    elif len(evaluable) < len(plans):
+        return (_PARTIAL_OR, tuple(evaluable))
+    elif len(evaluable) == 1:
+        return evaluable[0]
+
+    return (_OR, tuple(evaluable))
+
+
+def _is_partial(plan):
+    """Returns ``True`` if `plan` contains a :data:`_PARTIAL_OR`."""
+    stack = [plan]
+
+    while stack:
+        op, arg = stack.pop()
+
+        if op == _PARTIAL_OR:
+            return True
+        elif op == _NOT:
+            stack.append(arg)
+        elif op != _TERM:
+            stack.extend(arg)
+
+    return False
+
+
+def _make_not(plan):
+    if plan is None or _is_partial(plan):
+        return None
+    elif plan[0] == _NOT:
+        return plan[1]
+
+    return (_NOT, plan)
+
+
+def _make(operator, plans):
+    if operator and str(operator).upper() == _AND:
+        return _make_and(plans)
+
+    return _make_or(plans)
+
+
+def _evaluate(plan, hits):
+    """Returns ``True`` if `plan` is satisfied by the set of matched entries
+    `hits`.
+
+    """
+    op = plan[0]
+
+    if op == _TERM:
+        return plan[1] in hits
+    elif op == _AND:
+        return all(_evaluate(x, hits) for x in plan[1])
+    elif op in (_OR, _PARTIAL_OR):
+        return any(_evaluate(x, hits) for x in plan[1])
+
+    return not _evaluate(plan[1], hits)
+
+
+def _terms(plan, found):
+    """Adds the entries referred to by `plan` to the set `found`."""
+    stack = [plan]
+
+    while stack:
+        op, arg = stack.pop()
+
+        if op == _TERM:
+            found.add(arg)
+        elif op == _NOT:
+            stack.append(arg)
+        else:
+            stack.extend(arg)
+
+    return found
+
+
+def _values(value):
+    """Returns the values of an event key. Lists, tuples and sets hold
+    several values, anything else is a single value.
+
+    """
+    if value is None:
+        return ()
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        return value
+
+    return (value,)
+
+
+class Matcher(object):
+    """Matches events against a compiled set of Indicators.
+
+    Indicator and Observable ``idref`` references are resolved against the
+    compiled Indicators and the Observables they contain, as well as any
+    additional `observables`.
+
+    Args:
+        indicators: An iterable of :class:`.Indicator` instances. Indicators
+            without an ``id_`` and Indicator references are not reported by
+            :meth:`match`. If several Indicators share an id, the first one
+            is used.
+        observables: An optional iterable of ``cybox.core.Observable``
+            instances which Observable references may refer to.
+
+    """
+    def __init__(self, indicators, observables=None):
+        # Lookup table entry ids, keyed by the values tested for.
+        self._entries = {}
+
+        # Prefix lengths of the IP networks in the lookup table by IP version.
+        self._prefixes = {4: set(), 6: set()}
+
+        # Content by id for resolving references.
+        self._indicators = {}
+        self._observables = {}
+
+        # Compiled plans by id. Ids in the process of being compiled map
+        # to None so that circular references cannot be followed.
+        self._indicator_plans = {}
+        self._observable_plans = {}
+
+        indicators = list(indicators)
+
+        for indicator in indicators:
+            self._index_indicator(indicator)
+
+        for observable in observables or ():
+            self._index_observable(observable)
+
+        #: The ids of the Indicators reported by :meth:`match`, in
+        #: compilation order.
+        self.ids = []
+        self._plans = []
+        seen = set()
+
+        for indicator in indicators:
+            id_ = indicator.id_
+
+            if not id_ or indicator.idref or id_ in seen:
+                continue
+
+            seen.add(id_)
+            plan = self._indicator_plan(indicator)
+
+            if plan is not None:
+                self.ids.append(id_)
+                self._plans.append(plan)
+
+        # Indices of the plans which refer to each lookup table entry.
+        self._users = {}
+
+        # Indices of the plans which are satisfied by an event without any
+        # matched entries (e.g., negated patterns).
+        self._unconditional = []
+
+        for idx, plan in enumerate(self._plans):
+            for entry in _terms(plan, set()):
+                self._users.setdefault(entry, []).append(idx)
+
+            if _evaluate(plan, frozenset()):
+                self._unconditional.append(idx)
+
+        self._prefixes = dict(
+            (version, sorted(x, reverse=True))
+            for version, x in iteritems(self._prefixes)
+        )
+
+    @classmethod
+    def from_package(cls, package):
+        """Returns a :class:`Matcher` for the Indicators of a
+        :class:`.STIXPackage`.
+
+        Observable references are resolved against the Observables of the
+        package.
+
+        """
+        return cls(package.indicators or (), package.observables or ())
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _index_indicator(self, indicator):
+        if indicator.id_ and not indicator.idref:
+            self._indicators.setdefault(indicator.id_, indicator)
+
+        if indicator.observable is not None:
+            self._index_observable(indicator.observable)
+
+        for child in indicator.composite_indicator_expression or ():
+            self._index_indicator(child)
+
+    def _index_observable(self, observable):
+        if observable.id_ and not observable.idref:
+            self._observables.setdefault(observable.id_, observable)
+
+        composition = observable.observable_composition
+
+        for child in (composition.observables if composition else ()):
+            self._index_observable(child)
+
+    def _entry(self, key):
+        """Returns a plan which tests for the lookup table entry `key`."""
+        try:
+            entry = self._entries[key]
+        except KeyError:
+            entry = self._entries[key] = len(self._entries)
+
+        return (_TERM, entry)
+
+    def _resolve(self, id_, plans, content, compile_):
+        """Returns the compiled plan for the Indicator or Observable `id_`."""
+        if id_ in plans:
+            return plans[id_]
+
+        target = content.get(id_)
+
+        if target is None:
+            return None
+
+        plans[id_] = None
+        plans[id_] = compile_(target)
+        return plans[id_]
+
+    def _indicator_plan(self, indicator):
+        if indicator.idref:
+            id_ = indicator.idref
+        elif indicator.id_ and self._indicators.get(indicator.id_) is indicator:
+            id_ = indicator.id_
+        else:
+            return self._compile_indicator(indicator)
+
+        return self._resolve(
+            id_,
+            self._indicator_plans,
+            self._indicators,
+            self._compile_indicator
+        )
+
+    def _compile_indicator(self, indicator):
+        parts = []
+
+        if indicator.observable is not None:
+            parts.append(self._observable_plan(indicator.observable))
+
+        composite = indicator.composite_indicator_expression
+
+        if composite:
+            plans = [self._indicator_plan(x) for x in composite]
+            parts.append(_make(composite.operator, plans))
+
+        plan = _make_and(parts)
+
+        if indicator.negate:
+            plan = _make_not(plan)
+
+        return plan
+
+    def _observable_plan(self, observable):
+        if observable.idref:
+            id_ = observable.idref
+        elif observable.id_ and self._observables.get(observable.id_) is observable:
+            id_ = observable.id_
+        else:
+            return self._compile_observable(observable)
+
+        return self._resolve(
+            id_,
+            self._observable_plans,
+            self._observables,
+            self._compile_observable
+        )
+
+    def _compile_observable(self, observable):
+        composition = observable.observable_composition
+
+        if composition is not None:
+            plans = [self._observable_plan(x) for x in composition.observables]
+            plan = _make(composition.operator, plans)
+        elif observable.object_ is not None:
+            plan = self._object_plan(observable.object_.properties)
+        else:
+            plan = None
+
+        if observable.negate:
+            plan = _make_not(plan)
+
+        return plan
+
+    def _object_plan(self, properties):
+        if isinstance(properties, Address):
+            category = properties.category
+
+            if category == Address.CAT_EMAIL:
+                return self._property_plan(properties.address_value, EMAIL,
+                                           _lower)
+            elif category in (None, Address.CAT_IPV4, Address.CAT_IPV4_NET,
+                              Address.CAT_IPV6, Address.CAT_IPV6_NET):
+                return self._property_plan(properties.address_value, ADDRESS,
+                                           _parse_network)
+        elif isinstance(properties, DomainName):
+            return self._property_plan(properties.value, DOMAIN, _domain)
+        elif isinstance(properties, URI):
+            prop = properties.value
+
+            if prop is not None and prop.is_case_sensitive is False:
+                return self._property_plan(prop, _URL_NOCASE, _lower)
+
+            return self._property_plan(prop, URL, _url)
+        elif isinstance(properties, File) and properties.hashes:
+            plans = []
+
+            for hash_ in properties.hashes:
+                prop = hash_.simple_hash_value or hash_.fuzzy_hash_value
+                plans.append(self._property_plan(prop, _hash_key(hash_),
+                                                 _lower))
+
+            return _make_or(plans)
+
+        return None
+
+    def _property_plan(self, prop, key, normalize):
+        """Returns a plan for a cybox ``BaseProperty`` whose values are
+        looked up under `key` after being passed through `normalize`.
+
+        """
+        if prop is None or not prop.values:
+            return None
+
+        condition = prop.condition
+
+        if condition not in (None, "Equals", "DoesNotEqual"):
+            return None
+
+        plans = []
+
+        for value in prop.values:
+            normalized = normalize(text_type(value))
+
+            if normalized is None:
+                plans.append(None)
+            elif key == ADDRESS:
+                version, prefix, _ = normalized
+                self._prefixes[version].add(prefix)
+                plans.append(self._entry((key,) + normalized))
+            else:
+                plans.append(self._entry((key, normalized)))
+
+        apply_condition = prop.apply_condition
+
+        if apply_condition == "ALL":
+            plan = _make_and(plans)
+        elif apply_condition == "NONE":
+            plan = _make_not(_make_or(plans))
+        else:
+            plan = _make_or(plans)
+
+        if condition == "DoesNotEqual":
+            plan = _make_not(plan)
+
+        return plan
+
+    def _address_hits(self, value, hits):
+        parsed = _parse_address(text_type(value).strip())
+
+        if parsed is None:
+            return
+
+        version, bits, address = parsed
+        entries = self._entries
+
+        for prefix in self._prefixes[version]:
+            key = (ADDRESS, version, prefix, address >> (bits - prefix))
+            entry = entries.get(key)
+
+            if entry is not None:
+                hits.add(entry)
+
+    def _hits(self, event):
+        """Returns the set of lookup table entries matched by `event`."""
+        hits = set()
+        entries = self._entries
+
+        for key, values in iteritems(event):
+            for value in _values(values):
+                if key == ADDRESS:
+                    self._address_hits(value, hits)
+                    continue
+
+                value = text_type(value)
+
+                if key == URL:
+                    lookups = ((URL, _url(value)),
+                               (_URL_NOCASE, _lower(value)))
+                elif key == DOMAIN:
+                    lookups = ((DOMAIN, _domain(value)),)
+                else:
+                    lookups = ((key, _lower(value)),)
+
+                for lookup in lookups:
+                    entry = entries.get(lookup)
+
+                    if entry is not None:
+                        hits.add(entry)
+
+        return hits
+
+    def match(self, event):
+        """Returns the ids of the compiled Indicators which match `event`.
+
+        Args:
+            event: A dictionary which maps event keys (e.g., ``"address"`` or
+                ``"md5"``) to a value or a list of values.
+
+        Returns:
+            A list of Indicator ids in compilation order.
+
+        """
+        hits = self._hits(event)
+        plans = self._plans
+        candidates = set()
+
+        for entry in hits:
+            candidates.update(self._users.get(entry, ()))
+
+        matched = [x for x in candidates if _evaluate(plans[x], hits)]
+        matched.extend(x for x in self._unconditional if x not in candidates)
+        matched.sort()
+
+        return [self.ids[x] for x in matched]
+
@@ -17,7 +17,7 @@ class Sighting(stix.Entity):
     _binding = indicator_binding
     _binding_class = _binding.SightingType
     
-    timestamp = fields.DateTimeField("timestamp")
+    timestamp = stix.DateTimeField("timestamp")
     timestamp_precision = fields.TypedField("timestamp_precision", preset_hook=validate_precision)
     descriptions = fields.TypedField("Description", StructuredTextList)
     source = fields.TypedField("Source", InformationSource)
@@ -42,13 +42,9 @@ class _BaseTestMechanism(stix.Entity):
         return d
     
 
-class TestMechanismFactory(entities.EntityFactory):
+class TestMechanismFactory(stix.EntityFactory):
     @classmethod
     def entity_class(self, key):
-        import stix.extensions.test_mechanism.snort_test_mechanism  # noqa
-        import stix.extensions.test_mechanism.open_ioc_2010_test_mechanism  # noqa
-        import stix.extensions.test_mechanism.yara_test_mechanism  # noqa
-        import stix.extensions.test_mechanism.generic_test_mechanism  # noqa
         return stix.lookup_extension(key)
 
 
@@ -0,0 +1,376 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+"""
+Indexes Indicators by their valid time windows.
+
+Each ``Valid_Time_Position`` of an Indicator becomes a half-open interval
+``[start, end)``. Start and end times are widened to their precision: a
+start time with ``month`` precision begins on the first instant of its
+month, and an end time with ``month`` precision covers the whole month. A
+missing start or end time leaves the interval open on that side.
+
+The intervals are kept in a balanced search tree ordered by start time
+(a treap) where every node also records the latest end time in its subtree.
+Point and range queries skip every subtree which ends before the query
+begins, so they run in time logarithmic in the number of intervals plus the
+number of results. Indicators can be added and removed at any time.
+
+Timestamps without a timezone are treated as UTC.
+"""
+
+# stdlib
+import datetime
+import itertools
+import random
+
+# external
+from dateutil.tz import tzutc
+
+# internal
+from stix.utils import dates
+
+#: Unbounded interval ends.
+_MIN = float("-inf")
+_MAX = float("inf")
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=tzutc())
+
+
+def _microseconds(value):
+    """Returns the number of microseconds between the Unix epoch and the
+    ``datetime`` `value`.
+
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=tzutc())
+
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def _floor(value, precision):
+    """Returns the first instant of the `precision` unit containing the
+    ``datetime`` `value`.
+
+    """
+    if precision == "year":
+        return value.replace(month=1, day=1, hour=0, minute=0, second=0,
+                             microsecond=0)
+    elif precision == "month":
+        return value.replace(day=1, hour=0, minute=0, second=0,
+                             microsecond=0)
+    elif precision == "day":
+        return value.replace(hour=0, minute=0, second=0, microsecond=0)
+    elif precision == "hour":
+        return value.replace(minute=0, second=0, microsecond=0)
+    elif precision == "minute":
+        return value.replace(second=0, microsecond=0)
+
+    return value.replace(microsecond=0)
+
+
+def _next(value, precision):
+    """Returns the first instant of the `precision` unit following the one
+    which starts at the ``datetime`` `value`.
+
+    """
+    if precision == "year":
+        return value.replace(year=value.year + 1)
+    elif precision == "month":
+        if value.month == 12:
+            return value.replace(year=value.year + 1, month=1)
+        return value.replace(month=value.month + 1)
+    elif precision == "day":
+        return value + datetime.timedelta(days=1)
+    elif precision == "hour":
+        return value + datetime.timedelta(hours=1)
+    elif precision == "minute":
+        return value + datetime.timedelta(minutes=1)
+
+    return value + datetime.timedelta(seconds=1)
+
+
+def _start(dtwp):
+    """Returns the start of the interval which begins at the
+    ``DateTimeWithPrecision`` `dtwp`.
+
+    """
+    if dtwp is None or dtwp.value is None:
+        return _MIN
+
+    return _microseconds(_floor(dtwp.value, dtwp.precision))
+
+
+def _end(dtwp):
+    """Returns the (exclusive) end of the interval which ends at the
+    ``DateTimeWithPrecision`` `dtwp`.
+
+    """
+    if dtwp is None or dtwp.value is None:
+        return _MAX
+
+    value = _floor(dtwp.value, dtwp.precision)
+    return _microseconds(_next(value, dtwp.precision))
+
+
+def interval(valid_time):
+    """Returns the ``(start, end)`` interval covered by a
+    :class:`.ValidTime`, in microseconds since the Unix epoch.
+
+    Open ends are ``float("-inf")`` and ``float("inf")``.
+
+    """
+    return _start(valid_time.start_time), _end(valid_time.end_time)
+
+
+def _point(value):
+    """Returns the position of the timestamp `value` (a ``datetime`` or a
+    timestamp string).
+
+    """
+    return _microseconds(dates.parse_value(value))
+
+
+class _Node(object):
+    """A treap node holding one interval."""
+    __slots__ = ("key", "end", "id_", "priority", "max_end", "left", "right")
+
+    def __init__(self, key, end, id_, priority):
+        self.key = key
+        self.end = end
+        self.id_ = id_
+        self.priority = priority
+        self.max_end = end
+        self.left = None
+        self.right = None
+
+    def update(self):
+        max_end = self.end
+
+        if self.left is not None and self.left.max_end > max_end:
+            max_end = self.left.max_end
+        if self.right is not None and self.right.max_end > max_end:
+            max_end = self.right.max_end
+
+        self.max_end = max_end
+
+
+def _rotate_right(node):
+    left = node.left
+    node.left = left.right
+    left.right = node
+    node.update()
+    left.update()
+    return left
+
+
+def _rotate_left(node):
+    right = node.right
+    node.right = right.left
+    right.left = node
+    node.update()
+    right.update()
+    return right
+
+
+def _insert(node, new):
+    if node is None:
+        return new
+
+    if new.key < node.key:
+        node.left = _insert(node.left, new)
+
+        if node.left.priority > node.priority:
+            node = _rotate_right(node)
+    else:
+        node.right = _insert(node.right, new)
+
+        if node.right.priority > node.priority:
+            node = _rotate_left(node)
+
+    node.update()
+    return node
+
+
+def _delete(node, key):
+    if node is None:
+        raise KeyError(key)
+
+    if key < node.key:
+        node.left = _delete(node.left, key)
+    elif key > node.key:
+        node.right = _delete(node.right, key)
+    elif node.left is None:
+        return node.right
+    elif node.right is None:
+        return node.left
+    elif node.left.priority > node.right.priority:
+        node = _rotate_right(node)
+        node.right = _delete(node.right, key)
+    else:
+        node = _rotate_left(node)
+        node.left = _delete(node.left, key)
+
+    node.update()
+    return node
+
+
+def _overlapping(node, lo, hi, found):
+    """Appends the ids of the intervals in the subtree `node` which overlap
+    ``[lo, hi]`` to `found`, in start order.
+
+    """
+    # No interval in this subtree ends after lo.
+    if node is None or node.max_end <= lo:
+        return
+
+    _overlapping(node.left, lo, hi, found)
+
+    # Intervals to the right start after this one.
+    if node.key[0] > hi:
+        return
+
+    if node.end > lo:
+        found.append(node.id_)
+
+    _overlapping(node.right, lo, hi, found)
+
+
+class ValidTimeIndex(object):
+    """An index of Indicators by their valid time windows.
+
+    Indicators are keyed by ``id_``. Indicators without
+    ``valid_time_positions`` are not indexed.
+
+    Args:
+        indicators: An optional iterable of :class:`.Indicator` instances to
+            :meth:`add`.
+
+    """
+    def __init__(self, indicators=None):
+        self._root = None
+        self._random = random.Random(0)
+        self._counter = itertools.count()
+
+        # Indexed Indicators and the keys of their intervals, by id.
+        self._indicators = {}
+        self._keys = {}
+
+        for indicator in indicators or ():
+            self.add(indicator)
+
+    @classmethod
+    def from_package(cls, package):
+        """Returns a :class:`ValidTimeIndex` for the Indicators of a
+        :class:`.STIXPackage`.
+
+        """
+        return cls(package.indicators or ())
+
+    def __len__(self):
+        return len(self._indicators)
+
+    def __contains__(self, id_):
+        return id_ in self._indicators
+
+    def add(self, indicator):
+        """Indexes the valid time positions of `indicator`.
+
+        If an Indicator with the same id is already indexed, it is replaced.
+
+        Raises:
+            ValueError: If `indicator` has no ``id_``.
+
+        """
+        id_ = indicator.id_
+
+        if not id_:
+            raise ValueError("Cannot index an Indicator without an id")
+
+        if id_ in self._indicators:
+            self.remove(id_)
+
+        keys = []
+
+        for valid_time in indicator.valid_time_positions or ():
+            start, end = interval(valid_time)
+
+            if end <= start:
+                continue
+
+            key = (start, next(self._counter))
+            node = _Node(key, end, id_, self._random.random())
+            self._root = _insert(self._root, node)
+            keys.append(key)
+
+        if keys:
+            self._indicators[id_] = indicator
+            self._keys[id_] = keys
+
+    def remove(self, indicator):
+        """Removes an Indicator from the index.
+
+        Args:
+            indicator: An :class:`.Indicator` or an Indicator id.
+
+        Raises:
+            KeyError: If the Indicator is not indexed.
+
+        """
+        id_ = getattr(indicator, "id_", indicator)
+
+        for key in self._keys.pop(id_):
+            self._root = _delete(self._root, key)
+
+        del self._indicators[id_]
+
+    def _query(self, lo, hi):
+        ids = []
+        _overlapping(self._root, lo, hi, ids)
+
+        seen = set()
+        found = []
+
+        for id_ in ids:
+            if id_ not in seen:
+                seen.add(id_)
+                found.append(self._indicators[id_])
+
+        return found
+
+    def at(self, timestamp):
+        """Returns the Indicators which are valid at `timestamp`.
+
+        Args:
+            timestamp: A ``datetime`` or a timestamp string.
+
+        Returns:
+            A list of Indicators, ordered by the start of their earliest
+            matching valid time window.
+
+        """
+        point = _point(timestamp)
+        return self._query(point, point)
+
+    def between(self, start, end):
+        """Returns the Indicators which are valid at any time from `start`
+        through `end`.
+
+        Args:
+            start: A ``datetime``, a timestamp string or ``None`` for no lower
+                bound.
+            end: A ``datetime``, a timestamp string or ``None`` for no upper
+                bound.
+
+        Returns:
+            A list of Indicators, ordered by the start of their earliest
+            matching valid time window.
+
+        """
+        lo = _MIN if start is None else _point(start)
+        hi = _MAX if end is None else _point(end)
+
+        if hi < lo:
+            raise ValueError("end must not be earlier than start")
+
+        return self._query(lo, hi)
@@ -0,0 +1,129 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+from datetime import datetime
+import unittest
+
+from mixbox.vendor.six import BytesIO
+
+from stix import base
+from stix.bindings import stix_common as common_binding
+from stix.core import STIXPackage
+from stix.indicator import Indicator, ValidTime
+
+
+class NewParsedTests(unittest.TestCase):
+    """Tests entities built from parsed input, which are not initialized
+    through their constructor.
+
+    """
+    def setUp(self):
+        # Start without templates, so the first instance of each class is
+        # built through its constructor.
+        self.templates = dict(base._TEMPLATES)
+        base._TEMPLATES.clear()
+
+    def tearDown(self):
+        base._TEMPLATES.clear()
+        base._TEMPLATES.update(self.templates)
+
+    def test_from_dict_no_id(self):
+        # The first call initializes the per-class template.
+        for _ in range(2):
+            ind = Indicator.from_dict({'title': 'Test'})
+            self.assertEqual(ind.title, 'Test')
+            self.assertEqual(ind.id_, None)
+            self.assertEqual(ind.timestamp, None)
+            self.assertEqual(ind.observable_composition_operator, "OR")
+            self.assertEqual(len(ind.descriptions), 0)
+            self.assertEqual(len(ind.indicator_types), 0)
+
+    def test_field_order(self):
+        d = Indicator(title='Test').to_dict()
+
+        # Only the first instance is built through the constructor.
+        first = Indicator.from_dict(d)
+        second = Indicator.from_dict(d)
+
+        self.assertTrue(Indicator in base._TEMPLATES)
+        self.assertEqual(list(first._fields), list(second._fields))
+        self.assertEqual(first.to_dict(), second.to_dict())
+
+    def test_instances_are_independent(self):
+        ind1 = Indicator.from_dict({'title': 'Test'})
+        ind2 = Indicator.from_dict({'title': 'Test'})
+        ind1.add_indicator_type("File Hash Watchlist")
+        ind1.observable_composition_operator = "AND"
+
+        self.assertEqual(len(ind2.indicator_types), 0)
+        self.assertEqual(ind2.observable_composition_operator, "OR")
+
+    def test_from_obj_base_binding(self):
+        # Fields which are not on the base binding type keep the values the
+        # Indicator constructor gives them.
+        binding = common_binding.IndicatorBaseType(id='example:indicator-1')
+        parsed = [Indicator.from_obj(binding) for _ in range(2)]
+
+        for ind in parsed:
+            self.assertEqual(ind.id_, 'example:indicator-1')
+            self.assertEqual(ind.timestamp, None)
+            self.assertEqual(len(ind.indicator_types), 0)
+            self.assertEqual(len(ind.sightings), 0)
+
+        self.assertEqual(list(parsed[0]._fields), list(parsed[1]._fields))
+
+
+class CompactTests(unittest.TestCase):
+
+    def setUp(self):
+        ind = Indicator(title='Test', description='A description')
+        ind.add_indicator_type("File Hash Watchlist")
+        ind.add_valid_time_position(ValidTime(start_time=datetime(2015, 1, 1)))
+
+        package = STIXPackage()
+        package.add_indicator(ind)
+        self.package = STIXPackage.from_xml(BytesIO(package.to_xml()))
+        self.indicator = self.package.indicators[0]
+
+    def test_unset_fields_dropped(self):
+        size = len(self.indicator._fields)
+        self.package.compact()
+
+        self.assertTrue(len(self.indicator._fields) < size)
+        self.assertTrue(None not in self.indicator._fields.values())
+
+    def test_output_unchanged(self):
+        xml = self.package.to_xml()
+        d = self.package.to_dict()
+        self.package.compact()
+
+        self.assertEqual(self.package.to_xml(), xml)
+        self.assertEqual(self.package.to_dict(), d)
+
+    def test_fields_usable(self):
+        self.package.compact()
+        ind = self.indicator
+
+        self.assertEqual(ind.short_description, None)
+        self.assertEqual(len(ind.alternative_id), 0)
+        self.assertEqual(str(ind.description), 'A description')
+
+        ind.short_description = "Short"
+        ind.alternative_id.append("example:alt-1")
+        self.assertEqual(str(ind.short_description), "Short")
+        self.assertEqual(ind.to_dict()['alternative_id'], ["example:alt-1"])
+
+    def test_binding_defaults(self):
+        # RelatedIndicators bindings default to a scope of "exclusive", so
+        # unset scopes must still be exported.
+        ind = Indicator()
+        ind.related_indicators.scope = None
+        ind.related_indicators.append(Indicator())
+        xml = ind.to_xml()
+
+        ind.compact()
+        self.assertEqual(ind.to_xml(), xml)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -94,6 +94,25 @@ class KillChainPhaseTests(EntityTestCase, unittest.TestCase):
 
         self.assertNotEqual(phase1, phase2)
 
+    def test_hash(self):
+        phase1 = KillChainPhase(phase_id='stix:test-1', ordinality=1)
+        phase2 = KillChainPhase.from_dict(phase1.to_dict())
+        ref = KillChainPhaseReference(phase_id='stix:test-1', ordinality=1)
+
+        self.assertEqual(len(set([phase1, phase2, ref])), 1)
+
+    def test_hash_after_change(self):
+        phase1 = KillChainPhase(phase_id='stix:test-1', ordinality=1)
+        phase2 = KillChainPhase(phase_id='stix:test-1', ordinality=2)
+        phases = set([phase1])
+
+        self.assertTrue(phase2 not in phases)
+        self.assertNotEqual(phase1, phase2)
+
+        phase2.ordinality = 1
+        self.assertTrue(phase2 in phases)
+        self.assertEqual(phase1, phase2)
+
 
 class KillChainPhaseReferenceTests(EntityTestCase, unittest.TestCase):
     klass = KillChainPhaseReference
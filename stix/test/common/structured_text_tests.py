@@ -7,6 +7,7 @@ import random
 from stix.test import EntityTestCase, TypedListTestCase
 
 from stix import common
+from stix.utils import parser
 
 from mixbox.vendor.six.moves import range
 
@@ -20,6 +21,21 @@ class StructuredTextTests(unittest.TestCase, EntityTestCase):
         'structuring_format': 'text/plain'
     }
 
+    def test_hash(self):
+        text1 = common.StructuredText("Test", ordinality=1)
+        text2 = self.klass.from_dict(text1.to_dict())
+        texts = set([text1])
+
+        self.assertTrue(text2 in texts)
+
+        text2.structuring_format = "text/html"
+        self.assertTrue(text2 not in texts)
+        self.assertNotEqual(text1, text2)
+
+        text1.structuring_format = "text/html"
+        self.assertEqual(text1, text2)
+        self.assertEqual(hash(text1), hash(text2))
+
 
 class StructuredTextListTests(unittest.TestCase, TypedListTestCase):
     klass = common.StructuredTextList
@@ -174,6 +190,78 @@ class StructuredTextListTests(unittest.TestCase, TypedListTestCase):
 
         self.assertEqual(len(slist), 1)
 
+    def test_changed_ordinality(self):
+        slist = common.StructuredTextList(["foo", "bar"])
+        foo, bar = slist[1], slist[2]
+
+        # Changing the ordinality of a contained object reorders the list.
+        foo.ordinality = 3
+
+        self.assertEqual([bar, foo], list(slist))
+        self.assertEqual(foo, slist[3])
+        self.assertRaises(KeyError, slist.__getitem__, 1)
+        self.assertEqual(4, slist.next_ordinality)
+
+    def test_unset_ordinality(self):
+        slist = common.StructuredTextList(["foo", "bar"])
+        foo = slist[1]
+
+        foo.ordinality = None
+        self.assertRaises(KeyError, slist.__getitem__, 1)
+
+        foo.ordinality = 5
+        self.assertEqual(foo, slist[5])
+
+    def test_shared_item(self):
+        first = common.StructuredTextList(["foo", "bar"])
+        second = common.StructuredTextList([first[1]])
+        foo = first[1]
+
+        self.assertEqual(foo, second[1])
+        foo.ordinality = 4
+
+        self.assertEqual(foo, first[4])
+        self.assertEqual(foo, second[4])
+
+    def test_other_lists_keep_index(self):
+        slist = common.StructuredTextList(["foo", "bar"])
+        other = common.StructuredTextList(["baz"])
+        self.assertEqual("foo", slist[1].value)
+        index = slist._ordinality_index
+
+        # Serializing a single item list unsets and restores the default
+        # ordinality of its item.
+        other.to_obj()
+        other.to_dict()
+        other[1].ordinality = 2
+
+        self.assertEqual("bar", slist[2].value)
+        self.assertTrue(slist._ordinality_index is index)
+        self.assertEqual("baz", other[2].value)
+
+    def test_add_while_iterating(self):
+        slist = common.StructuredTextList(["foo", "bar"])
+        seen = []
+
+        for text in slist:
+            seen.append(text)
+            slist.add(common.StructuredText("baz"))
+
+        self.assertEqual(2, len(seen))
+        self.assertEqual(4, len(slist))
+
+    def test_pickle(self):
+        slist = common.StructuredTextList(["foo", "bar"])
+        self.assertEqual(slist[2].value, "bar")
+
+        # The lookup index is not pickled.
+        copied = parser._loads(parser._dumps(slist))
+        self.assertTrue("_ordinality_index" not in vars(copied))
+        self.assertTrue("_owners" not in vars(copied._inner[0]))
+
+        self.assertEqual(["foo", "bar"], [x.value for x in copied])
+        self.assertEqual(copied[2].value, "bar")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,122 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+import copy
+import threading
+import unittest
+
+from mixbox.vendor.six import BytesIO
+
+from stix.core import STIXPackage
+from stix.common import vocabs
+from stix.indicator import Indicator
+
+
+class ValidateValueTests(unittest.TestCase):
+
+    def test_allowed(self):
+        vocab = vocabs.HighMediumLow("High")
+        self.assertEqual(vocab.value, "High")
+
+    def test_not_allowed(self):
+        self.assertRaises(ValueError, vocabs.HighMediumLow, "Very High")
+
+    def test_reassigned_values(self):
+        class Vocab(vocabs.VocabString):
+            _ALLOWED_VALUES = ("Foo",)
+
+        Vocab("Foo")
+        Vocab._ALLOWED_VALUES = ("Bar",)
+        Vocab("Bar")
+        self.assertRaises(ValueError, Vocab, "Foo")
+
+
+class VocabStringTests(unittest.TestCase):
+
+    def test_hash(self):
+        vocab = vocabs.HighMediumLow("High")
+        values = set([vocab, vocabs.VocabString("High"), "High"])
+
+        self.assertEqual(len(values), 1)
+        self.assertTrue(vocabs.HighMediumLow("Low") not in values)
+
+    def test_validate_vocab_value(self):
+        vocab = vocabs.HighMediumLow(vocabs.VocabString("High"))
+        self.assertEqual(vocab.value, "High")
+
+
+class InternedTests(unittest.TestCase):
+
+    def setUp(self):
+        self.package = STIXPackage()
+
+        for _ in range(2):
+            indicator = Indicator(title="Test")
+            indicator.add_indicator_type("IP Watchlist")
+            indicator.confidence = "High"
+            self.package.add_indicator(indicator)
+
+    def _types(self, package):
+        return [x.indicator_types[0] for x in package.indicators]
+
+    def test_from_xml(self):
+        xml = self.package.to_xml()
+
+        with vocabs.interned():
+            package = STIXPackage.from_xml(BytesIO(xml))
+
+        first, second = self._types(package)
+        self.assertTrue(first is second)
+        self.assertEqual(package.to_xml(), xml)
+
+    def test_from_dict(self):
+        d = self.package.to_dict()
+
+        with vocabs.interned():
+            package = STIXPackage.from_dict(d)
+
+        first, second = self._types(package)
+        self.assertTrue(first is second)
+        self.assertEqual(package.to_dict(), STIXPackage.from_dict(d).to_dict())
+
+    def test_not_interned(self):
+        package = STIXPackage.from_dict(self.package.to_dict())
+        first, second = self._types(package)
+        self.assertFalse(first is second)
+
+        first.value = "Domain Watchlist"
+        self.assertEqual(second.value, "IP Watchlist")
+
+    def test_immutable(self):
+        with vocabs.interned():
+            package = STIXPackage.from_dict(self.package.to_dict())
+
+        vocab = self._types(package)[0]
+        self.assertRaises(AttributeError, setattr, vocab, "value", "Anonymization")
+
+        # Copies can be modified.
+        copied = copy.deepcopy(vocab)
+        copied.value = "Anonymization"
+        self.assertEqual(vocab.value, "IP Watchlist")
+
+    def test_other_threads(self):
+        d = self.package.to_dict()
+        packages = []
+
+        def parse():
+            packages.append(STIXPackage.from_dict(d))
+
+        with vocabs.interned():
+            thread = threading.Thread(target=parse)
+            thread.start()
+            thread.join()
+
+        first, second = self._types(packages[0])
+        self.assertFalse(first is second)
+
+        first.value = "Domain Watchlist"
+        self.assertEqual(second.value, "IP Watchlist")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+import datetime
+import unittest
+
+from dateutil.tz import tzutc
+
+from cybox.core import Observable
+from cybox.objects.address_object import Address
+
+from stix.common.kill_chains import KillChain
+from stix.core import STIXHeader, STIXPackage, merge
+from stix.indicator import Indicator
+from stix.ttp import TTP
+from stix.utils import silence_warnings
+
+
+def _timestamp(day):
+    return datetime.datetime(2017, 1, day, tzinfo=tzutc())
+
+
+def _package(*components):
+    package = STIXPackage()
+
+    for component in components:
+        package.add(component)
+
+    return package
+
+
+def _observable(id_):
+    observable = Observable(Address("10.0.0.1", Address.CAT_IPV4))
+    observable.id_ = id_
+    return observable
+
+
+class MergeTests(unittest.TestCase):
+
+    def _ids(self, collection):
+        return [(x.id_, x.idref) for x in collection]
+
+    def test_newest_version(self):
+        old = Indicator(id_="example:ind-1", title="Old", timestamp=_timestamp(2))
+        new = Indicator(id_="example:ind-1", title="New", timestamp=_timestamp(3))
+        other = Indicator(id_="example:ind-2", timestamp=_timestamp(1))
+
+        merged = merge([_package(old, other), _package(new)])
+
+        self.assertEqual(len(merged.indicators), 2)
+        self.assertEqual(merged.indicators[0].title, "New")
+        self.assertEqual(merged.indicators[1].id_, "example:ind-2")
+
+        # The merged package holds copies.
+        self.assertFalse(merged.indicators[0] is new)
+
+    def test_same_timestamp(self):
+        first = Indicator(id_="example:ind-1", title="First", timestamp=_timestamp(1))
+        second = Indicator(id_="example:ind-1", title="Second", timestamp=_timestamp(1))
+
+        merged = merge([_package(first), _package(second)])
+
+        self.assertEqual(merged.indicators[0].title, "First")
+
+    def test_content(self):
+        ind1 = Indicator(id_="example:ind-1", title="Same", timestamp=_timestamp(1))
+        ind2 = Indicator(id_="example:ind-2", title="Same", timestamp=_timestamp(2))
+        referrer = Indicator(id_="example:ind-3", title="Referrer")
+        referrer.add_related_indicator(Indicator(idref="example:ind-1"))
+
+        package1 = _package(ind1, referrer)
+        package2 = _package(ind2)
+
+        self.assertEqual(len(merge([package1, package2]).indicators), 3)
+
+        merged = merge([package1, package2], dedupe="content")
+        self.assertEqual(
+            self._ids(merged.indicators),
+            [("example:ind-2", None), ("example:ind-3", None)]
+        )
+
+        related = merged.indicators[1].related_indicators[0].item
+        self.assertEqual(related.idref, "example:ind-2")
+
+        # The input packages are not modified.
+        related = referrer.related_indicators[0].item
+        self.assertEqual(related.idref, "example:ind-1")
+
+    def test_references(self):
+        ind = Indicator(id_="example:ind-1")
+        package1 = _package(ind)
+        package2 = _package(
+            Indicator(idref="example:ind-1"),
+            Indicator(idref="example:ind-9"),
+            Indicator(idref="example:ind-9"),
+        )
+
+        merged = merge([package1, package2])
+        self.assertEqual(
+            self._ids(merged.indicators),
+            [("example:ind-1", None), (None, "example:ind-9")]
+        )
+
+    def test_nested_observables(self):
+        ind1 = Indicator(id_="example:ind-1")
+        ind1.add_observable(_observable("example:obs-1"))
+        ind2 = Indicator(id_="example:ind-2")
+        ind2.add_observable(_observable("example:obs-1"))
+
+        package1 = _package(_observable("example:obs-1"))
+        package2 = _package(ind1, ind2)
+
+        merged = merge([package1, package2])
+        self.assertEqual(self._ids(merged.observables), [("example:obs-1", None)])
+
+        for indicator in merged.indicators:
+            self.assertEqual(indicator.observable.idref, "example:obs-1")
+            self.assertEqual(indicator.observable.object_, None)
+
+        # The input packages are not modified.
+        self.assertEqual(ind1.observable.idref, None)
+        self.assertFalse(ind1.observable.object_ is None)
+
+    def test_shared_objects(self):
+        observable = _observable("example:obs-1")
+        ind1 = Indicator(id_="example:ind-1")
+        ind1.add_observable(observable)
+        ind2 = Indicator(id_="example:ind-2")
+        ind2.add_observable(observable)
+
+        # Objects shared by the inputs are shared by the copies.
+        merged = merge([_package(ind1, ind2)])
+        first, second = merged.indicators
+        self.assertTrue(first.observable is second.observable)
+        self.assertFalse(first.observable is observable)
+        self.assertEqual(first.observable.idref, None)
+
+    def test_header(self):
+        package1 = _package(Indicator())
+        package1.stix_header = STIXHeader(title="Feed")
+        package2 = _package(Indicator())
+        package3 = _package(Indicator())
+        package3.stix_header = STIXHeader(title="Feed")
+
+        merged = merge([package1, package2, package3])
+        self.assertEqual(merged.stix_header.title, "Feed")
+        self.assertFalse(merged.stix_header is package1.stix_header)
+
+        package3.stix_header.title = "Other"
+        self.assertRaises(ValueError, merge, [package1, package2, package3])
+
+        header = STIXHeader(title="Merged")
+        merged = merge([package1, package3], stix_header=header)
+        self.assertTrue(merged.stix_header is header)
+
+    @silence_warnings
+    def test_related_packages(self):
+        package1 = _package(Indicator())
+        package1.add_related_package(STIXPackage(id_="example:pkg-1"))
+        package2 = _package(Indicator())
+        package2.add_related_package(STIXPackage(id_="example:pkg-1"))
+        package2.add_related_package(STIXPackage(id_="example:pkg-2"))
+
+        merged = merge([package1, package2])
+        self.assertEqual(
+            [x.item.id_ for x in merged.related_packages],
+            ["example:pkg-1", "example:pkg-2"]
+        )
+
+    def test_kill_chains(self):
+        package1 = _package(TTP(title="TTP 1"))
+        package1.ttps.kill_chains.append(KillChain(id_="example:kc-1"))
+        package2 = _package(TTP(title="TTP 2"))
+        package2.ttps.kill_chains.append(KillChain(id_="example:kc-1"))
+        package2.ttps.kill_chains.append(KillChain(id_="example:kc-2"))
+
+        merged = merge([package1, package2])
+        self.assertEqual(len(merged.ttps), 2)
+        self.assertEqual(
+            [x.id_ for x in merged.ttps.kill_chains],
+            ["example:kc-1", "example:kc-2"]
+        )
+
+    def test_bad_dedupe(self):
+        self.assertRaises(ValueError, merge, [], dedupe="title")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,7 @@
 # See LICENSE.txt for complete terms.
 
 import copy
+import pickle
 import unittest
 
 from mixbox.vendor.six import BytesIO
@@ -12,7 +13,7 @@ from stix.test.common import kill_chains_test, related_test
 
 from . import stix_header_test
 
-from stix import core
+from stix import core, data_marking
 from stix.core import stix_package
 from stix.campaign import Campaign
 from stix.coa import CourseOfAction
@@ -21,7 +22,7 @@ from stix.indicator import Indicator
 from stix.incident import Incident
 from stix.threat_actor import ThreatActor
 from stix.ttp import TTP
-from stix.utils import silence_warnings, now
+from stix.utils import silence_warnings, now, parser, walk
 
 
 class CampaignsTests(EntityTestCase, unittest.TestCase):
@@ -189,5 +190,223 @@ class STIXPackageTests(EntityTestCase, unittest.TestCase):
         package.add_related_package(core.STIXPackage(idref='foo'))
 
 
+class LazyParseTests(unittest.TestCase):
+
+    @silence_warnings
+    def setUp(self):
+        indicator = Indicator(title="Indicator")
+        indicator.add_indicator_type("IP Watchlist")
+
+        package = core.STIXPackage()
+        package.add_indicator(indicator)
+        package.add_ttp(TTP(title="TTP"))
+        self.package = package
+        self.xml = package.to_xml()
+
+    @silence_warnings
+    def _parse(self, lazy):
+        return core.STIXPackage.from_xml(BytesIO(self.xml), lazy=lazy)
+
+    def test_deferred(self):
+        package = self._parse(lazy=True)
+        self.assertTrue(core.STIXPackage.indicators.is_deferred(package))
+        self.assertTrue(core.STIXPackage.ttps.is_deferred(package))
+
+        self.assertEqual("Indicator", package.indicators[0].title)
+        self.assertFalse(core.STIXPackage.indicators.is_deferred(package))
+        self.assertTrue(core.STIXPackage.ttps.is_deferred(package))
+
+    def test_to_xml(self):
+        eager = self._parse(lazy=False)
+        lazy = self._parse(lazy=True)
+        self.assertEqual(eager.to_xml(), lazy.to_xml())
+
+    def test_to_dict(self):
+        eager = self._parse(lazy=False)
+        lazy = self._parse(lazy=True)
+        self.assertEqual(eager.to_dict(), lazy.to_dict())
+
+    def test_find(self):
+        package = self._parse(lazy=True)
+        ttp = self.package.ttps[0]
+        self.assertEqual("TTP", package.find(ttp.id_).title)
+
+    def test_add(self):
+        package = self._parse(lazy=True)
+        package.add_indicator(Indicator(title="Indicator 2"))
+        self.assertEqual(2, len(package.indicators))
+
+    def test_deepcopy(self):
+        package = self._parse(lazy=True)
+        copied = copy.deepcopy(package)
+
+        # The copy does not depend on the parsed document.
+        self.assertFalse(core.STIXPackage.indicators.is_deferred(copied))
+        self.assertTrue(core.STIXPackage.indicators.is_deferred(package))
+
+        indicator = copied.indicators[0]
+        self.assertEqual("IP Watchlist", str(indicator.indicator_types[0]))
+        self.assertEqual(package.to_dict(), copied.to_dict())
+
+    def test_pickle(self):
+        package = self._parse(lazy=True)
+        self.assertTrue(pickle.dumps(package))
+
+        # TypedFields must be pickled by reference for the values to be
+        # found again.
+        loaded = parser._loads(parser._dumps(package))
+
+        self.assertTrue(core.STIXPackage.ttps.is_deferred(package))
+        self.assertEqual("TTP", loaded.ttps[0].title)
+        self.assertEqual(package.to_dict(), loaded.to_dict())
+
+    def test_iterwalk(self):
+        eager = list(walk.iterwalk(self._parse(lazy=False)))
+        lazy = list(walk.iterwalk(self._parse(lazy=True)))
+
+        self.assertTrue(eager)
+        self.assertEqual([type(x) for x in lazy], [type(x) for x in eager])
+
+    def test_iterpath(self):
+        eager = self._parse(lazy=False)
+        lazy = self._parse(lazy=True)
+
+        found = [(name, type(value)) for _, name, value in walk.iterpath(lazy)]
+        expected = [
+            (name, type(value)) for _, name, value in walk.iterpath(eager)
+        ]
+
+        self.assertEqual(found, expected)
+        self.assertTrue("title" in [name for name, _ in found])
+
+
+class IdIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.ttp = TTP(title="TTP")
+        self.indicator = Indicator(title="Indicator")
+        self.indicator.add_indicated_ttp(TTP(idref=self.ttp.id_))
+
+        package = core.STIXPackage()
+        package.add_indicator(self.indicator)
+        package.add_ttp(self.ttp)
+        self.package = package
+
+    def test_find(self):
+        self.assertTrue(self.package.find(self.ttp.id_) is self.ttp)
+        self.assertTrue(self.package.find("example:missing-1") is None)
+
+    def test_add(self):
+        self.package.find(self.ttp.id_)
+
+        campaign = Campaign(title="Campaign")
+        self.package.add_campaign(campaign)
+        self.assertTrue(self.package.find(campaign.id_) is campaign)
+
+    def test_nested_change(self):
+        self.package.find(self.ttp.id_)
+
+        # Objects added below a component are found by searching the package.
+        ttp = TTP(title="Nested")
+        self.indicator.add_indicated_ttp(ttp)
+        self.assertTrue(self.package.find(ttp.id_) is ttp)
+
+        # Changed ids are not returned from the index.
+        old_id = self.ttp.id_
+        self.ttp.id_ = "example:ttp-changed"
+        self.assertTrue(self.package.find(old_id) is None)
+        self.assertTrue(self.package.find("example:ttp-changed") is self.ttp)
+
+    def test_missing(self):
+        self.package.find(self.ttp.id_)
+        self.assertTrue(self.package.find("example:missing-1") is None)
+
+        campaign = Campaign(id_="example:missing-1")
+        self.package.add_campaign(campaign)
+        self.assertTrue(self.package.find("example:missing-1") is campaign)
+
+    def test_append_after_miss(self):
+        indicator = Indicator(id_="example:indicator-b")
+        self.assertTrue(self.package.find(indicator.id_) is None)
+
+        self.package.indicators.append(indicator)
+        self.assertTrue(self.package.find(indicator.id_) is indicator)
+
+    def test_remove_after_find(self):
+        indicator = Indicator(id_="example:indicator-a")
+        self.package.add(indicator)
+        self.assertTrue(self.package.find(indicator.id_) is indicator)
+
+        self.package.indicators.remove(indicator)
+        self.assertTrue(self.package.find(indicator.id_) is None)
+
+        # Other indexed entities are still found.
+        self.assertTrue(self.package.find(self.ttp.id_) is self.ttp)
+        self.assertTrue(self.package.find(self.indicator.id_) is self.indicator)
+
+    def test_nested_remove(self):
+        ttp = TTP(title="Nested")
+        self.indicator.add_indicated_ttp(ttp)
+        self.assertTrue(self.package.find(ttp.id_) is ttp)
+
+        del self.indicator.indicated_ttps[-1]
+        self.assertTrue(self.package.find(ttp.id_) is None)
+
+    def test_shifted_position(self):
+        indicator = Indicator(id_="example:indicator-a")
+        self.package.add(indicator)
+        self.assertTrue(self.package.find(indicator.id_) is indicator)
+
+        # Removing an earlier item moves the indexed entity.
+        self.package.indicators.remove(self.indicator)
+        self.assertTrue(self.package.find(indicator.id_) is indicator)
+        self.assertTrue(self.package.find(self.indicator.id_) is None)
+
+    def test_replace_collection(self):
+        self.package.find(self.ttp.id_)
+        self.package.ttps = core.ttps.TTPs()
+        self.assertTrue(self.package.find(self.ttp.id_) is None)
+
+    def test_resolve(self):
+        related = self.indicator.indicated_ttps[0]
+        self.assertTrue(self.package.resolve(related.item) is self.ttp)
+        self.assertTrue(self.package.resolve(self.ttp.id_) is self.ttp)
+
+    def test_resolve_all_idrefs(self):
+        missing = TTP(idref="example:ttp-missing")
+        self.indicator.add_indicated_ttp(missing)
+
+        resolved = self.package.resolve_all_idrefs()
+        self.assertEqual(2, len(resolved))
+        self.assertTrue(resolved[self.ttp.id_] is self.ttp)
+        self.assertTrue(resolved["example:ttp-missing"] is None)
+
+    def test_caches_not_walked(self):
+        self.package.find(self.ttp.id_)
+        data_marking.apply_markings(self.package)
+
+        names = set(name for _, name, _ in walk.iterpath(self.package))
+        self.assertTrue("ttps" in names)
+
+        for name in ("id_index", "markings"):
+            self.assertFalse(name in names)
+
+    def test_caches_not_copied(self):
+        self.package.find(self.ttp.id_)
+
+        copied = copy.deepcopy(self.package)
+        self.assertTrue(copied._id_index is None)
+
+        ttp = copied.find(self.ttp.id_)
+        self.assertFalse(ttp is self.ttp)
+        self.assertEqual(ttp.id_, self.ttp.id_)
+
+    @silence_warnings
+    def test_lazy(self):
+        xml = BytesIO(self.package.to_xml())
+        package = core.STIXPackage.from_xml(xml, lazy=True)
+        self.assertEqual("TTP", package.resolve(self.ttp.id_).title)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,116 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+import unittest
+
+from mixbox.vendor.six import BytesIO, StringIO
+
+from cybox.core import Observable
+from cybox.objects.address_object import Address
+
+from stix.core import STIXHeader, STIXPackage, STIXPackageWriter
+from stix.incident import Incident
+from stix.indicator import Indicator
+from stix.ttp import TTP
+
+
+class STIXPackageWriterTests(unittest.TestCase):
+
+    def _components(self):
+        return [
+            Observable(Address("10.0.0.1", Address.CAT_IPV4)),
+            Indicator(title="Indicator 1"),
+            Indicator(title="Indicator 2"),
+            TTP(title="TTP"),
+            Incident(title="Incident"),
+        ]
+
+    def _write(self, package, components, **kwargs):
+        out = BytesIO()
+
+        with STIXPackageWriter(out, package=package, **kwargs) as writer:
+            for component in components:
+                writer.write(component)
+
+        return out.getvalue()
+
+    def _assert_written(self, components, xml):
+        parsed = STIXPackage.from_xml(BytesIO(xml))
+
+        expected = STIXPackage(
+            id_=parsed.id_,
+            stix_header=STIXHeader(title="Feed")
+        )
+
+        for component in components:
+            expected.add(component)
+
+        expected = STIXPackage.from_xml(BytesIO(expected.to_xml()))
+        self.assertEqual(expected.to_dict(), parsed.to_dict())
+
+    def test_write(self):
+        components = self._components()
+        package = STIXPackage(stix_header=STIXHeader(title="Feed"))
+        xml = self._write(package, components)
+        self._assert_written(components, xml)
+
+    def test_not_pretty(self):
+        components = self._components()
+        package = STIXPackage(stix_header=STIXHeader(title="Feed"))
+        xml = self._write(package, components, pretty=False)
+
+        self.assertTrue(b"\n" not in xml.strip())
+        self._assert_written(components, xml)
+
+    def test_no_encoding(self):
+        out = StringIO()
+
+        with STIXPackageWriter(out, encoding=None) as writer:
+            writer.write(Indicator(title="Indicator"))
+
+        package = STIXPackage.from_xml(BytesIO(out.getvalue().encode()))
+        self.assertEqual("Indicator", package.indicators[0].title)
+
+    def test_package_components(self):
+        # Components already in the package are written first.
+        components = self._components()
+        package = STIXPackage(stix_header=STIXHeader(title="Feed"))
+        package.add(components[1])
+        package.add(components[4])
+
+        xml = self._write(package, components[2:4])
+        self._assert_written(components[1:], xml)
+
+    def test_cybox_object(self):
+        xml = self._write(None, [Address("10.0.0.1", Address.CAT_IPV4)])
+        package = STIXPackage.from_xml(BytesIO(xml))
+
+        address = package.observables[0].object_.properties
+        self.assertEqual("10.0.0.1", address.address_value.value)
+
+    def test_out_of_order(self):
+        writer = STIXPackageWriter(BytesIO())
+        writer.open()
+        writer.write(TTP())
+        self.assertRaises(ValueError, writer.write, Indicator())
+
+    def test_bad_type(self):
+        writer = STIXPackageWriter(BytesIO())
+        writer.open()
+        self.assertRaises(TypeError, writer.write, STIXHeader())
+
+    def test_not_open(self):
+        writer = STIXPackageWriter(BytesIO())
+        self.assertRaises(ValueError, writer.write, Indicator())
+
+    def test_empty(self):
+        package = STIXPackage()
+        xml = self._write(package, [])
+
+        parsed = STIXPackage.from_xml(BytesIO(xml))
+        self.assertEqual(package.id_, parsed.id_)
+        self.assertFalse(parsed.indicators)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,7 +3,14 @@
 
 import unittest
 
+from lxml import etree
+from mixbox.vendor.six import BytesIO
+
 import stix.data_marking as dm
+from stix.core import STIXPackage, STIXHeader
+from stix.extensions.marking.simple_marking import SimpleMarkingStructure
+from stix.extensions.marking.tlp import TLPMarkingStructure
+from stix.indicator import Indicator
 from stix.test import EntityTestCase
 from stix.test.common import information_source_test
 
@@ -48,5 +55,80 @@ class MarkingTests(EntityTestCase, unittest.TestCase):
     ]
 
 
+def _marking(xpath, structure):
+    spec = dm.MarkingSpecification()
+    spec.controlled_structure = xpath
+    spec.marking_structures.append(structure)
+    return dm.Marking(spec)
+
+
+class ApplyMarkingsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tlp = TLPMarkingStructure()
+        self.tlp.color = "AMBER"
+        self.simple = SimpleMarkingStructure("Internal use only")
+
+        self.package = STIXPackage()
+        self.package.stix_header = STIXHeader()
+        self.package.stix_header.handling = _marking("//node()", self.tlp)
+
+        self.indicator = Indicator(title="Marked")
+        self.indicator.handling = _marking(
+            "../../../descendant-or-self::node()", self.simple
+        )
+        self.package.add_indicator(self.indicator)
+
+    def test_package_markings(self):
+        self.assertEqual(dm.markings_for(self.package, self.package), [self.tlp])
+
+    def test_component_markings(self):
+        markings = dm.markings_for(self.package, self.indicator)
+        self.assertEqual(len(markings), 2)
+        self.assertTrue(markings[0] is self.tlp)
+        self.assertTrue(markings[1] is self.simple)
+
+    def test_id_string(self):
+        markings = dm.markings_for(self.package, self.indicator.id_)
+        self.assertEqual(len(markings), 2)
+        self.assertEqual(dm.markings_for(self.package, "example:unknown"), [])
+
+    def test_parsed_package(self):
+        sio = BytesIO(self.package.to_xml())
+        package = STIXPackage.from_xml(sio)
+        indicator = package.find(self.indicator.id_)
+
+        markings = dm.markings_for(package, indicator)
+        self.assertEqual(len(markings), 2)
+        self.assertTrue(markings[1] is indicator.handling[0].marking_structures[0])
+        self.assertEqual(markings[0].color, "AMBER")
+
+    def test_cache(self):
+        markings = dm.apply_markings(self.package)
+        self.assertTrue(dm.apply_markings(self.package) is markings)
+        self.assertFalse(dm.apply_markings(self.package, refresh=True) is markings)
+
+        # Adding a component drops the cached markings.
+        indicator = Indicator(title="Unmarked")
+        self.package.add_indicator(indicator)
+        self.assertEqual(dm.markings_for(self.package, indicator), [self.tlp])
+
+    def test_invalid_xpath(self):
+        self.indicator.handling = _marking("//[", self.simple)
+        self.assertRaises(
+            ValueError, dm.apply_markings, self.package, refresh=True
+        )
+
+    def test_xpath_cache_size(self):
+        node = etree.Element("foo")
+
+        for idx in range(dm._XPATHS_SIZE + 10):
+            dm._compile("//node()[%d]" % idx, node)
+            self.assertTrue(len(dm._XPATHS) <= dm._XPATHS_SIZE)
+
+        xpath = dm._compile("//node()", node)
+        self.assertTrue(dm._compile("//node()", node) is xpath)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,128 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+import unittest
+
+from mixbox.vendor.six import BytesIO
+
+from cybox.core import Observable
+from cybox.objects.address_object import Address
+
+from stix.campaign import Campaign
+from stix.common import Confidence
+from stix.common.related import RelatedCampaign, RelatedIndicator
+from stix.core import STIXPackage
+from stix.graph import Edge, RelationshipGraph
+from stix.indicator import Indicator
+from stix.threat_actor import ThreatActor
+
+
+class RelationshipGraphTests(unittest.TestCase):
+
+    def setUp(self):
+        self.observable = Observable(Address("10.0.0.1", Address.CAT_IPV4))
+        self.indicator = Indicator(id_="example:indicator-1")
+        self.indicator.add_observable(Observable(idref=self.observable.id_))
+
+        # The second Indicator is only embedded in the Campaign.
+        self.embedded = Indicator(id_="example:indicator-2")
+        self.embedded.related_indicators.append(
+            RelatedIndicator(Indicator(idref=self.indicator.id_))
+        )
+
+        self.campaign = Campaign(id_="example:campaign-1")
+        self.campaign.related_indicators.append(
+            RelatedIndicator(Indicator(idref=self.indicator.id_),
+                             confidence=Confidence("High"),
+                             relationship="Indicates")
+        )
+        self.campaign.related_indicators.append(
+            RelatedIndicator(self.embedded)
+        )
+
+        self.actor = ThreatActor(id_="example:threatactor-1")
+        self.actor.associated_campaigns.append(
+            RelatedCampaign(Campaign(idref=self.campaign.id_))
+        )
+
+        self.package = STIXPackage()
+        self.package.add_observable(self.observable)
+        self.package.add_indicator(self.indicator)
+        self.package.add_campaign(self.campaign)
+        self.package.add_threat_actor(self.actor)
+
+        self.graph = RelationshipGraph.from_package(self.package)
+
+    def test_nodes(self):
+        for entity in (self.package, self.observable, self.indicator,
+                       self.embedded, self.campaign, self.actor):
+            self.assertTrue(entity.id_ in self.graph)
+            self.assertTrue(self.graph.entity(entity.id_) is entity)
+
+        self.assertEqual(len(self.graph), 6)
+        self.assertRaises(KeyError, self.graph.entity, "example:foo-1")
+
+    def test_edges(self):
+        edges = self.graph.edges(self.campaign.id_)
+
+        self.assertEqual(edges, [
+            Edge(self.campaign.id_, self.indicator.id_, "related_indicators",
+                 "Indicates", "High"),
+            Edge(self.campaign.id_, self.embedded.id_, "related_indicators",
+                 None, None),
+        ])
+
+        incoming = self.graph.edges(self.indicator.id_, direction="in")
+        self.assertEqual([x.source for x in incoming],
+                         [self.campaign.id_, self.embedded.id_])
+
+    def test_neighbors(self):
+        found = self.graph.neighbors(self.campaign.id_)
+        self.assertEqual(found, [self.indicator.id_, self.embedded.id_,
+                                 self.actor.id_])
+
+        found = self.graph.neighbors(self.campaign.id_, direction="in",
+                                     names=["associated_campaigns"])
+        self.assertEqual(found, [self.actor.id_])
+
+        self.assertRaises(ValueError, self.graph.neighbors,
+                          self.campaign.id_, direction="sideways")
+
+    def test_bfs(self):
+        found = list(self.graph.bfs(self.actor.id_, direction="out"))
+        self.assertEqual(found, [
+            (self.actor.id_, 0),
+            (self.campaign.id_, 1),
+            (self.indicator.id_, 2),
+            (self.embedded.id_, 2),
+        ])
+
+    def test_neighborhood(self):
+        found = self.graph.neighborhood(self.actor.id_, 1)
+        self.assertEqual(found, {self.actor.id_: 0, self.campaign.id_: 1})
+
+    def test_observable_reference(self):
+        # Observables referenced by Indicators are not relationships.
+        self.assertEqual(self.graph.neighbors(self.observable.id_), [])
+
+    def test_parsed(self):
+        package = STIXPackage.from_xml(BytesIO(self.package.to_xml()))
+        graph = RelationshipGraph(package)
+
+        self.assertEqual(
+            dict(graph.bfs(self.actor.id_, direction="out")),
+            dict(self.graph.bfs(self.actor.id_, direction="out"))
+        )
+
+    def test_unresolved_reference(self):
+        self.indicator.related_indicators.append(
+            RelatedIndicator(Indicator(idref="example:indicator-3"))
+        )
+
+        graph = RelationshipGraph(self.package)
+        self.assertTrue("example:indicator-3" in graph)
+        self.assertTrue(graph.entity("example:indicator-3") is None)
+
+
+if __name__ == "__main__":
+    unittest.main()
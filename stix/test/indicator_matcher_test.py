@@ -0,0 +1,232 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+import unittest
+
+from cybox.core import Observable, ObservableComposition
+from cybox.objects.address_object import Address
+from cybox.objects.domain_name_object import DomainName
+from cybox.objects.file_object import File
+from cybox.objects.uri_object import URI
+
+from stix.core import STIXPackage
+from stix.indicator import Indicator, CompositeIndicatorExpression
+from stix.indicator.matcher import Matcher
+
+
+def _indicator(id_, *items):
+    indicator = Indicator(id_=id_)
+
+    for item in items:
+        indicator.add_observable(item)
+
+    return indicator
+
+
+def _domain(value):
+    domain = DomainName()
+    domain.value = value
+    return domain
+
+
+def _file(md5=None, sha256=None):
+    f = File()
+
+    if md5:
+        f.md5 = md5
+    if sha256:
+        f.sha256 = sha256
+
+    return f
+
+
+class MatcherTests(unittest.TestCase):
+
+    def test_address(self):
+        matcher = Matcher([
+            _indicator("example:indicator-1",
+                       Address("10.0.0.1", Address.CAT_IPV4)),
+            _indicator("example:indicator-2",
+                       Address("10.1.0.0/16", Address.CAT_IPV4_NET)),
+            _indicator("example:indicator-3",
+                       Address("2001:db8::/32", Address.CAT_IPV6_NET)),
+        ])
+
+        self.assertEqual(matcher.match({"address": "10.0.0.1"}),
+                         ["example:indicator-1"])
+        self.assertEqual(matcher.match({"address": "10.1.200.3"}),
+                         ["example:indicator-2"])
+        self.assertEqual(matcher.match({"address": "2001:db8::1"}),
+                         ["example:indicator-3"])
+        self.assertEqual(matcher.match({"address": ["10.0.0.2", "bogus"]}),
+                         [])
+
+    def test_exact_values(self):
+        url = URI("http://example.com/Malware.exe", URI.TYPE_URL)
+        matcher = Matcher([
+            _indicator("example:indicator-1", _domain("Example.com")),
+            _indicator("example:indicator-2", url),
+            _indicator("example:indicator-3", _file(md5="a" * 32)),
+        ])
+
+        self.assertEqual(matcher.match({"domain": "example.COM."}),
+                         ["example:indicator-1"])
+        self.assertEqual(
+            matcher.match({"url": "http://example.com/Malware.exe"}),
+            ["example:indicator-2"]
+        )
+        self.assertEqual(
+            matcher.match({"url": "http://example.com/malware.exe"}),
+            []
+        )
+        self.assertEqual(matcher.match({"md5": "A" * 32}),
+                         ["example:indicator-3"])
+        self.assertEqual(matcher.match({"sha256": "a" * 32}), [])
+
+    def test_file_hashes(self):
+        f = _file(md5="a" * 32, sha256="b" * 64)
+        matcher = Matcher([_indicator("example:indicator-1", f)])
+
+        self.assertEqual(matcher.match({"sha256": "b" * 64}),
+                         ["example:indicator-1"])
+
+    def test_scalar_values(self):
+        matcher = Matcher([
+            _indicator("example:indicator-1", _file(md5="5")),
+        ])
+
+        self.assertEqual(matcher.match({"md5": 5}), ["example:indicator-1"])
+        self.assertEqual(matcher.match({"md5": set(["5"])}),
+                         ["example:indicator-1"])
+        self.assertEqual(matcher.match({"address": 167772161}), [])
+
+    def test_composition(self):
+        indicator = _indicator(
+            "example:indicator-1",
+            _domain("example.com"),
+            Address("10.0.0.1", Address.CAT_IPV4)
+        )
+        indicator.observable_composition_operator = "AND"
+        matcher = Matcher([indicator])
+
+        self.assertEqual(matcher.match({"domain": "example.com"}), [])
+        event = {"domain": "example.com", "address": "10.0.0.1"}
+        self.assertEqual(matcher.match(event), ["example:indicator-1"])
+
+    def test_negate(self):
+        observable = Observable(_domain("example.com"))
+        observable.negate = True
+        matcher = Matcher([_indicator("example:indicator-1", observable)])
+
+        self.assertEqual(matcher.match({}), ["example:indicator-1"])
+        self.assertEqual(matcher.match({"domain": "example.com"}), [])
+
+        indicator = _indicator("example:indicator-2", _domain("example.com"))
+        indicator.negate = True
+        matcher = Matcher([indicator])
+
+        self.assertEqual(matcher.match({"domain": "example.org"}),
+                         ["example:indicator-2"])
+        self.assertEqual(matcher.match({"domain": "example.com"}), [])
+
+    def test_does_not_equal(self):
+        domain = _domain("example.com")
+        domain.value.condition = "DoesNotEqual"
+        matcher = Matcher([_indicator("example:indicator-1", domain)])
+
+        self.assertEqual(matcher.match({"domain": "example.org"}),
+                         ["example:indicator-1"])
+        self.assertEqual(matcher.match({"domain": "example.com"}), [])
+
+    def test_unsupported(self):
+        domain = _domain("example")
+        domain.value.condition = "StartsWith"
+        matcher = Matcher([_indicator("example:indicator-1", domain)])
+
+        self.assertEqual(len(matcher), 0)
+        self.assertEqual(matcher.match({"domain": "example.com"}), [])
+
+    def test_negated_unsupported(self):
+        unsupported = _domain("b")
+        unsupported.value.condition = "StartsWith"
+
+        composition = ObservableComposition(operator="OR")
+        composition.add(Observable(_domain("a.com")))
+        composition.add(Observable(unsupported))
+
+        observable = Observable(composition)
+        observable.negate = True
+        matcher = Matcher([_indicator("example:indicator-1", observable)])
+
+        self.assertEqual(matcher.match({"domain": "b.com"}), [])
+        self.assertEqual(matcher.match({}), [])
+
+        # Without negation, the supported operand is still evaluated.
+        matcher = Matcher([_indicator("example:indicator-2", composition)])
+        self.assertEqual(matcher.match({"domain": "a.com"}),
+                         ["example:indicator-2"])
+        self.assertEqual(matcher.match({"domain": "b.com"}), [])
+
+    def test_composite_expression(self):
+        first = _indicator("example:indicator-1", _domain("example.com"))
+        second = _indicator("example:indicator-2", _file(md5="a" * 32))
+
+        composite = Indicator(id_="example:indicator-3")
+        composite.composite_indicator_expression = (
+            CompositeIndicatorExpression("AND", Indicator(idref=first.id_),
+                                         second)
+        )
+
+        matcher = Matcher([composite, first])
+
+        self.assertEqual(matcher.ids, ["example:indicator-3",
+                                       "example:indicator-1"])
+        self.assertEqual(matcher.match({"domain": "example.com"}),
+                         ["example:indicator-1"])
+        self.assertEqual(
+            matcher.match({"domain": "example.com", "md5": "a" * 32}),
+            ["example:indicator-3", "example:indicator-1"]
+        )
+
+    def test_circular_reference(self):
+        indicator = Indicator(id_="example:indicator-1")
+        indicator.composite_indicator_expression = (
+            CompositeIndicatorExpression("OR", Indicator(idref=indicator.id_))
+        )
+
+        matcher = Matcher([indicator])
+        self.assertEqual(len(matcher), 0)
+
+    def test_from_package(self):
+        observable = Observable(_domain("example.com"), id_="example:observable-1")
+        indicator = _indicator("example:indicator-1",
+                               Observable(idref=observable.id_))
+
+        package = STIXPackage()
+        package.add_observable(observable)
+        package.add_indicator(indicator)
+
+        matcher = Matcher.from_package(package)
+        self.assertEqual(matcher.match({"domain": "example.com"}),
+                         ["example:indicator-1"])
+
+    def test_nested_observable_composition(self):
+        inner = ObservableComposition(operator="AND")
+        inner.add(Observable(_domain("example.com")))
+        inner.add(Observable(URI("http://example.com/", URI.TYPE_URL)))
+
+        outer = ObservableComposition(operator="OR")
+        outer.add(Observable(inner))
+        outer.add(Observable(_file(md5="a" * 32)))
+
+        matcher = Matcher([_indicator("example:indicator-1", Observable(outer))])
+
+        self.assertEqual(matcher.match({"domain": "example.com"}), [])
+        self.assertEqual(matcher.match({"md5": "a" * 32}),
+                         ["example:indicator-1"])
+        event = {"domain": "example.com", "url": "http://example.com/"}
+        self.assertEqual(matcher.match(event), ["example:indicator-1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+import datetime
+import random
+import unittest
+
+from dateutil.tz import tzutc
+
+from stix.common import DateTimeWithPrecision
+from stix.core import STIXPackage
+from stix.indicator import Indicator
+from stix.indicator.valid_time import ValidTime
+from stix.indicator.valid_time_index import ValidTimeIndex, interval
+
+
+def _dtwp(value, precision="second"):
+    if value is None:
+        return None
+    return DateTimeWithPrecision(value, precision)
+
+
+def _indicator(id_, *windows):
+    indicator = Indicator(id_=id_)
+
+    for window in windows:
+        start, end = window[:2]
+        precision = window[2] if len(window) > 2 else "second"
+        valid_time = ValidTime(_dtwp(start, precision), _dtwp(end, precision))
+        indicator.add_valid_time_position(valid_time)
+
+    return indicator
+
+
+def _ids(indicators):
+    return [x.id_ for x in indicators]
+
+
+class ValidTimeIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.index = ValidTimeIndex([
+            _indicator("example:indicator-1",
+                       ("2016-01-01T00:00:00Z", "2016-01-31T00:00:00Z")),
+            _indicator("example:indicator-2",
+                       ("2016-01-15T00:00:00Z", None)),
+            _indicator("example:indicator-3",
+                       (None, "2015-12-31T00:00:00Z"),
+                       ("2016-03-01T00:00:00Z", "2016-03-02T00:00:00Z")),
+            Indicator(id_="example:indicator-4"),
+        ])
+
+    def test_at(self):
+        self.assertEqual(len(self.index), 3)
+        self.assertTrue("example:indicator-4" not in self.index)
+
+        self.assertEqual(_ids(self.index.at("2015-06-01T00:00:00Z")),
+                         ["example:indicator-3"])
+        self.assertEqual(_ids(self.index.at("2016-01-20T00:00:00Z")),
+                         ["example:indicator-1", "example:indicator-2"])
+        self.assertEqual(_ids(self.index.at("2016-03-01T12:00:00Z")),
+                         ["example:indicator-2", "example:indicator-3"])
+
+    def test_between(self):
+        found = self.index.between("2015-12-30T00:00:00Z",
+                                   "2016-01-01T00:00:00Z")
+        self.assertEqual(_ids(found),
+                         ["example:indicator-3", "example:indicator-1"])
+
+        self.assertEqual(len(self.index.between(None, None)), 3)
+        self.assertRaises(ValueError, self.index.between,
+                          "2016-01-02T00:00:00Z", "2016-01-01T00:00:00Z")
+
+    def test_remove(self):
+        self.index.remove("example:indicator-2")
+        self.assertEqual(_ids(self.index.at("2016-01-20T00:00:00Z")),
+                         ["example:indicator-1"])
+
+        self.assertRaises(KeyError, self.index.remove, "example:indicator-2")
+
+    def test_replace(self):
+        self.index.add(_indicator("example:indicator-1",
+                                  ("2017-01-01T00:00:00Z", None)))
+
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(_ids(self.index.at("2016-01-20T00:00:00Z")),
+                         ["example:indicator-2"])
+
+    def test_no_id(self):
+        indicator = Indicator()
+        indicator.id_ = None
+        self.assertRaises(ValueError, self.index.add, indicator)
+
+    def test_from_package(self):
+        package = STIXPackage()
+        package.add_indicator(
+            _indicator("example:indicator-1", ("2016-01-01T00:00:00Z", None))
+        )
+
+        index = ValidTimeIndex.from_package(package)
+        self.assertEqual(len(index.at(datetime.datetime(2016, 2, 1))), 1)
+
+    def test_random(self):
+        rand = random.Random(1)
+        base = datetime.datetime(2016, 1, 1, tzinfo=tzutc())
+        indicators = []
+
+        for idx in range(200):
+            start = base + datetime.timedelta(days=rand.randint(0, 365))
+            end = start + datetime.timedelta(days=rand.randint(0, 30))
+            indicators.append(
+                _indicator("example:indicator-%d" % idx, (start, end))
+            )
+
+        index = ValidTimeIndex(indicators)
+
+        for indicator in indicators[::3]:
+            index.remove(indicator)
+
+        remaining = [x for i, x in enumerate(indicators) if i % 3]
+
+        for day in range(0, 400, 7):
+            point = base + datetime.timedelta(days=day, hours=12)
+            expected = set(
+                x.id_ for x in remaining
+                if (x.valid_time_positions[0].start_time.value <= point <=
+                    x.valid_time_positions[0].end_time.value)
+            )
+            self.assertEqual(set(_ids(index.at(point))), expected)
+
+
+class PrecisionTests(unittest.TestCase):
+
+    def _interval(self, start, end, precision):
+        valid_time = ValidTime(_dtwp(start, precision), _dtwp(end, precision))
+        return interval(valid_time)
+
+    def test_month(self):
+        index = ValidTimeIndex([
+            _indicator("example:indicator-1",
+                       ("2016-02-10T00:00:00Z", "2016-02-10T00:00:00Z",
+                        "month")),
+        ])
+
+        self.assertEqual(len(index.at("2016-02-01T00:00:00Z")), 1)
+        self.assertEqual(len(index.at("2016-02-29T23:59:59Z")), 1)
+        self.assertEqual(len(index.at("2016-03-01T00:00:00Z")), 0)
+        self.assertEqual(len(index.at("2016-01-31T23:59:59Z")), 0)
+
+    def test_widening(self):
+        day = 86400 * 1000000
+
+        for precision, length in (("year", 366 * day), ("day", day),
+                                  ("hour", day // 24), ("second", 1000000)):
+            start, end = self._interval("2016-06-15T10:30:45Z",
+                                        "2016-06-15T10:30:45Z", precision)
+            self.assertEqual(end - start, length)
+
+    def test_unbounded(self):
+        start, end = self._interval(None, None, "second")
+        self.assertEqual((start, end), (float("-inf"), float("inf")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+# stdlib
+import unittest
+
+# internal
+import stix
+from stix.bindings import TypeInfo
+from stix.bindings.extensions.marking import tlp as tlp_binding
+from stix.data_marking import MarkingStructure, MarkingStructureFactory
+from stix.extensions.marking.tlp import TLPMarkingStructure
+from stix.common.vocabs import IndicatorType, VocabFactory, VocabString
+
+
+class _FakeBinding(object):
+    """A binding object without an ``xmlns_prefix`` attribute."""
+    def __init__(self, xml_type):
+        self.xml_type = xml_type
+
+
+class LookupExtensionTests(unittest.TestCase):
+    def test_xsi_type(self):
+        klass = stix.lookup_extension("tlpMarking:TLPMarkingStructureType")
+        self.assertEqual(TLPMarkingStructure, klass)
+
+    def test_typeinfo(self):
+        typeinfo = TypeInfo(
+            ns="http://data-marking.mitre.org/extensions/MarkingStructure#TLP-1",
+            typename="TLPMarkingStructureType"
+        )
+        self.assertEqual(TLPMarkingStructure, stix.lookup_extension(typeinfo))
+
+    def test_typeinfo_unregistered(self):
+        typeinfo = TypeInfo(ns="http://example.com/", typename="FooType")
+        self.assertRaises(ValueError, stix.lookup_extension, typeinfo)
+
+    def test_binding(self):
+        binding = tlp_binding.TLPMarkingStructureType()
+        self.assertEqual(TLPMarkingStructure, stix.lookup_extension(binding))
+
+    def test_binding_prefix(self):
+        # The namespace of the binding class is used, not its prefix.
+        binding = tlp_binding.TLPMarkingStructureType()
+        binding.xmlns_prefix = "foo"
+        self.assertEqual(TLPMarkingStructure, stix.lookup_extension(binding))
+
+    def test_unprefixed(self):
+        binding = _FakeBinding("TLPMarkingStructureType")
+        self.assertEqual(TLPMarkingStructure, stix.lookup_extension(binding))
+
+    def test_unprefixed_partial(self):
+        binding = _FakeBinding("TLPMarkingStructure")
+        self.assertEqual(TLPMarkingStructure, stix.lookup_extension(binding))
+
+    def test_unregistered(self):
+        self.assertRaises(ValueError, stix.lookup_extension, "foo:BarType")
+
+    def test_default(self):
+        klass = stix.lookup_extension(None, default=MarkingStructure)
+        self.assertEqual(MarkingStructure, klass)
+
+    def test_factories(self):
+        klass = MarkingStructureFactory.entity_class(
+            "tlpMarking:TLPMarkingStructureType"
+        )
+        self.assertEqual(TLPMarkingStructure, klass)
+
+        klass = VocabFactory.entity_class(IndicatorType._XSI_TYPE)
+        self.assertEqual(IndicatorType, klass)
+
+        klass = VocabFactory.entity_class("foo:BarVocab-1.0")
+        self.assertEqual(VocabString, klass)
+
+    def test_factory_objkey(self):
+        binding = tlp_binding.TLPMarkingStructureType()
+        key = MarkingStructureFactory.objkey(binding)
+
+        self.assertTrue(isinstance(key, TypeInfo))
+        self.assertEqual(TLPMarkingStructure,
+                         MarkingStructureFactory.entity_class(key))
+
+        marking = MarkingStructureFactory.from_obj(binding)
+        self.assertTrue(isinstance(marking, TLPMarkingStructure))
+
+
+class LoadExtensionsTests(unittest.TestCase):
+    def setUp(self):
+        self._modules = stix._EXTENSION_MODULES
+        self._loaded = stix._extensions_loaded
+
+    def tearDown(self):
+        stix._EXTENSION_MODULES = self._modules
+        stix._extensions_loaded = self._loaded
+
+    def test_failed_import(self):
+        stix._EXTENSION_MODULES = self._modules + ("stix.extensions.foo",)
+        stix._extensions_loaded = False
+
+        self.assertRaises(ImportError, stix._load_extensions)
+        self.assertFalse(stix._extensions_loaded)
+
+        # The lookup tries to import the modules again.
+        self.assertRaises(ImportError, stix.lookup_extension, "foo:BarType")
+
+        stix._EXTENSION_MODULES = self._modules
+        stix._load_extensions()
+        self.assertTrue(stix._extensions_loaded)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+# stdlib
+import datetime
+import threading
+import unittest
+
+# external
+import dateutil.parser
+import dateutil.tz
+
+# internal
+from stix.common import DateTimeWithPrecision
+from stix.utils import dates
+
+
+class ParseValueTests(unittest.TestCase):
+    def setUp(self):
+        dates._CACHE.clear()
+
+    def assertParsedLikeDateutil(self, value):
+        expected = dateutil.parser.parse(value)
+        parsed = dates.parse_value(value)
+
+        self.assertEqual(expected, parsed)
+        self.assertEqual(expected.isoformat(), parsed.isoformat())
+        self.assertEqual(expected.utcoffset(), parsed.utcoffset())
+
+    def test_none(self):
+        self.assertEqual(None, dates.parse_value(None))
+        self.assertEqual(None, dates.parse_value(""))
+
+    def test_datetime(self):
+        now = dates.now()
+        self.assertTrue(dates.parse_value(now) is now)
+
+    def test_xs_datetime(self):
+        values = (
+            "2015-03-05T12:34:56",
+            "2015-03-05T12:34:56Z",
+            "2015-03-05T12:34:56+00:00",
+            "2015-03-05T12:34:56-00:00",
+            "2015-03-05T12:34:56+05:30",
+            "2015-03-05T12:34:56-11:45",
+            "2015-03-05T12:34:56.5",
+            "2015-03-05T12:34:56.123456Z",
+            "2015-03-05T00:00:00.000001-04:00",
+        )
+
+        for value in values:
+            self.assertTrue(dates._parse_timestamp(value) is not None)
+            self.assertParsedLikeDateutil(value)
+
+    def test_xs_date(self):
+        self.assertParsedLikeDateutil("2015-03-05")
+
+    def test_utc(self):
+        parsed = dates.parse_value("2015-03-05T12:34:56Z")
+        self.assertEqual(dateutil.tz.tzutc(), parsed.tzinfo)
+
+    def test_fallback(self):
+        # These are not xs:dateTime values, but dateutil understands them.
+        values = (
+            "2015-03-05T12:34",
+            "2015-03-05 12:34:56",
+            "2015-03-05T12:34:56.1234567",
+            "2015-03-05T12:34:56+0200",
+            "March 5, 2015",
+        )
+
+        for value in values:
+            self.assertEqual(None, dates._parse_timestamp(value))
+            self.assertParsedLikeDateutil(value)
+
+    def test_out_of_range(self):
+        for value in ("2015-02-30T00:00:00", "2015-03-05T24:00:00"):
+            self.assertEqual(None, dates._parse_timestamp(value))
+            self.assertRaises(ValueError, dates.parse_value, value)
+
+    def test_cache(self):
+        value = "2015-03-05T12:34:56Z"
+        self.assertTrue(dates.parse_value(value) is dates.parse_value(value))
+
+    def test_cache_size(self):
+        cache = dates._TimestampCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertEqual(1, cache.get("a"))
+        self.assertEqual(None, cache.get("b"))
+        self.assertEqual(3, cache.get("c"))
+
+    def test_cache_threads(self):
+        cache = dates._TimestampCache(8)
+        errors = []
+
+        def worker(offset):
+            try:
+                for idx in range(2000):
+                    key = str((idx * offset) % 20)
+                    cache.put(key, key)
+                    value = cache.get(key)
+                    self.assertTrue(value in (key, None))
+            except Exception as ex:
+                errors.append(ex)
+
+        threads = [threading.Thread(target=worker, args=(x,))
+                   for x in range(1, 5)]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual([], errors)
+        self.assertTrue(len(cache._new) + len(cache._old) <= 8)
+
+    def test_parse_date(self):
+        self.assertEqual(datetime.date(2015, 3, 5),
+                         dates.parse_date("2015-03-05T12:34:56Z"))
+
+
+class DateTimeFieldTests(unittest.TestCase):
+    def test_parse(self):
+        dtwp = DateTimeWithPrecision.from_dict("2015-03-05T12:34:56+05:30")
+        expected = datetime.datetime(2015, 3, 5, 12, 34, 56,
+                                     tzinfo=dateutil.tz.tzoffset(None, 19800))
+
+        self.assertEqual(expected, dtwp.value)
+        self.assertEqual("2015-03-05T12:34:56+05:30", dtwp.to_dict())
+
+
+if __name__ == "__main__":
+    unittest.main()
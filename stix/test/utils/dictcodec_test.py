@@ -0,0 +1,103 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+import json
+import unittest
+
+from mixbox import entities
+from mixbox.vendor.six import StringIO
+
+from cybox.objects.address_object import Address
+
+from stix.core import STIXPackage
+from stix.common import InformationSource, Identity, StructuredTextList
+from stix.indicator import Indicator
+from stix.ttp import TTP
+from stix.utils import dictcodec
+
+
+class DictCodecTests(unittest.TestCase):
+
+    def _package(self):
+        indicator = Indicator(title="Indicator", description="Description")
+        indicator.add_indicator_type("IP Watchlist")
+        indicator.add_observable(Address("10.0.0.1", Address.CAT_IPV4))
+        indicator.information_source = InformationSource(
+            identity=Identity(name="Source")
+        )
+
+        package = STIXPackage()
+        package.add_indicator(indicator)
+        package.add_ttp(TTP(title="TTP"))
+        return package
+
+    def test_to_dict(self):
+        package = self._package()
+        expected = entities.Entity.to_dict(package)
+        self.assertEqual(dictcodec.to_dict(package), expected)
+        self.assertEqual(dictcodec.encode(package), expected)
+
+    def test_key_order(self):
+        package = self._package()
+        expected = json.dumps(entities.Entity.to_dict(package))
+        self.assertEqual(json.dumps(package.to_dict()), expected)
+
+    def test_from_dict(self):
+        package = self._package()
+        d = STIXPackage.from_dict(package.to_dict()).to_dict()
+
+        parsed = dictcodec.from_dict(STIXPackage, d)
+        self.assertEqual(parsed.to_dict(), d)
+
+    def test_from_dict_none(self):
+        self.assertEqual(dictcodec.from_dict(Indicator, None), None)
+
+    def test_from_dict_collections(self):
+        # TypedCollections are built from missing values.
+        indicator = Indicator.from_dict({"title": "Test"})
+        self.assertTrue(isinstance(indicator.descriptions, StructuredTextList))
+        self.assertEqual(indicator.description, None)
+
+    def test_to_json(self):
+        package = self._package()
+        expected = json.dumps(package.to_dict())
+        self.assertEqual(package.to_json(), expected)
+
+    def test_to_json_file(self):
+        package = self._package()
+        expected = json.dumps(package.to_dict())
+
+        sio = StringIO()
+        result = package.to_json(sio)
+
+        self.assertEqual(result, None)
+        self.assertEqual(sio.getvalue(), expected)
+
+    def test_to_json_empty(self):
+        ttp = TTP()
+        sio = StringIO()
+        dictcodec.to_json(ttp, sio)
+        self.assertEqual(sio.getvalue(), json.dumps(ttp.to_dict()))
+
+    def test_iterencode(self):
+        package = self._package()
+        fragments = list(dictcodec.iterencode(package))
+
+        self.assertTrue(len(fragments) > 1)
+        self.assertEqual(
+            json.loads("".join(fragments)),
+            json.loads(package.to_json())
+        )
+
+    def test_from_json(self):
+        package = STIXPackage.from_dict(self._package().to_dict())
+        sio = StringIO()
+        package.to_json(sio)
+        sio.seek(0)
+
+        parsed = STIXPackage.from_json(sio)
+        self.assertEqual(parsed.to_dict(), package.to_dict())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+import unittest
+
+from mixbox.vendor.six import BytesIO
+
+from stix.core import STIXPackage
+from stix.indicator import Indicator
+from stix.ttp import TTP
+from stix.utils import differ
+
+
+class DiffTests(unittest.TestCase):
+
+    def setUp(self):
+        package = STIXPackage()
+        package.add_indicator(Indicator(id_="example:ind-1", title="One"))
+        package.add_indicator(Indicator(id_="example:ind-2", title="Two"))
+        package.add_ttp(TTP(id_="example:ttp-1", title="TTP"))
+
+        self.xml = package.to_xml()
+        self.old = self._parse()
+        self.new = self._parse()
+
+    def _parse(self):
+        return STIXPackage.from_xml(BytesIO(self.xml))
+
+    def test_unchanged(self):
+        result = differ.diff(self.old, self.new)
+
+        self.assertFalse(result)
+        self.assertEqual(result, ([], [], []))
+
+    def test_added_removed(self):
+        added = Indicator(id_="example:ind-3", title="Three")
+        self.new.add_indicator(added)
+        removed = self.new.ttps.ttps.pop(0)
+
+        result = differ.diff(self.old, self.new)
+
+        self.assertTrue(result)
+        self.assertEqual(result.added, [added])
+        self.assertEqual([x.id_ for x in result.removed], [removed.id_])
+        self.assertEqual(result.modified, [])
+
+    def test_modified(self):
+        self.new.indicators[1].title = "Changed"
+        self.new.indicators[1].add_indicator_type("IP Watchlist")
+
+        result = differ.diff(self.old, self.new)
+        self.assertEqual(len(result.modified), 1)
+
+        change = result.modified[0]
+        self.assertEqual(change.id_, "example:ind-2")
+        self.assertTrue(change.new is self.new.indicators[1])
+        self.assertEqual(
+            change.changes,
+            [
+                differ.FieldChange(("title",), "Two", "Changed"),
+                differ.FieldChange(("indicator_types",), None, [
+                    {"value": "IP Watchlist",
+                     "xsi:type": "stixVocabs:IndicatorTypeVocab-1.1"}
+                ]),
+            ]
+        )
+
+    def test_trust_timestamps(self):
+        self.new.indicators[0].title = "Changed"
+
+        self.assertTrue(differ.diff(self.old, self.new))
+        self.assertFalse(differ.diff(self.old, self.new, trust_timestamps=True))
+
+    def test_encoded_once(self):
+        self.new.indicators[1].title = "Changed"
+        encoded = []
+        encode = differ.dictcodec.encode
+
+        def counting_encode(component):
+            encoded.append(component)
+            return encode(component)
+
+        differ.dictcodec.encode = counting_encode
+
+        try:
+            result = differ.diff(self.old, self.new)
+        finally:
+            differ.dictcodec.encode = encode
+
+        # Each top-level component is encoded once, nested entities are
+        # encoded as part of it.
+        components = self.old.indicators[:] + self.new.indicators[:]
+        components += self.old.ttps[:] + self.new.ttps[:]
+        found = [x for x in encoded if any(x is y for y in components)]
+
+        self.assertEqual(len(result.modified), 1)
+        self.assertEqual(len(found), 6)
+        self.assertEqual(len(set(id(x) for x in found)), 6)
+
+    def test_same_component(self):
+        result = differ.diff(self.old, self.old)
+        self.assertEqual(result, ([], [], []))
+
+    def test_no_id(self):
+        d = {"title": "No id"}
+        self.old.add_indicator(Indicator.from_dict(d))
+        self.new.add_indicator(Indicator.from_dict(d))
+
+        self.assertFalse(differ.diff(self.old, self.new))
+
+        self.new.indicators[-1].title = "Changed"
+        result = differ.diff(self.old, self.new)
+        self.assertEqual(len(result.added), 1)
+        self.assertEqual(len(result.removed), 1)
+
+    def test_digest(self):
+        self.assertEqual(
+            differ.digest(self.old.indicators[0]),
+            differ.digest(self.new.indicators[0])
+        )
+        self.assertNotEqual(
+            differ.digest(self.old.indicators[0]),
+            differ.digest(self.new.indicators[1])
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,23 @@
 # Copyright (c) 2017, The MITRE Corporation. All rights reserved.
 # See LICENSE.txt for complete terms.
 
-from mixbox.vendor.six import StringIO
+from mixbox.vendor.six import BytesIO, StringIO
+import os
+import shutil
+import tempfile
 import unittest
 
+from cybox.core import Observable
+from lxml import etree
+from mixbox import fields
+
+from stix.core import STIXPackage
+from stix.indicator import Indicator
+from stix.ttp import TTP
 from stix.utils import (EntityParser, UnknownVersionError,
-                        UnsupportedRootElementError, UnsupportedVersionError)
+                        UnsupportedRootElementError, UnsupportedVersionError,
+                        parse_many)
+from stix.utils import parser
 
 
 class ParserTests(unittest.TestCase):
@@ -73,5 +85,133 @@ class ParserTests(unittest.TestCase):
         self.assertEqual("example:Package-1", package.id_)
 
 
+class IterComponentsTests(unittest.TestCase):
+
+    def _package_xml(self):
+        indicator = Indicator(title="Indicator")
+        indicator.add_observable(Observable(title="Nested"))
+
+        package = STIXPackage()
+        package.add_observable(Observable(title="Observable"))
+        package.add_indicator(indicator)
+        package.add_indicator(Indicator(title="Indicator 2"))
+        package.add_ttp(TTP(title="TTP"))
+        return package.to_xml()
+
+    def test_components(self):
+        xml = BytesIO(self._package_xml())
+        components = list(EntityParser().iter_components(xml))
+
+        types = [type(x) for x in components]
+        self.assertEqual([Observable, Indicator, Indicator, TTP], types)
+
+        titles = [x.title for x in components]
+        self.assertEqual(["Observable", "Indicator", "Indicator 2", "TTP"],
+                         titles)
+
+        # Observables nested inside an Indicator are not top-level components
+        self.assertEqual("Nested", components[1].observable.title)
+
+    def test_input_namespaces(self):
+        xml = BytesIO(self._package_xml())
+        indicator = list(STIXPackage.iter_components(xml))[1]
+        self.assertEqual("http://stix.mitre.org/stix-1",
+                         indicator.__input_namespaces__['stix'])
+
+    def test_wrong_version(self):
+        wrong_version = b"""
+        <stix:STIX_Package xmlns:stix="http://stix.mitre.org/stix-1"
+            version="17.8.9" id="example:Package-1">
+        </stix:STIX_Package>
+        """
+
+        parser = EntityParser()
+        components = parser.iter_components(BytesIO(wrong_version))
+        self.assertRaises(UnsupportedVersionError, list, components)
+
+
+class ParseManyTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.paths = []
+
+        for idx in range(3):
+            package = STIXPackage()
+            package.add_indicator(Indicator(title="Indicator %d" % idx))
+            self.paths.append(self._write("%d.xml" % idx, package.to_xml()))
+
+        self.paths.insert(1, self._write("bad.xml", b"<bad"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def _write(self, name, data):
+        path = os.path.join(self.tempdir, name)
+
+        with open(path, "wb") as f:
+            f.write(data)
+
+        return path
+
+    def _titles(self, results):
+        return [
+            x.result.indicators[0].title
+            for x in results if x.error is None
+        ]
+
+    def test_in_process(self):
+        results = list(parse_many(self.paths, workers=0))
+
+        self.assertEqual(self.paths, [x.path for x in results])
+        self.assertEqual(["Indicator 0", "Indicator 1", "Indicator 2"],
+                         self._titles(results))
+
+    def test_errors(self):
+        results = list(parse_many(self.paths, workers=0))
+
+        self.assertEqual(None, results[1].result)
+
+        # Errors raised in this process are not converted for pickling.
+        self.assertTrue(isinstance(results[1].error, etree.XMLSyntaxError))
+
+    def test_workers(self):
+        results = list(parse_many(self.paths, workers=2))
+
+        self.assertEqual(self.paths, [x.path for x in results])
+        self.assertEqual(["Indicator 0", "Indicator 1", "Indicator 2"],
+                         self._titles(results))
+        self.assertTrue(isinstance(results[1].error, Exception))
+
+    def test_unordered(self):
+        results = parse_many(self.paths, workers=2, ordered=False)
+        self.assertEqual(sorted(self.paths), sorted(x.path for x in results))
+
+    def test_dict(self):
+        results = list(parse_many(self.paths, workers=0, output="dict"))
+        d = results[0].result
+
+        self.assertEqual("Indicator 0", d["indicators"][0]["title"])
+
+    def test_summary(self):
+        results = list(parse_many(self.paths, workers=0, output="summary"))
+        summary = results[0].result
+
+        self.assertEqual(1, len(summary["indicators"]))
+        self.assertEqual("Indicator 0", summary["indicators"][0]["title"])
+
+    def test_invalid_output(self):
+        self.assertRaises(ValueError, parse_many, self.paths, output="foo")
+
+    def test_field_ref(self):
+        klass, attr = parser._field_ref(Indicator.title)
+        self.assertTrue(getattr(klass, attr) is Indicator.title)
+
+        # Fields without an owner class are remembered.
+        field = fields.TypedField("Unowned")
+        self.assertEqual(None, parser._field_ref(field))
+        self.assertTrue(field in parser._FIELD_REFS)
+
+
 if __name__ == "__main__":
     unittest.main()
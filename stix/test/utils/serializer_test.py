@@ -0,0 +1,148 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+import unittest
+
+from mixbox.entities import NamespaceCollector
+from mixbox.vendor.six import BytesIO, StringIO, text_type
+
+from cybox.objects.address_object import Address
+
+from stix.core import STIXPackage
+from stix.common import InformationSource, Identity
+from stix.incident import Incident
+from stix.indicator import Indicator
+from stix.ttp import TTP
+from stix.utils import serializer
+from stix.utils.serializer import Serializer
+
+
+def _export(entity, pretty_print=True):
+    """Serializes `entity` through its binding object."""
+    ns_info = NamespaceCollector()
+    obj = entity.to_obj(ns_info=ns_info)
+    ns_info.finalize()
+
+    sio = StringIO()
+    obj.export(sio.write, 0, ns_info.binding_namespaces,
+               pretty_print=pretty_print)
+    return text_type(sio.getvalue())
+
+
+def _serialize(entity, pretty_print=True):
+    """Serializes `entity` through a Serializer."""
+    ns_info = NamespaceCollector()
+    serializer = Serializer(ns_info)
+    serializer.collect(entity)
+    ns_info.finalize()
+
+    parts = []
+    serializer.export(entity, parts.append, 0, ns_info.binding_namespaces,
+                      pretty_print=pretty_print)
+    return text_type().join(parts)
+
+
+class SerializerTests(unittest.TestCase):
+
+    def _package(self):
+        indicator = Indicator(title="Indicator", description="Description")
+        indicator.add_indicator_type("IP Watchlist")
+        indicator.add_observable(Address("10.0.0.1", Address.CAT_IPV4))
+        indicator.information_source = InformationSource(
+            identity=Identity(name="Source")
+        )
+
+        package = STIXPackage()
+        package.add_indicator(indicator)
+        package.add_ttp(TTP(title="TTP"))
+        package.add_incident(Incident(title="Incident"))
+        return package
+
+    def test_pretty(self):
+        package = self._package()
+        self.assertEqual(_export(package), _serialize(package))
+
+    def test_not_pretty(self):
+        package = self._package()
+        self.assertEqual(_export(package, pretty_print=False),
+                         _serialize(package, pretty_print=False))
+
+    def test_lazy(self):
+        xml = self._package().to_xml()
+        eager = STIXPackage.from_xml(BytesIO(xml))
+        lazy = STIXPackage.from_xml(BytesIO(xml), lazy=True)
+
+        self.assertEqual(eager.to_xml(), lazy.to_xml())
+        self.assertEqual(_export(eager), _serialize(lazy))
+
+    def test_collect_releases(self):
+        package = self._package()
+        ns_info = NamespaceCollector()
+        serializer = Serializer(ns_info)
+        serializer.collect(package)
+        ns_info.finalize()
+
+        # Only objects which are not exported directly are built early.
+        kept = [entity for entity, _ in serializer._objs.values()]
+        self.assertTrue(kept)
+        self.assertFalse(any(isinstance(x, Indicator) for x in kept))
+
+        serializer.export(package, StringIO().write, 0,
+                          ns_info.binding_namespaces)
+        self.assertEqual(serializer._objs, {})
+
+    def test_not_collected(self):
+        # Without a NamespaceCollector the objects are exported on demand.
+        package = self._package()
+        ns_info = NamespaceCollector()
+        package.to_obj(ns_info=ns_info)
+        ns_info.finalize()
+
+        parts = []
+        Serializer().export(package, parts.append, 0,
+                            ns_info.binding_namespaces)
+
+        self.assertEqual(_export(package), text_type().join(parts))
+
+
+class NamespaceCollectorTests(unittest.TestCase):
+
+    def _collect(self, klass, entity):
+        ns_info = klass()
+        Serializer(ns_info).collect(entity)
+        ns_info.finalize()
+        return ns_info
+
+    def _assert_same(self, entity):
+        expected = self._collect(NamespaceCollector, entity)
+        actual = self._collect(serializer.NamespaceCollector, entity)
+
+        self.assertEqual(expected.binding_namespaces,
+                         actual.binding_namespaces)
+        self.assertEqual(expected.finalized_schemalocs,
+                         actual.finalized_schemalocs)
+
+    def test_namespaces(self):
+        self._assert_same(SerializerTests()._package())
+
+    def test_input_namespaces(self):
+        xml = SerializerTests()._package().to_xml()
+        xml = xml.replace(b"<stix:STIX_Package",
+                          b'<stix:STIX_Package xmlns:foo="http://foo.com"')
+
+        package = STIXPackage.from_xml(BytesIO(xml))
+        ns_info = self._collect(serializer.NamespaceCollector, package)
+
+        self.assertEqual(ns_info.binding_namespaces["http://foo.com"], "foo")
+        self._assert_same(package)
+
+    def test_cached(self):
+        first = serializer._class_namespaces(Indicator)
+        self.assertTrue(first is serializer._class_namespaces(Indicator))
+        self.assertTrue(
+            (None, "http://stix.mitre.org/Indicator-2") in first
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
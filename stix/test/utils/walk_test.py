@@ -0,0 +1,114 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+import unittest
+
+from cybox.core import Observable
+from cybox.objects.address_object import Address
+
+from stix.core import STIXPackage
+from stix.common import InformationSource, Identity, StructuredText
+from stix.indicator import Indicator
+from stix.ttp import TTP
+from stix.utils import walk
+
+
+class WalkTests(unittest.TestCase):
+
+    def _package(self):
+        indicator = Indicator(title="Indicator", description="Description")
+        indicator.add_observable(Address("10.0.0.1", Address.CAT_IPV4))
+        indicator.information_source = InformationSource(
+            identity=Identity(name="Source")
+        )
+
+        related = Indicator(title="Related")
+        indicator.related_indicators.append(related)
+
+        package = STIXPackage()
+        package.add_indicator(indicator)
+        package.add_ttp(TTP(title="TTP"))
+        return package, indicator, related
+
+    def test_depth_first(self):
+        package, indicator, related = self._package()
+        entities = list(walk.iterwalk(package))
+
+        self.assertTrue(indicator in entities)
+        self.assertTrue(related in entities)
+
+        # Children come after their parents.
+        self.assertTrue(entities.index(indicator) < entities.index(related))
+
+    def test_types(self):
+        package, indicator, related = self._package()
+
+        indicators = list(walk.iterwalk(package, types=Indicator))
+        self.assertEqual(indicators, [indicator, related])
+
+    def test_types_tuple(self):
+        package, indicator, related = self._package()
+        types = (Indicator, Observable)
+
+        expected = [x for x in walk.iterwalk(package) if isinstance(x, types)]
+        found = list(walk.iterwalk(package, types=types))
+
+        self.assertEqual(found, expected)
+        self.assertEqual(len(found), 3)
+
+    def test_types_subclass(self):
+        package, _, _ = self._package()
+
+        expected = [
+            x for x in walk.iterwalk(package)
+            if isinstance(x, StructuredText)
+        ]
+        found = list(walk.iterwalk(package, types=StructuredText))
+
+        self.assertEqual(found, expected)
+        self.assertTrue(found)
+
+    def test_deep(self):
+        root = Indicator()
+        current = root
+
+        for _ in range(2000):
+            child = Indicator()
+            current.related_indicators.append(child)
+            current = child
+
+        found = list(walk.iterwalk(root, types=Indicator))
+        self.assertEqual(len(found), 2000)
+        self.assertTrue(found[-1] is current)
+
+    def test_entity_walk(self):
+        package, indicator, related = self._package()
+        found = list(package.walk(types=Indicator))
+        self.assertEqual(found, [indicator, related])
+
+    def test_iterpath(self):
+        package, indicator, _ = self._package()
+
+        for path, name, value in walk.iterpath(package):
+            if value == "Related":
+                self.assertEqual(name, "title")
+                self.assertTrue(path[0] is package)
+                self.assertTrue(indicator in path)
+                break
+        else:
+            self.fail("Related indicator title not found")
+
+    def test_walk_skip(self):
+        package, indicator, _ = self._package()
+
+        # Populate the cached lookup data.
+        hash(indicator.descriptions[1])
+        self.assertEqual(indicator.descriptions.ordinalities, (1,))
+
+        names = set(name for _, name, _ in walk.iterpath(indicator))
+        self.assertTrue("ordinality" in names)
+        self.assertFalse(names.intersection(["value_key", "ordinality_index"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from mixbox.vendor.six import BytesIO
+
+from stix import validation
+
+CORE_XSD = b"""<?xml version="1.0"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+    xmlns:stixCommon="http://stix.mitre.org/common-1"
+    targetNamespace="http://stix.mitre.org/stix-1"
+    elementFormDefault="qualified">
+  <xs:import namespace="http://stix.mitre.org/common-1"
+      schemaLocation="http://stix.mitre.org/XMLSchema/common/1.2/stix_common.xsd"/>
+  <xs:element name="STIX_Package">
+    <xs:complexType>
+      <xs:sequence>
+        <xs:element name="Title" type="stixCommon:ShortString" minOccurs="0"/>
+      </xs:sequence>
+      <xs:attribute name="version" type="xs:string"/>
+    </xs:complexType>
+  </xs:element>
+</xs:schema>
+"""
+
+COMMON_XSD = b"""<?xml version="1.0"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+    targetNamespace="http://stix.mitre.org/common-1">
+  <xs:simpleType name="ShortString">
+    <xs:restriction base="xs:string">
+      <xs:maxLength value="5"/>
+    </xs:restriction>
+  </xs:simpleType>
+</xs:schema>
+"""
+
+DOCUMENT = """<stix:STIX_Package xmlns:stix="http://stix.mitre.org/stix-1"
+    version="%s"><stix:Title>%s</stix:Title></stix:STIX_Package>"""
+
+
+class ValidatorTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.schema_dir = os.path.join(self.tmpdir, "schemas")
+        os.makedirs(os.path.join(self.schema_dir, "common"))
+
+        self._write(os.path.join("schemas", "stix_core.xsd"), CORE_XSD)
+        self._write(os.path.join("schemas", "common", "stix_common.xsd"),
+                    COMMON_XSD)
+
+        self.validator = validation.Validator({"1.2": self.schema_dir})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+        validation._SCHEMAS.clear()
+
+    def _write(self, name, data):
+        path = os.path.join(self.tmpdir, name)
+
+        with open(path, "wb") as f:
+            f.write(data)
+
+        return path
+
+    def _document(self, name, title, version="1.2"):
+        data = DOCUMENT % (version, title)
+        return self._write(name, data.encode("utf-8"))
+
+    def test_valid(self):
+        path = self._document("valid.xml", "Test")
+        result = self.validator.validate(path)
+
+        self.assertEqual(result, (path, "1.2", True, []))
+
+    def test_invalid(self):
+        doc = BytesIO((DOCUMENT % ("1.2", "Too long")).encode("utf-8"))
+        result = self.validator.validate(doc)
+
+        self.assertFalse(result.valid)
+        self.assertEqual(result.path, None)
+        self.assertEqual(len(result.errors), 1)
+        self.assertEqual(result.errors[0].line, 2)
+        self.assertTrue("maxLength" in result.errors[0].message)
+
+    def test_unknown_version(self):
+        path = self._document("old.xml", "Test", version="1.1.1")
+        result = self.validator.validate(path)
+
+        self.assertFalse(result.valid)
+        self.assertEqual(result.version, "1.1.1")
+        self.assertEqual(result.errors[0].line, None)
+
+    def test_unreadable(self):
+        path = os.path.join(self.tmpdir, "missing.xml")
+        result = self.validator.validate(path)
+
+        self.assertFalse(result.valid)
+        self.assertEqual(len(result.errors), 1)
+
+    def test_cached(self):
+        schema = self.validator.schema("1.2")
+        other = validation.Validator(self.schema_dir)
+
+        self.assertTrue(other.schema("1.2") is schema)
+
+    def test_unsupported_version(self):
+        self.assertRaises(ValueError, validation.Validator,
+                          {"1.0": self.schema_dir})
+
+    def test_no_schemas(self):
+        validator = validation.Validator(self.tmpdir + "/empty")
+        self.assertRaises(ValueError, validator.schema, "1.2")
+
+    def test_validate_many(self):
+        paths = [
+            self._document("first.xml", "One"),
+            self._document("second.xml", "Too long"),
+        ]
+
+        for workers in (0, 2):
+            results = list(validation.validate_many(paths, self.schema_dir,
+                                                    workers=workers))
+
+            self.assertEqual([x.path for x in results], paths)
+            self.assertEqual([x.valid for x in results], [True, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -106,7 +106,7 @@ class MalwareInstance(stix.Entity):
         return stix.lookup_extension(xsi_type)
 
 
-class MalwareInstanceFactory(entities.EntityFactory):
+class MalwareInstanceFactory(stix.EntityFactory):
     @classmethod
     def entity_class(cls, key):
         return stix.lookup_extension(key, default=MalwareInstance)
@@ -381,3 +381,4 @@ from .nsparser import *  # noqa
 from .dates import *  # noqa
 from .parser import *  # noqa
 from .walk import *  # noqa
+from .differ import *  # noqa
@@ -3,17 +3,147 @@
 
 # stdlib
 import datetime
+import re
+import threading
 
 # external
 import dateutil
 import dateutil.parser
 import dateutil.tz
 
+#: Matches the ``xs:dateTime`` and ``xs:date`` forms used in STIX content.
+#: Timezones are only matched on timestamps with a time component.
+_TIMESTAMP_PATTERN = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})"
+    r"(?:T(\d{2}):(\d{2}):(\d{2})(?:\.(\d{1,6}))?"
+    r"(Z|[+-]\d{2}:\d{2})?)?$"
+)
+
+#: Maximum number of timestamp strings kept by the parse cache.
+CACHE_SIZE = 4096
+
+#: Timezone offset strings mapped to their ``tzinfo`` instances.
+_TIMEZONES = {}
+
+
+def _timezone(offset):
+    """Returns the ``tzinfo`` for the ``Z`` or ``[+-]HH:MM`` string `offset`.
+
+    UTC offsets map to ``dateutil.tz.tzutc()`` and other offsets to a
+    ``dateutil.tz.tzoffset()``.
+
+    """
+    try:
+        return _TIMEZONES[offset]
+    except KeyError:
+        pass
+
+    if offset == "Z":
+        seconds = 0
+    else:
+        seconds = int(offset[1:3]) * 3600 + int(offset[4:6]) * 60
+
+        if offset[0] == "-":
+            seconds = -seconds
+
+    if seconds:
+        tzinfo = dateutil.tz.tzoffset(None, seconds)
+    else:
+        tzinfo = dateutil.tz.tzutc()
+
+    _TIMEZONES[offset] = tzinfo
+    return tzinfo
+
+
+def _parse_timestamp(value):
+    """Parses the ``xs:dateTime`` or ``xs:date`` string `value`. Returns
+    ``None`` if `value` is not in one of those forms.
+
+    """
+    match = _TIMESTAMP_PATTERN.match(value)
+
+    if not match:
+        return None
+
+    year, month, day, hour, minute, second, fraction, offset = match.groups()
+
+    if hour is None:
+        hour = minute = second = 0
+
+    microsecond = int(fraction.ljust(6, "0")) if fraction else 0
+    tzinfo = _timezone(offset) if offset else None
+
+    try:
+        return datetime.datetime(
+            int(year), int(month), int(day), int(hour), int(minute),
+            int(second), microsecond, tzinfo
+        )
+    except ValueError:
+        # Out of range values are reported by dateutil.
+        return None
+
+
+class _TimestampCache(object):
+    """A thread-safe mapping of timestamp strings to parsed values which holds
+    at most `size` entries.
+
+    Entries are kept in two generations of up to ``size // 2`` entries each.
+    When the newer generation is full it replaces the older one, and entries
+    found in the older generation are moved to the newer one. Recently used
+    entries are kept and the least recently used are discarded together.
+
+    """
+    def __init__(self, size):
+        self.size = size
+        self._limit = max(size // 2, 1)
+        self._lock = threading.Lock()
+        self._new = {}
+        self._old = {}
+
+    def _put(self, key, value):
+        if len(self._new) >= self._limit:
+            self._old = self._new
+            self._new = {}
+
+        self._new[key] = value
+
+    def get(self, key):
+        """Returns the value cached for `key` or ``None``."""
+        with self._lock:
+            try:
+                return self._new[key]
+            except KeyError:
+                pass
+
+            value = self._old.pop(key, None)
+
+            if value is not None:
+                self._put(key, value)
+
+            return value
+
+    def put(self, key, value):
+        """Caches `value` for `key`."""
+        with self._lock:
+            self._put(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._new = {}
+            self._old = {}
+
+
+_CACHE = _TimestampCache(CACHE_SIZE)
+
 
 def parse_value(value):
     """Attempts to parse `value` into an instance of ``datetime.datetime``. If
     `value` is ``None``, this function will return ``None``.
 
+    ``xs:dateTime`` and ``xs:date`` strings are parsed directly. Other strings
+    are parsed by ``dateutil.parser.parse()``. Recently parsed strings are
+    cached, since ``datetime.datetime`` instances are immutable.
+
     Args:
         value: A timestamp. This can be a string or datetime.datetime value.
 
@@ -22,7 +152,14 @@ def parse_value(value):
         return None
     elif isinstance(value, datetime.datetime):
         return value
-    return dateutil.parser.parse(value)
+
+    parsed = _CACHE.get(value)
+
+    if parsed is None:
+        parsed = _parse_timestamp(value) or dateutil.parser.parse(value)
+        _CACHE.put(value, parsed)
+
+    return parsed
 
 
 def serialize_value(value):
@@ -57,7 +194,7 @@ def parse_date(value):
     elif isinstance(value, datetime.datetime):
         return value.date()
     else:
-        return dateutil.parser.parse(value).date()
+        return parse_value(value).date()
 
 
 def serialize_date(value):
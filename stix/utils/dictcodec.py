@@ -0,0 +1,447 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+"""
+Converts python-stix API objects to and from dictionaries and JSON.
+
+The generic ``mixbox.entities.Entity.to_dict()`` and ``from_dict()``
+implementations look up the ``key_name``, ``type_``, ``multiple`` and
+``transformer`` properties of every TypedField each time an object is
+converted, and iterate collections through their ``MutableSequence``
+interfaces. This module looks up those properties once per field and class
+and converts objects which use the default implementations without going
+through their ``to_dict()`` methods.
+
+The dictionaries produced and accepted are identical to those of the generic
+implementations. Classes which override ``to_dict()`` or ``from_dict()`` are
+still converted by calling those methods.
+"""
+
+# stdlib
+import json
+
+# external
+from mixbox import entities
+from mixbox import fields
+
+# internal
+import stix
+
+
+def _func(method):
+    """Returns the function behind an (unbound) method."""
+    return getattr(method, "__func__", method)
+
+
+#: Per-field cache of the TypedField properties used during conversion.
+_FIELDS = {}
+
+
+def _field_info(field):
+    """Returns a ``(key_name, type_, multiple, dict_value, lazy)`` tuple for
+    `field`. The `dict_value` is ``None`` if the field does not convert its
+    values.
+
+    """
+    try:
+        return _FIELDS[field]
+    except KeyError:
+        pass
+
+    dict_value = field.dict_value
+
+    if _func(type(field).dict_value) is _func(fields.TypedField.dict_value):
+        dict_value = None
+
+    info = (
+        field.key_name,
+        field.type_,
+        field.multiple,
+        dict_value,
+        isinstance(field, stix.LazyField),
+    )
+
+    _FIELDS[field] = info
+    return info
+
+
+#: Per-class cache of the ``_finalize_dict()`` function of classes which
+#: override it. Other classes map to ``None``.
+_FINALIZERS = {}
+
+
+def _finalizer(klass):
+    try:
+        return _FINALIZERS[klass]
+    except KeyError:
+        pass
+
+    finalize = _func(klass._finalize_dict)
+
+    if finalize is _func(entities.Entity._finalize_dict):
+        finalize = None
+
+    _FINALIZERS[klass] = finalize
+    return finalize
+
+
+#: Encoder kinds.
+_OTHER, _ENTITY, _LIST, _COLLECTION = range(4)
+
+#: Per-class cache of the encoder kind and, for EntityLists which are
+#: represented as lists, the multiple TypedField.
+_ENCODERS = {}
+
+
+def _encoder(klass):
+    """Returns a ``(kind, field)`` tuple describing how instances of `klass`
+    are converted to dictionaries.
+
+    """
+    try:
+        return _ENCODERS[klass]
+    except KeyError:
+        pass
+
+    # Avoid a circular import.
+    from stix.core import STIXPackage
+
+    to_dict = _func(getattr(klass, "to_dict", None))
+
+    # STIXPackage.to_dict() only loads lazily parsed fields, which the
+    # encoder does on its own.
+    defaults = (
+        _func(entities.Entity.to_dict),
+        _func(stix.Entity.to_dict),
+        _func(STIXPackage.to_dict),
+    )
+
+    if to_dict in defaults:
+        encoder = (_ENTITY, None)
+    elif (to_dict is _func(entities.EntityList.to_dict) and
+          _func(klass.to_list) is _func(entities.EntityList.to_list)):
+        if klass._dict_as_list():
+            encoder = (_LIST, klass._multiple_field())
+        else:
+            encoder = (_ENTITY, None)
+    elif to_dict is _func(stix.TypedCollection.to_list):
+        encoder = (_COLLECTION, None)
+    else:
+        encoder = (_OTHER, None)
+
+    _ENCODERS[klass] = encoder
+    return encoder
+
+
+def _encode_value(info, val):
+    """Returns the dictionary value of a TypedField value. This mirrors
+    ``mixbox.entities._dictify()``.
+
+    """
+    _, type_, multiple, dict_value, _ = info
+
+    if multiple:
+        if not val:
+            return []
+        elif type_:
+            return [encode(x) if x is not None else None for x in val]
+        elif dict_value:
+            return [dict_value(x) if x is not None else None for x in val]
+        return list(val)
+    elif val is None:
+        return None
+    elif type_:
+        return encode(val)
+    elif dict_value:
+        return dict_value(val)
+
+    return val
+
+
+def _field_items(entity):
+    """Yields a ``(field information, value)`` tuple for each field of
+    `entity` which has a value, loading lazily parsed fields.
+
+    """
+    for field, val in list(entity._fields.items()):
+        if val is None:
+            continue
+
+        try:
+            info = _FIELDS[field]
+        except KeyError:
+            info = _field_info(field)
+
+        if info[4]:
+            val = field.__get__(entity)
+
+        yield info, val
+
+
+def to_dict(entity):
+    """Returns the dictionary representation of `entity` built from its
+    TypedFields. This mirrors ``mixbox.entities.Entity.to_dict()``.
+
+    """
+    entity_dict = {}
+
+    for field, val in list(entity._fields.items()):
+        # None values and empty lists are not added to the dictionary.
+        if val is None:
+            continue
+
+        try:
+            info = _FIELDS[field]
+        except KeyError:
+            info = _field_info(field)
+
+        if info[4]:
+            val = field.__get__(entity)
+        elif info[2] and not val:
+            continue
+
+        val = _encode_value(info, val)
+
+        if val is not None and val != []:
+            entity_dict[info[0]] = val
+
+    try:
+        finalize = _FINALIZERS[type(entity)]
+    except KeyError:
+        finalize = _finalizer(type(entity))
+
+    if finalize:
+        finalize(entity, entity_dict)
+
+    return entity_dict
+
+
+def encode(entity):
+    """Returns the dictionary representation of `entity`.
+
+    This is equivalent to ``entity.to_dict()``.
+
+    """
+    try:
+        kind, field = _ENCODERS[type(entity)]
+    except KeyError:
+        kind, field = _encoder(type(entity))
+
+    if kind == _ENTITY:
+        return to_dict(entity)
+    elif kind == _LIST:
+        return [encode(x) for x in entity._fields.get(field) or ()]
+    elif kind == _COLLECTION:
+        return [encode(x) for x in entity._inner]
+
+    return entity.to_dict()
+
+
+#: Per-class cache of ``(field, key_name, transformer, multiple, plain)``
+#: tuples.
+_DECODERS = {}
+
+
+def _is_plain(field):
+    """Returns ``True`` if a missing value for `field` can be stored as
+    ``None`` without calling the field setter.
+
+    This is the case for fields without hooks or custom setters whose
+    transformer (if any) returns ``None`` when passed ``None``.
+    TypedCollections, for example, return an empty collection.
+
+    """
+    transformer = field.transformer
+
+    # These implementations return None for None input.
+    none_safe = (
+        _func(entities.Entity.from_dict),
+        _func(entities.EntityList.from_dict),
+        _func(entities.EntityFactory.from_dict),
+        _func(stix.Entity.from_dict),
+    )
+
+    return (
+        type(field).__set__ is fields.TypedField.__set__ and
+        not field.multiple and
+        not field.preset_hook and
+        not field.postset_hook and
+        (transformer is None or _func(transformer.from_dict) in none_safe)
+    )
+
+
+def _decoder(klass):
+    """Returns the TypedField information used to build `klass` instances
+    from dictionaries.
+
+    """
+    try:
+        return _DECODERS[klass]
+    except KeyError:
+        pass
+
+    decoder = tuple(
+        (x, x.key_name, x.transformer, x.multiple, _is_plain(x))
+        for x in klass.typed_fields()
+    )
+
+    _DECODERS[klass] = decoder
+    return decoder
+
+
+def from_dict(klass, cls_dict):
+    """Returns an instance of `klass` built from the dictionary
+    representation `cls_dict`. This mirrors
+    ``mixbox.entities.Entity.from_dict()``.
+
+    """
+    if cls_dict is None:
+        return None
+
+    # Shortcut if an actual dict is not provided:
+    if not isinstance(cls_dict, dict):
+        value = cls_dict
+
+        try:
+            return klass(value)   # Call the class's constructor
+        except TypeError as ex:
+            fmt  = "Could not instantiate a %s from a %s: %s"
+            args = (klass, type(value), value)
+            ex.message = fmt % args
+            raise
+
+    try:
+        decoder = _DECODERS[klass]
+    except KeyError:
+        decoder = _decoder(klass)
+
+    # Every field is set below, so the constructor defaults are not needed.
+    entity = getattr(klass, "_new_parsed", klass)()
+    values = entity._fields
+    get = cls_dict.get
+
+    for field, key, transformer, multiple, plain in decoder:
+        val = get(key)
+
+        if val is None and plain:
+            values[field] = None
+            continue
+
+        if transformer:
+            if multiple:
+                if val is not None:
+                    transform = transformer.from_dict
+                    val = [transform(x) for x in val]
+                else:
+                    val = []
+            else:
+                val = transformer.from_dict(val)
+        elif multiple and not val:
+            val = []
+
+        field.__set__(entity, val)
+
+    return entity
+
+
+def _items(info, val):
+    """Returns the items of a TypedField value which is a list of entities in
+    its dictionary representation, or ``None`` if it is not.
+
+    """
+    _, type_, multiple, _, _ = info
+
+    if not type_:
+        return None
+    elif multiple:
+        return val
+
+    kind, field = _encoder(type(val))
+
+    if kind == _LIST:
+        return val._fields.get(field) or ()
+    elif kind == _COLLECTION:
+        return val._inner
+
+    return None
+
+
+def _is_streamable(entity):
+    """Returns ``True`` if `entity` uses the default ``to_dict()``
+    implementation and does not finalize its dictionary.
+
+    """
+    kind, _ = _encoder(type(entity))
+    return kind == _ENTITY and not _finalizer(type(entity))
+
+
+def _iterencode(encoder, entity):
+    """Yields the JSON fragments of a streamable `entity`."""
+    delim = "{"
+
+    for info, val in _field_items(entity):
+        items = _items(info, val)
+
+        if items is not None:
+            if not items:
+                continue
+
+            yield delim + encoder.encode(info[0]) + ": ["
+
+            for idx, item in enumerate(items):
+                item = encode(item) if item is not None else None
+                yield (", " if idx else "") + encoder.encode(item)
+
+            yield "]"
+        elif info[1] and not info[2] and _is_streamable(val):
+            yield delim + encoder.encode(info[0]) + ": "
+
+            for fragment in _iterencode(encoder, val):
+                yield fragment
+        else:
+            val = _encode_value(info, val)
+
+            if val is None or val == []:
+                continue
+
+            yield delim + encoder.encode(info[0]) + ": " + encoder.encode(val)
+
+        delim = ", "
+
+    yield "{}" if delim == "{" else "}"
+
+
+def iterencode(entity):
+    """Yields the JSON representation of `entity` in fragments.
+
+    Entities and lists of entities held by `entity` (e.g., the Indicators of
+    a STIX Package) are encoded one item at a time, so the dictionary
+    representation of the whole `entity` is never built. The joined
+    fragments are identical to ``json.dumps(entity.to_dict())``.
+
+    """
+    # Finalizers can modify the whole dictionary, so it must be built first.
+    if not _is_streamable(entity):
+        yield json.dumps(encode(entity))
+        return
+
+    for fragment in _iterencode(json.JSONEncoder(), entity):
+        yield fragment
+
+
+def to_json(entity, file_=None):
+    """Returns the JSON representation of `entity`, or writes it to `file_`.
+
+    Args:
+        entity: A python-stix Entity instance.
+        file_: An optional file-like object which accepts strings. If set,
+            the JSON is written to `file_` one fragment at a time and
+            ``None`` is returned.
+
+    """
+    if file_ is None:
+        return json.dumps(encode(entity))
+
+    write = file_.write
+
+    for fragment in iterencode(entity):
+        write(fragment)
@@ -0,0 +1,225 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+"""
+Compares two versions of a STIX Package.
+
+Top-level components are matched by ``id_``. Each matched pair is encoded
+to its dictionary representation once. The two dictionaries are compared
+directly, which stops at the first difference, and the same dictionaries are
+walked to report the field changes of modified components. Components
+without an id are matched by a digest of their dictionary representation.
+"""
+
+# stdlib
+import collections
+import hashlib
+import json
+
+# internal
+from . import dictcodec
+from .parser import COMPONENT_FIELDS
+
+
+class FieldChange(collections.namedtuple("FieldChange", "path old new")):
+    """A value which differs between two versions of a component.
+
+    Attributes:
+        path: A tuple of dictionary keys and list indexes which locate the
+            value in the dictionary representation of the component (e.g.,
+            ``("observable", "object", "properties", "address_value")``).
+        old: The old value, or ``None`` if it was added.
+        new: The new value, or ``None`` if it was removed.
+
+    """
+    __slots__ = ()
+
+
+class ComponentChange(collections.namedtuple("ComponentChange",
+                                             "id_ old new changes")):
+    """A top-level component which differs between two packages.
+
+    Attributes:
+        id_: The id of the component.
+        old: The component from the old package.
+        new: The component from the new package.
+        changes: A list of :class:`FieldChange` tuples.
+
+    """
+    __slots__ = ()
+
+
+class PackageDiff(collections.namedtuple("PackageDiff",
+                                         "added removed modified")):
+    """The differences between the top-level components of two packages.
+
+    A PackageDiff is ``False`` in a boolean context if the packages have the
+    same components.
+
+    Attributes:
+        added: A list of the components only found in the new package.
+        removed: A list of the components only found in the old package.
+        modified: A list of :class:`ComponentChange` tuples.
+
+    """
+    __slots__ = ()
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.modified)
+
+    __nonzero__ = __bool__
+
+
+def _components(package):
+    """Yields the top-level components of `package`."""
+    for name in COMPONENT_FIELDS:
+        for component in getattr(package, name) or ():
+            yield component
+
+
+def digest(component):
+    """Returns a digest of the dictionary representation of `component`.
+
+    Components with equal digests have equal dictionary representations.
+
+    """
+    d = dictcodec.encode(component)
+    s = json.dumps(d, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(s.encode("utf-8")).hexdigest()
+
+
+def _newer(component, current):
+    """Returns ``True`` if `component` has a newer timestamp than
+    `current`.
+
+    """
+    timestamp = getattr(component, "timestamp", None)
+    existing = getattr(current, "timestamp", None)
+
+    if timestamp is None:
+        return False
+    elif existing is None:
+        return True
+
+    try:
+        return timestamp > existing
+    except TypeError:
+        # Timezone-aware and naive timestamps cannot be compared.
+        return False
+
+
+def _index(package):
+    """Returns a ``(keys, components)`` tuple for the top-level components of
+    `package`, where `components` is a dictionary and `keys` lists its keys
+    in document order.
+
+    Components are keyed by id. If a package holds several versions of an
+    id, the version with the newest timestamp is used. Components without
+    an id are keyed by their digest.
+
+    """
+    keys = []
+    index = {}
+
+    for component in _components(package):
+        id_ = component.id_
+        key = id_ or (None, digest(component))
+        current = index.get(key)
+
+        if current is None:
+            keys.append(key)
+            index[key] = component
+        elif id_ and _newer(component, current):
+            index[key] = component
+
+    return keys, index
+
+
+def _diff_values(path, old, new, changes):
+    """Appends a :class:`FieldChange` to `changes` for each value which
+    differs between the dictionary representation values `old` and `new`.
+
+    """
+    if old == new:
+        return
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        keys = list(old)
+        keys.extend(x for x in new if x not in old)
+
+        for key in keys:
+            _diff_values(path + (key,), old.get(key), new.get(key), changes)
+    elif isinstance(old, list) and isinstance(new, list):
+        for idx in range(max(len(old), len(new))):
+            old_item = old[idx] if idx < len(old) else None
+            new_item = new[idx] if idx < len(new) else None
+            _diff_values(path + (idx,), old_item, new_item, changes)
+    else:
+        changes.append(FieldChange(path, old, new))
+
+
+def _is_same_version(old, new, trust_timestamps):
+    """Returns ``True`` if `old` and `new` are known to be unchanged without
+    comparing their content.
+
+    """
+    if old is new:
+        return True
+
+    if trust_timestamps:
+        timestamp = getattr(old, "timestamp", None)
+
+        if timestamp is not None and timestamp == getattr(new, "timestamp", None):
+            return True
+
+    return False
+
+
+def diff(old, new, trust_timestamps=False):
+    """Compares the top-level components of two STIX Packages.
+
+    Components are matched by ``id_``. Components without an id can only be
+    matched by content, so they are either unchanged, added or removed.
+
+    Args:
+        old: The old :class:`.STIXPackage`.
+        new: The new :class:`.STIXPackage`.
+        trust_timestamps: If ``True``, components with the same id and
+            ``timestamp`` are assumed to be unchanged without comparing
+            their content. STIX requires a new timestamp for each version
+            of a component, but not every producer follows this.
+
+    Returns:
+        A :class:`PackageDiff`. Field-level changes are reported on the
+        dictionary representations of the components.
+
+    """
+    old_keys, old_index = _index(old)
+    new_keys, new_index = _index(new)
+
+    added = [new_index[x] for x in new_keys if x not in old_index]
+    removed = [old_index[x] for x in old_keys if x not in new_index]
+    modified = []
+
+    for key in new_keys:
+        old_component = old_index.get(key)
+        new_component = new_index[key]
+
+        if old_component is None:
+            continue
+        elif _is_same_version(old_component, new_component, trust_timestamps):
+            continue
+
+        # Equal dictionaries produce no changes.
+        changes = []
+        _diff_values(
+            (),
+            dictcodec.encode(old_component),
+            dictcodec.encode(new_component),
+            changes
+        )
+
+        if changes:
+            change = ComponentChange(key, old_component, new_component, changes)
+            modified.append(change)
+
+    return PackageDiff(added, removed, modified)
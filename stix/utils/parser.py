@@ -1,17 +1,70 @@
 # Copyright (c) 2017, The MITRE Corporation. All rights reserved.
 # See LICENSE.txt for complete terms.
 
+import collections
+import functools
+import multiprocessing
+import pickle
+import sys
+import warnings
+
+import lxml.etree
+
 import stix
 from stix.xmlconst import TAG_STIX_PACKAGE
 
+from mixbox import entities, fields
 import mixbox.parser
+import mixbox.xml
+from mixbox.exceptions import ignored
 # Import these from mixbox for backward compatibility
 from mixbox.parser import (UnknownVersionError, UnsupportedVersionError,
                            UnsupportedRootElementError)
+from mixbox.vendor.six import BytesIO, iteritems
+
+from . import dates
 
 # Alias for backwards compatibility
 UnsupportedRootElement = UnsupportedRootElementError
 
+#: STIXPackage fields whose items are yielded by
+#: :meth:`EntityParser.iter_components`.
+COMPONENT_FIELDS = (
+    'observables',
+    'indicators',
+    'ttps',
+    'exploit_targets',
+    'incidents',
+    'courses_of_action',
+    'campaigns',
+    'threat_actors',
+    'reports',
+)
+
+
+def _component_sections():
+    """Returns a dictionary which maps the tag of each top-level
+    ``STIX_Package`` section (e.g., ``stix:Indicators``) to the section
+    binding class and the multiple TypedField which holds its components.
+
+    """
+    from stix.core import STIXPackage
+
+    sections = {}
+
+    for name in COMPONENT_FIELDS:
+        field = getattr(STIXPackage, name)
+        section = field.type_
+        tag = "{%s}%s" % (STIXPackage._namespace, field.name)
+        sections[tag] = (section._binding_class, section._multiple_field())
+
+    return sections
+
+
+def _localname(tag):
+    """Returns the `tag` with any ``{namespace}`` qualifier removed."""
+    return tag.rsplit("}", 1)[-1]
+
 
 class EntityParser(mixbox.parser.EntityParser):
 
@@ -25,4 +78,442 @@ class EntityParser(mixbox.parser.EntityParser):
         return stix.supported_stix_version()
 
     def get_entity_class(self, tag=TAG_STIX_PACKAGE):
-        return stix.core.STIXPackage
+        from stix.core import STIXPackage
+        return STIXPackage
+
+    def _parse_lazy(self, root):
+        """Builds an entity from the `root` element, deferring the conversion
+        of every child element which maps to a :class:`stix.LazyField`.
+
+        """
+        entity_class = self.get_entity_class(root.tag)
+
+        lazy_fields = dict(
+            (field.name, field) for field in entity_class.typed_fields()
+            if isinstance(field, stix.LazyField)
+        )
+
+        entity_obj = entity_class._binding_class.factory()
+        entity_obj.buildAttributes(root, root.attrib, set())
+
+        deferred = []
+
+        for child in root:
+            nodename = _localname(child.tag)
+
+            if nodename in lazy_fields:
+                deferred.append((lazy_fields[nodename], child))
+            else:
+                entity_obj.buildChildren(child, root, nodename)
+
+        entity = entity_class.from_obj(entity_obj)
+
+        for field, node in deferred:
+            field.defer(entity, node)
+
+        return entity
+
+    def parse_xml(self, xml_file, check_version=True, check_root=True,
+                  encoding=None, lazy=False):
+        """Creates a python-stix STIXPackage object from the supplied xml_file.
+
+        Args:
+            xml_file: A filename/path or a file-like object representing a STIX
+                instance document
+            check_version: Inspect the version before parsing.
+            check_root: Inspect the root element before parsing.
+            encoding: The character encoding of the input `xml_file`. If
+                ``None``, an attempt will be made to determine the input
+                character encoding.
+            lazy: If ``True``, the top-level component collections are kept
+                as lxml elements and are only converted into API objects when
+                they are first accessed.
+
+        Raises:
+            .UnknownVersionError: If `check_version` is ``True`` and `xml_file`
+                does not contain STIX version information.
+            .UnsupportedVersionError: If `check_version` is ``False`` and
+                `xml_file` contains an unsupported STIX version.
+            .UnsupportedRootElement: If `check_root` is ``True`` and `xml_file`
+                contains an invalid root element.
+
+        """
+        if not lazy:
+            return super(EntityParser, self).parse_xml(
+                xml_file,
+                check_version=check_version,
+                check_root=check_root,
+                encoding=encoding
+            )
+
+        root = mixbox.xml.get_etree_root(xml_file, encoding=encoding)
+
+        if check_root:
+            self._check_root_tag(root)
+
+        if check_version:
+            self._check_version(root)
+
+        entity = self._parse_lazy(root)
+
+        # Save the parsed nsmap and schemalocations onto the parsed Entity
+        entity.__input_namespaces__ = dict(iteritems(root.nsmap))
+        with ignored(KeyError):
+            pairs = mixbox.xml.get_schemaloc_pairs(root)
+            entity.__input_schemalocations__ = dict(pairs)
+
+        return entity
+
+    def iter_components(self, xml_file, check_version=True, check_root=True,
+                        encoding=None):
+        """Incrementally parses the `xml_file` STIX Package and yields its
+        top-level components (e.g., :class:`.Indicator`, :class:`.TTP`,
+        :class:`.Incident`, ``cybox.core.Observable``) one at a time.
+
+        Each component is built as soon as its closing tag is read. The
+        underlying XML element (and any previously parsed siblings) are then
+        discarded, so memory usage does not grow with the size of the input
+        document.
+
+        Note:
+            Only the components found directly under the ``STIX_Package``
+            top-level collections are yielded. The ``STIX_Header`` and any
+            other package-level content is skipped.
+
+        Args:
+            xml_file: A filename/path or a binary file-like object
+                representing a STIX instance document.
+            check_version: Inspect the version before parsing.
+            check_root: Inspect the root element before parsing.
+            encoding: The character encoding of the input `xml_file`. If
+                ``None``, an attempt will be made to determine the input
+                character encoding.
+
+        Yields:
+            Top-level STIX and CybOX component instances, in document order.
+
+        Raises:
+            .UnknownVersionError: If `check_version` is ``True`` and `xml_file`
+                does not contain STIX version information.
+            .UnsupportedVersionError: If `check_version` is ``False`` and
+                `xml_file` contains an unsupported STIX version.
+            .UnsupportedRootElement: If `check_root` is ``True`` and `xml_file`
+                contains an invalid root element.
+
+        """
+        sections = _component_sections()
+        namespaces = None
+        schemalocs = None
+        depth = 0
+
+        context = lxml.etree.iterparse(
+            xml_file,
+            events=("start", "end"),
+            huge_tree=True,
+            remove_comments=True,
+            strip_cdata=False,
+            remove_blank_text=True,
+            resolve_entities=False,
+            encoding=encoding
+        )
+
+        for event, node in context:
+            if event == "start":
+                depth += 1
+
+                if depth > 1:
+                    continue
+
+                if check_root:
+                    self._check_root_tag(node)
+
+                if check_version:
+                    self._check_version(node)
+
+                namespaces = dict(iteritems(node.nsmap))
+
+                with ignored(KeyError):
+                    pairs = mixbox.xml.get_schemaloc_pairs(node)
+                    schemalocs = dict(pairs)
+
+                continue
+
+            depth -= 1
+
+            # Components live at STIX_Package/<section>/<component>
+            if depth != 2:
+                continue
+
+            parent = node.getparent()
+
+            if parent.tag not in sections:
+                continue
+
+            binding_class, field = sections[parent.tag]
+            nodename = _localname(node.tag)
+
+            if nodename == field.name:
+                # Use the section binding to resolve any xsi:type on the node.
+                section_obj = binding_class.factory()
+                section_obj.buildChildren(node, parent, nodename)
+
+                obj = getattr(section_obj, field.name)[-1]
+                entity = field.transformer.from_obj(obj)
+                entity.__input_namespaces__ = namespaces
+
+                if schemalocs:
+                    entity.__input_schemalocations__ = schemalocs
+
+                yield entity
+
+            # Free the memory held by the parsed node and its siblings.
+            node.clear()
+
+            while node.getprevious() is not None:
+                del parent[0]
+
+        del context
+
+
+#: Result forms returned by :func:`parse_many`.
+PARSE_OUTPUTS = ("package", "dict", "summary")
+
+
+class ParseResult(collections.namedtuple("ParseResult", "path result error")):
+    """The outcome of parsing one file with :func:`parse_many`.
+
+    Attributes:
+        path: The input path.
+        result: The parsed result, or ``None`` if parsing failed.
+        error: The exception raised while parsing, or ``None``.
+
+    """
+    __slots__ = ()
+
+
+def summarize_indicators(package):
+    """Returns a compact dictionary summary of the Indicators in `package`.
+
+    The summary contains the package ``id`` and, for each Indicator, its
+    ``id``, ``idref``, ``title``, ``timestamp``, ``indicator_types`` and the
+    ids of its Observables. Only the ``indicators`` collection of a lazily
+    parsed `package` is loaded.
+
+    """
+    def observable_ids(indicator):
+        return [x.id_ or x.idref for x in indicator.observables or ()]
+
+    indicators = [
+        {
+            "id": x.id_,
+            "idref": x.idref,
+            "title": x.title,
+            "timestamp": dates.serialize_value(x.timestamp),
+            "indicator_types": [str(t) for t in x.indicator_types],
+            "observables": observable_ids(x),
+        }
+        for x in package.indicators or ()
+    ]
+
+    return {"id": package.id_, "indicators": indicators}
+
+
+def _picklable(error):
+    """Returns `error`, or an equivalent ``Exception`` if `error` cannot be
+    sent to another process.
+
+    """
+    try:
+        pickle.loads(pickle.dumps(error))
+    except Exception:
+        msg = "%s: %s" % (type(error).__name__, error)
+        return Exception(msg)
+
+    return error
+
+
+#: Maps each TypedField to a ``(class, attribute name)`` reference, or to
+#: ``None`` if its owner class was not found. Missing fields are looked up
+#: again when new modules are imported, since new modules can define new
+#: classes.
+_FIELD_REFS = {}
+_MODULE_COUNT = [0]
+
+
+def _field_ref(field):
+    """Returns a ``(class, attribute name)`` tuple which locates `field`, or
+    ``None`` if its owner class cannot be found.
+
+    """
+    try:
+        ref = _FIELD_REFS[field]
+    except KeyError:
+        pass
+    else:
+        if ref is not None or len(sys.modules) == _MODULE_COUNT[0]:
+            return ref
+
+    _MODULE_COUNT[0] = len(sys.modules)
+    stack = [entities.Entity]
+
+    while stack:
+        klass = stack.pop()
+        stack.extend(type.__subclasses__(klass))
+
+        for attr, typed_field in klass.typed_fields_with_attrnames():
+            if _FIELD_REFS.get(typed_field) is None:
+                _FIELD_REFS[typed_field] = (klass, attr)
+
+    return _FIELD_REFS.setdefault(field, None)
+
+
+class _EntityPickler(pickle.Pickler):
+    """Pickles entities with references to their TypedFields.
+
+    The values of an entity are keyed by the TypedField descriptors of its
+    class. Pickling the descriptors by value would create copies which the
+    unpickled entity could not find its values with.
+
+    """
+    def persistent_id(self, obj):
+        if isinstance(obj, fields.TypedField):
+            return _field_ref(obj)
+        return None
+
+
+class _EntityUnpickler(pickle.Unpickler):
+    """Unpickles data written by :class:`_EntityPickler`."""
+    def persistent_load(self, pid):
+        klass, attr = pid
+        return getattr(klass, attr)
+
+
+def _dumps(obj):
+    sio = BytesIO()
+    _EntityPickler(sio, pickle.HIGHEST_PROTOCOL).dump(obj)
+    return sio.getvalue()
+
+
+def _loads(data):
+    return _EntityUnpickler(BytesIO(data)).load()
+
+
+def _parse_file(options, path):
+    """Parses the file at `path` and returns a :class:`ParseResult`. This is
+    the worker function of :func:`parse_many`.
+
+    If `pickled` is set in `options`, parsed packages are returned pickled
+    by :func:`_dumps`.
+
+    """
+    output, pickled, kwargs = options
+
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            package = EntityParser().parse_xml(
+                path,
+                lazy=(output == "summary"),
+                **kwargs
+            )
+
+            if output == "dict":
+                result = package.to_dict()
+            elif output == "summary":
+                result = summarize_indicators(package)
+            elif pickled:
+                result = _dumps(package)
+            else:
+                result = package
+    except Exception as ex:
+        return ParseResult(path, None, ex)
+
+    return ParseResult(path, result, None)
+
+
+def _parse_file_worker(options, path):
+    """Calls :func:`_parse_file` in a worker process. Errors which cannot be
+    sent back to the parent process are replaced by :func:`_picklable`.
+
+    """
+    result = _parse_file(options, path)
+
+    if result.error is not None:
+        result = result._replace(error=_picklable(result.error))
+
+    return result
+
+
+def parse_many(paths, workers=None, ordered=True, output="package",
+               chunksize=1, **kwargs):
+    """Parses many STIX Package files in worker processes and returns a
+    generator which yields a :class:`ParseResult` for each file.
+
+    Sending a full :class:`.STIXPackage` back from a worker process means
+    pickling every object in it. The ``dict`` and ``summary`` outputs are
+    much cheaper to send.
+
+    Example:
+        >>> for path, summary, error in parse_many(paths, output="summary"):
+        ...     if error:
+        ...         log.warning("Could not parse %s: %s", path, error)
+
+    Args:
+        paths: An iterable of filenames/paths of STIX instance documents.
+        workers: The number of worker processes. If ``None``, the number of
+            CPUs is used. If ``0``, files are parsed in this process.
+        ordered: If ``True``, results are yielded in the order of `paths`.
+            Otherwise, results are yielded as soon as they are ready.
+        output: The form of each result. One of ``"package"`` (a
+            :class:`.STIXPackage`), ``"dict"`` (the ``to_dict()``
+            representation of the package) or ``"summary"`` (see
+            :func:`summarize_indicators`).
+        chunksize: The number of paths sent to a worker at once.
+        **kwargs: Additional arguments passed to
+            :meth:`EntityParser.parse_xml` (e.g., ``check_version``).
+
+    Yields:
+        A :class:`ParseResult` for each path. Errors raised while parsing a
+        file are captured in the ``error`` attribute rather than raised.
+
+    Raises:
+        ValueError: If `output` is not a supported output form.
+
+    """
+    if output not in PARSE_OUTPUTS:
+        error = "Unsupported output '{0}'. Expected one of {1}."
+        raise ValueError(error.format(output, PARSE_OUTPUTS))
+
+    if "lazy" in kwargs:
+        raise ValueError("parse_many() does not support lazy parsing")
+
+    if workers == 0:
+        parse = functools.partial(_parse_file, (output, False, kwargs))
+        return (parse(x) for x in paths)
+
+    options = (output, output == "package", kwargs)
+    parse = functools.partial(_parse_file_worker, options)
+    return _iter_results(parse, paths, workers, ordered, chunksize)
+
+
+def _iter_results(parse, paths, workers, ordered, chunksize):
+    """Yields the result of calling `parse` with each path in `paths` in a
+    pool of `workers` processes.
+
+    """
+    pool = multiprocessing.Pool(processes=workers)
+
+    try:
+        if ordered:
+            results = pool.imap(parse, paths, chunksize)
+        else:
+            results = pool.imap_unordered(parse, paths, chunksize)
+
+        for result in results:
+            if isinstance(result.result, bytes):
+                result = result._replace(result=_loads(result.result))
+
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
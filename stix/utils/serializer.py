@@ -0,0 +1,465 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+"""
+Serializes python-stix API objects to XML without building a binding tree.
+
+``Entity.to_xml()`` historically called ``to_obj()`` to build a complete tree
+of generateDS binding objects and then exported that tree into a
+``StringIO``. The :class:`Serializer` in this module exports each API object
+as it is reached instead: a binding object is created for one entity at a
+time, its entity-valued children are replaced with placeholders which
+serialize the child entities on demand, and the binding object is discarded
+once it has been written. Only the binding objects of the entities on the
+path to the element being written are alive at any time.
+
+The binding ``export()`` methods are still used to format element names,
+attributes and text content, so the output is identical to the output of
+``to_obj().export()``.
+
+The :class:`NamespaceCollector` in this module records the classes of the
+exported objects and resolves the namespaces of each class only once.
+"""
+
+# external
+from mixbox import entities, namespaces
+from mixbox.vendor.six import iteritems
+
+# internal
+import stix
+
+#: Per-class cache of whether instances can be exported without calling
+#: ``to_obj()``.
+_DIRECT = {}
+
+
+def _func(method):
+    """Returns the function behind an (unbound) method."""
+    return getattr(method, "__func__", method)
+
+
+def _is_direct(klass):
+    """Returns ``True`` if instances of `klass` use the default
+    ``to_obj()`` implementation and can be exported one level at a time.
+
+    """
+    try:
+        return _DIRECT[klass]
+    except KeyError:
+        pass
+
+    # Avoid a circular import.
+    from stix.core import STIXPackage
+
+    # STIXPackage.to_obj() only materializes lazily parsed fields, which the
+    # Serializer does on its own.
+    default = (
+        _func(entities.Entity.to_obj),
+        _func(STIXPackage.to_obj),
+    )
+
+    direct = (
+        isinstance(klass, type) and
+        issubclass(klass, stix.Entity) and
+        getattr(klass, "_binding_class", None) is not None and
+        _func(klass.to_obj) in default
+    )
+
+    _DIRECT[klass] = direct
+    return direct
+
+
+#: Per-class cache of whether instances are TypedCollections which use the
+#: default ``to_obj()`` implementation.
+_COLLECTIONS = {}
+
+
+def _is_collection(value):
+    """Returns ``True`` if `value` is a TypedCollection which uses the default
+    ``to_obj()`` implementation.
+
+    """
+    klass = type(value)
+
+    try:
+        return _COLLECTIONS[klass]
+    except KeyError:
+        pass
+
+    collection = (
+        issubclass(klass, stix.TypedCollection) and
+        _func(klass.to_obj) is _func(stix.TypedCollection.to_obj)
+    )
+
+    _COLLECTIONS[klass] = collection
+    return collection
+
+
+#: Per-field cache of the TypedField properties used during export.
+_FIELDS = {}
+
+
+def _field_info(field):
+    """Returns a ``(name, type_, multiple, none_as_list, lazy)`` tuple for
+    `field`.
+
+    """
+    try:
+        return _FIELDS[field]
+    except KeyError:
+        pass
+
+    info = (
+        field.name,
+        field.type_,
+        field.multiple,
+        getattr(field.type_, "_treat_none_as_empty_list", False),
+        isinstance(field, stix.LazyField),
+    )
+
+    _FIELDS[field] = info
+    return info
+
+
+#: Per-class cache of the multiple TypedField of EntityList classes. Other
+#: classes map to ``None``.
+_LIST_FIELDS = {}
+
+
+def _is_empty_list(value):
+    """Returns ``True`` if `value` is an EntityList with no items. This is
+    equivalent to ``len(value) == 0`` without the EntityList property
+    lookups.
+
+    """
+    klass = type(value)
+
+    try:
+        field = _LIST_FIELDS[klass]
+    except KeyError:
+        if issubclass(klass, entities.EntityList):
+            field = klass._multiple_field()
+        else:
+            field = None
+
+        _LIST_FIELDS[klass] = field
+
+    if field is None:
+        return False
+
+    return not value._fields.get(field)
+
+
+#: Per-class cache of the ``(alias, namespace)`` pairs contributed by a class
+#: and its base classes. The alias is ``None`` for namespaces without one.
+_NAMESPACES = {}
+
+
+def _class_namespaces(klass):
+    """Returns a frozenset of the ``(alias, namespace)`` pairs which the
+    classes in the MRO of `klass` contribute to an XML document.
+
+    This mirrors ``NamespaceCollector._parse_collected_classes()``.
+
+    """
+    try:
+        return _NAMESPACES[klass]
+    except KeyError:
+        pass
+
+    pairs = set()
+
+    for base in klass.__mro__:
+        ns = getattr(base, "_namespace", None)
+
+        if not ns:
+            continue
+
+        alias = getattr(base, "_XSI_NS", None)
+
+        if not alias:
+            xsi_type = getattr(base, "_XSI_TYPE", None)
+            typeinfo = xsi_type.split(":") if xsi_type else ()
+            alias = typeinfo[0] if len(typeinfo) == 2 else None
+
+        pairs.add((alias, ns))
+
+    pairs = frozenset(pairs)
+    _NAMESPACES[klass] = pairs
+    return pairs
+
+
+class NamespaceCollector(entities.NamespaceCollector):
+    """A ``mixbox.entities.NamespaceCollector`` which resolves namespaces
+    per class instead of per object.
+
+    :meth:`collect` only records the class of each object and any namespaces
+    it was parsed with. The namespaces of each class are computed once and
+    cached, so :meth:`finalize` only unions the namespaces of the classes
+    which were collected.
+
+    """
+    def collect(self, entity):
+        self._collected_classes.add(type(entity))
+
+        # Only entities parsed from an external source (e.g., the root of a
+        # document or embedded MAEC or OpenIOC content) have these.
+        attrs = getattr(entity, "__dict__", None)
+
+        if attrs is None:
+            attrs = {}
+
+        if "__input_namespaces__" in attrs:
+            self._input_namespaces.update(attrs["__input_namespaces__"])
+
+        if "__input_schemalocations__" in attrs:
+            self._input_schemalocs.update(attrs["__input_schemalocations__"])
+
+    def _parse_collected_classes(self):
+        pairs = set()
+
+        for klass in self._collected_classes:
+            pairs.update(_class_namespaces(klass))
+
+        alias2uri = {}
+        noalias = set()
+
+        for alias, ns in pairs:
+            if alias:
+                alias2uri[alias] = ns
+            else:
+                noalias.add(ns)
+
+        uris = list(alias2uri.values()) + list(noalias)
+        nsset = namespaces.make_namespace_subset_from_uris(uris)
+
+        # Fill in prefixes for namespaces which are not in the namespace
+        # tables.
+        for prefix, ns_uri in iteritems(alias2uri):
+            if nsset.preferred_prefix_for_namespace(ns_uri):
+                continue
+
+            nsset.set_preferred_prefix_for_namespace(
+                ns_uri=ns_uri,
+                prefix=prefix,
+                add_if_not_exist=True
+            )
+
+        self._collected_namespaces = nsset
+
+
+class _Placeholder(object):
+    """Stands in for the binding object of an API object within the binding
+    object of its parent.
+
+    """
+    __slots__ = ("serializer", "entity")
+
+    def __init__(self, serializer, entity):
+        self.serializer = serializer
+        self.entity = entity
+
+    def export(self, *args, **kwargs):
+        self.serializer._export(self.entity, args, kwargs)
+
+
+class Serializer(object):
+    """Exports python-stix API objects one binding object at a time.
+
+    Args:
+        ns_info: An optional :class:`NamespaceCollector` which collects
+            namespace information from every exported object.
+
+    """
+    def __init__(self, ns_info=None):
+        self._ns_info = ns_info
+
+        # Binding objects built by collect() for entities which must be built
+        # through to_obj(). Entries are keyed by id() and hold on to the
+        # entity so the id is not reused. Each entry is dropped when it is
+        # exported.
+        self._objs = {}
+
+    def _to_obj(self, value):
+        """Returns the binding object for `value` built by :meth:`collect`,
+        or builds it.
+
+        """
+        try:
+            return self._objs.pop(id(value))[1]
+        except KeyError:
+            return value.to_obj()
+
+    def _collect_obj(self, value):
+        """Builds the binding object for `value` and collects its
+        namespaces.
+
+        """
+        obj = value.to_obj(ns_info=self._ns_info)
+        self._objs[id(value)] = (value, obj)
+
+    def _objectify(self, type_, value, children):
+        """Mirrors ``mixbox.entities._objectify()`` for entity values, but
+        returns placeholders for entities which can be exported directly.
+
+        Direct entities are appended to `children`.
+
+        """
+        if _is_direct(type(value)):
+            children.append(value)
+            return _Placeholder(self, value)
+        elif _is_collection(value):
+            return [self._objectify(type_, x, children) for x in value]
+        else:
+            return self._to_obj(value)
+
+    def _binding_values(self, entity, children):
+        """Returns a list of ``(name, binding value)`` pairs for `entity`.
+        This mirrors ``mixbox.entities.Entity.to_obj()``.
+
+        Direct entities found along the way are appended to `children`.
+
+        """
+        values = []
+        append = values.append
+        objectify = self._objectify
+
+        for field, value in list(entity._fields.items()):
+            name, type_, multiple, none_as_list, lazy = _field_info(field)
+
+            if lazy:
+                value = field.__get__(entity)
+
+            if value is None:
+                append((name, [] if multiple or none_as_list else None))
+            elif _is_empty_list(value):
+                append((name, None))
+            elif not type_:
+                if multiple:
+                    value = [field.binding_value(x) if x is not None else None
+                             for x in value]
+                else:
+                    value = field.binding_value(value)
+                append((name, value))
+            elif multiple:
+                value = [
+                    objectify(type_, x, children) if x is not None
+                    else ([] if none_as_list else None)
+                    for x in value
+                ]
+                append((name, value))
+            else:
+                append((name, objectify(type_, value, children)))
+
+        return values
+
+    def _collect_value(self, value, children):
+        """Appends `value` to `children` if it can be exported directly.
+        Otherwise, the binding object of `value` is built.
+
+        """
+        if _is_direct(type(value)):
+            children.append(value)
+        elif _is_collection(value):
+            for item in value:
+                self._collect_value(item, children)
+        else:
+            self._collect_obj(value)
+
+    def _collect_children(self, entity, children):
+        """Appends the entities which :meth:`_binding_values` would export
+        directly to `children`, without building any binding values.
+
+        """
+        collect_value = self._collect_value
+
+        for field, value in list(entity._fields.items()):
+            name, type_, multiple, _, lazy = _field_info(field)
+
+            if lazy:
+                value = field.__get__(entity)
+
+            if value is None or not type_ or _is_empty_list(value):
+                continue
+            elif multiple:
+                for item in value:
+                    if item is not None:
+                        collect_value(item, children)
+            else:
+                collect_value(value, children)
+
+    def collect(self, entity):
+        """Collects the namespace information for `entity` and each of its
+        descendants.
+
+        This must be called before :meth:`export` if the Serializer was
+        created with a NamespaceCollector. Only the binding objects of
+        entities which cannot be exported directly (e.g., CybOX content) are
+        built here; binding values for the other entities are built during
+        export.
+
+        """
+        ns_info = self._ns_info
+
+        if not ns_info:
+            return
+
+        if not _is_direct(type(entity)):
+            self._collect_obj(entity)
+            return
+
+        stack = [entity]
+
+        while stack:
+            current = stack.pop()
+            ns_info.collect(current)
+
+            children = []
+            self._collect_children(current, children)
+
+            # Visit children in document order.
+            children.reverse()
+            stack.extend(children)
+
+    def binding_obj(self, entity):
+        """Returns the binding object for `entity`.
+
+        If `entity` can be exported directly, its entity-valued children are
+        placeholders which export the child entities on demand.
+
+        """
+        if not _is_direct(type(entity)):
+            return self._to_obj(entity)
+
+        values = self._binding_values(entity, [])
+        obj = entity._binding_class()
+
+        for name, value in values:
+            setattr(obj, name, value)
+
+        entity._finalize_obj(obj)
+        return obj
+
+    def _export(self, entity, args, kwargs):
+        """Exports `entity` by passing `args` and `kwargs` to the ``export()``
+        method of its binding object.
+
+        """
+        self.binding_obj(entity).export(*args, **kwargs)
+
+    def export(self, entity, lwrite, level, nsmap, namespacedef_='',
+               pretty_print=True):
+        """Writes the XML for `entity` to `lwrite`.
+
+        Args:
+            entity: A python-stix Entity instance.
+            lwrite: A callable which accepts each string fragment.
+            level: The indentation level of the root element.
+            nsmap: A dictionary of namespace URI to alias mappings.
+            namespacedef_: The namespace and schemaLocation definition string
+                to write in the root element.
+            pretty_print: Pretty-print the XML.
+
+        """
+        kwargs = dict(namespacedef_=namespacedef_, pretty_print=pretty_print)
+        self._export(entity, (lwrite, level, nsmap), kwargs)
+
@@ -2,15 +2,42 @@
 # See LICENSE.txt for complete terms.
 
 # stdlib
+import datetime
 import itertools
+import sys
 
 # external
 from cybox.common import ObjectProperties
-from mixbox.vendor.six import iteritems
+from mixbox import entities
+from mixbox.vendor.six import iteritems, string_types, integer_types
 
 # internal
+import stix
 from . import is_entity, is_entitylist, attr_name, is_sequence
 
+#: Field values of these types never contain entities.
+_LEAF_TYPES = tuple(string_types) + tuple(integer_types) + (
+    bool,
+    float,
+    datetime.date,
+    datetime.datetime,
+)
+
+#: Top-level packages which can only contain entities from the packages they
+#: depend on.
+_PACKAGE_DEPENDENCIES = {
+    "mixbox": ("mixbox",),
+    "cybox": ("mixbox", "cybox"),
+    "maec": ("mixbox", "cybox", "maec"),
+}
+
+#: Per-class walk plans and per-filter reachability results. These are
+#: cleared when new modules are imported, since new modules can define new
+#: subclasses of the field types.
+_PLANS = {}
+_REACHABLE = {}
+_MODULE_COUNT = [0]
+
 
 def _is_skippable(owner, varname, varobj):
     if varname == "_fields" and isinstance(varobj, dict):
@@ -22,6 +49,10 @@ def _is_skippable(owner, varname, varobj):
     if varname in ("__input_namespaces__", "__input_schemalocations__"):
         return True
 
+    # Cached data declared by the class of `owner`.
+    if varname in getattr(type(owner), "_walk_skip", ()):
+        return True
+
     return False
 
 
@@ -37,34 +68,344 @@ def _iter_vars(obj):
     return itertools.chain.from_iterable(attrs)
 
 
-def iterwalk(obj):
+def _check_caches():
+    """Clears the plan caches if modules have been imported since they were
+    built.
+
+    """
+    count = len(sys.modules)
+
+    if count != _MODULE_COUNT[0]:
+        _PLANS.clear()
+        _REACHABLE.clear()
+        _MODULE_COUNT[0] = count
+
+
+def _entity_type(type_):
+    """Returns the entity class held by a field with the type `type_`, or
+    ``None`` if the field does not hold entities.
+
+    """
+    if not isinstance(type_, type):
+        return None
+
+    if issubclass(type_, stix.TypedCollection):
+        contained = type_._contained_type
+        return contained if isinstance(contained, type) else object
+
+    if issubclass(type_, entities.Entity):
+        return type_
+
+    return None
+
+
+def _plan(klass):
+    """Returns the set of TypedFields on `klass` which cannot hold entities.
+
+    Fields without a type could hold anything, so they are not in the set.
+
+    """
+    try:
+        return _PLANS[klass]
+    except KeyError:
+        pass
+
+    typed_fields = getattr(klass, "typed_fields", None)
+
+    if typed_fields is None:
+        plan = frozenset()
+    else:
+        plan = frozenset(
+            x for x in typed_fields()
+            if x.type_ is not None and _entity_type(x.type_) is None
+        )
+
+    _PLANS[klass] = plan
+    return plan
+
+
+def _children(obj):
+    """Returns a list of the entities directly contained by `obj`."""
+    children = []
+    append = children.append
+
+    # Non-field attributes.
+    for varname, varobj in iteritems(getattr(obj, "__dict__", {})):
+        if varobj is None or isinstance(varobj, _LEAF_TYPES):
+            continue
+        elif _is_skippable(obj, varname, varobj):
+            continue
+        elif is_sequence(varobj) and not is_entitylist(varobj):
+            children.extend(x for x in varobj if is_entity(x))
+        elif is_entity(varobj):
+            append(varobj)
+
+    fields = getattr(obj, "_fields", None)
+
+    if not fields:
+        return children
+
+    skip = _plan(type(obj))
+
+    for field, varobj in iteritems(fields):
+        if varobj is None or field in skip or isinstance(varobj, _LEAF_TYPES):
+            continue
+
+        if isinstance(field, stix.LazyField):
+            # Build values deferred by a lazy parse.
+            varobj = field.__get__(obj)
+
+        if varobj is None:
+            continue
+        elif is_sequence(varobj) and not is_entitylist(varobj):
+            children.extend(x for x in varobj if is_entity(x))
+        elif is_entity(varobj):
+            append(varobj)
+
+    return children
+
+
+def _child_slots(obj):
+    """Returns a list of ``(child, key, position)`` triples for the entities
+    directly contained by `obj`, in the order of :func:`_children`.
+
+    The `key` is the attribute name or TypedField which holds `child`, and
+    `position` is the index of `child` in the sequence held by `key`, or
+    ``None`` if `key` holds `child` itself. See :func:`_slot_value`.
+
+    """
+    slots = []
+    append = slots.append
+
+    def add(key, varobj):
+        if is_sequence(varobj) and not is_entitylist(varobj):
+            for position, item in enumerate(varobj):
+                if is_entity(item):
+                    append((item, key, position))
+        elif is_entity(varobj):
+            append((varobj, key, None))
+
+    for varname, varobj in iteritems(getattr(obj, "__dict__", {})):
+        if varobj is None or isinstance(varobj, _LEAF_TYPES):
+            continue
+        elif _is_skippable(obj, varname, varobj):
+            continue
+
+        add(varname, varobj)
+
+    fields = getattr(obj, "_fields", None)
+
+    if not fields:
+        return slots
+
+    skip = _plan(type(obj))
+
+    for field, varobj in list(iteritems(fields)):
+        if varobj is None or field in skip or isinstance(varobj, _LEAF_TYPES):
+            continue
+
+        if isinstance(field, stix.LazyField):
+            varobj = field.__get__(obj)
+
+        if varobj is not None:
+            add(field, varobj)
+
+    return slots
+
+
+def _slot_value(obj, key):
+    """Returns the value held by `obj` under a `key` returned by
+    :func:`_child_slots`.
+
+    """
+    if isinstance(key, string_types):
+        return getattr(obj, "__dict__", {}).get(key)
+
+    return getattr(obj, "_fields", {}).get(key)
+
+
+def _subclasses(klass):
+    """Returns `klass` and all of its currently defined subclasses."""
+    found = [klass]
+    stack = [klass]
+
+    while stack:
+        for sub in type.__subclasses__(stack.pop()):
+            if sub not in found:
+                found.append(sub)
+                stack.append(sub)
+
+    return found
+
+
+def _func(method):
+    """Returns the function behind an (unbound) method."""
+    return getattr(method, "__func__", method)
+
+
+def _package(klass):
+    return klass.__module__.split(".", 1)[0]
+
+
+def _is_opaque(klass):
+    """Returns ``True`` if instances of `klass` may hold entities which are
+    not described by its TypedFields.
+
+    Classes which implement their own ``to_dict()`` manage their own
+    attributes (e.g., the CIQ identity extension). The simple content types
+    in :mod:`stix.common` only hold scalar values.
+
+    """
+    if not issubclass(klass, entities.Entity):
+        return True
+
+    # Avoid a circular import.
+    from stix.core import STIXPackage
+    from stix.common import VocabString, StructuredText, DateTimeWithPrecision
+
+    if issubclass(klass, (VocabString, StructuredText, DateTimeWithPrecision)):
+        return False
+
+    # These implementations only serialize TypedFields.
+    known = (
+        _func(entities.Entity.to_dict),
+        _func(entities.EntityList.to_dict),
+        _func(STIXPackage.to_dict),
+    )
+
+    return _func(klass.to_dict) not in known
+
+
+def _can_reach(klass, types):
+    """Returns ``True`` if an instance of `klass` may have a descendant which
+    is an instance of `types`.
+
+    """
+    key = (klass, types)
+
+    try:
+        return _REACHABLE[key]
+    except KeyError:
+        pass
+
+    # Entities from a package cannot contain entities from packages it does
+    # not depend on (e.g., CybOX objects cannot contain STIX objects).
+    allowed = _PACKAGE_DEPENDENCIES.get(_package(klass))
+    targets = set(_package(x) for x in types)
+
+    if allowed and not targets.intersection(allowed):
+        _REACHABLE[key] = False
+        return False
+
+    reachable = False
+    seen = set([klass])
+    stack = [klass]
+
+    while stack and not reachable:
+        current = stack.pop()
+
+        if _is_opaque(current):
+            reachable = True
+            break
+
+        for field in current.typed_fields():
+            type_ = _entity_type(field.type_)
+
+            if type_ is None:
+                continue
+
+            for sub in _subclasses(type_):
+                if issubclass(sub, types):
+                    reachable = True
+                    break
+
+                if sub not in seen:
+                    seen.add(sub)
+                    stack.append(sub)
+
+            if reachable:
+                break
+
+    _REACHABLE[key] = reachable
+    return reachable
+
+
+def iterwalk(obj, types=None):
     """Returns an generator which 'walks` the input `obj` model. Each
     iteration yields a stix.Entity or cybox.Entity instance.
 
-    This is performed depth-first.
+    This is performed depth-first with an explicit stack, so the cost of
+    each step does not grow with the depth of the model.
+
+    Args:
+        obj: The object to walk.
+        types: An optional class or tuple of classes. If set, only instances
+            of `types` are yielded and descendants which cannot contain an
+            instance of `types` (according to their TypedFields) are skipped.
 
     """
-    def yield_and_walk(item):
-        if not is_entity(item):
-            return
+    _check_caches()
+
+    if types is None:
+        stack = _children(obj)
+        stack.reverse()
+
+        while stack:
+            node = stack.pop()
+            yield node
+
+            children = _children(node)
+            children.reverse()
+            stack.extend(children)
+
+        return
+
+    if not isinstance(types, tuple):
+        types = (types,)
+
+    def wanted(entity):
+        klass = type(entity)
+        return issubclass(klass, types) or _can_reach(klass, types)
+
+    stack = [x for x in _children(obj) if wanted(x)]
+    stack.reverse()
 
-        yield item
-        for descendant in iterwalk(item):
-            yield descendant
+    while stack:
+        node = stack.pop()
 
+        if isinstance(node, types):
+            yield node
+
+        children = [x for x in _children(node) if wanted(x)]
+        children.reverse()
+        stack.extend(children)
+
+
+def _iter_path_items(obj):
+    """Yields ``(name, item, report)`` triples for the values of `obj`
+    visited by :func:`iterpath`. If `report` is ``False`` the `item` is only
+    descended into.
+
+    """
     for varname, varobj in _iter_vars(obj):
         if _is_skippable(obj, varname, varobj):
             continue
 
-        if is_sequence(varobj) and not is_entitylist(varobj):
-            for item in varobj:
-                for descendant in yield_and_walk(item):
-                    yield descendant
+        # Build values deferred by a lazy parse.
+        if isinstance(varname, stix.LazyField):
+            varobj = varname.__get__(obj)
 
-            continue
+        # TypedField values are keyed by the field.
+        name = attr_name(getattr(varname, "name", varname))
 
-        for descendant in yield_and_walk(varobj):
-            yield descendant
+        if varname == "_inner" and is_entitylist(obj):
+            for item in varobj:
+                yield (None, item, False)
+        elif is_sequence(varobj) and not is_entitylist(varobj):
+            for item in varobj:
+                yield (name, item, True)
+        else:
+            yield (name, varobj, True)
 
 
 def iterpath(obj, path=None):
@@ -79,35 +420,23 @@ def iterpath(obj, path=None):
     This is performed depth-first.
 
     """
-    def yield_and_descend(name, item):
-        yield (path, attr_name(name), item)
-
-        if item is None:
-            return
-
-        for path_info in iterpath(item, path):
-            yield path_info
-
     if path is None:
         path = []
 
     path.append(obj)
+    stack = [_iter_path_items(obj)]
 
-    for varname, varobj in _iter_vars(obj):
-        if _is_skippable(obj, varname, varobj):
-            continue
+    while stack:
+        for name, item, report in stack[-1]:
+            if report:
+                yield (path, name, item)
 
-        if varname == "_inner" and is_entitylist(obj):
-            for item in varobj:
-                for path_info in iterpath(item, path):
-                    yield path_info
-        elif is_sequence(varobj) and not is_entitylist(varobj):
-            for item in varobj:
-                for path_info in yield_and_descend(varname, item):
-                    yield path_info
+            if item is None or isinstance(item, _LEAF_TYPES):
+                continue
 
+            path.append(item)
+            stack.append(_iter_path_items(item))
+            break
         else:
-            for path_info in yield_and_descend(varname, varobj):
-                yield path_info
-
-    path.pop()
+            stack.pop()
+            path.pop()
@@ -0,0 +1,363 @@
+# Copyright (c) 2017, The MITRE Corporation. All rights reserved.
+# See LICENSE.txt for complete terms.
+"""
+Validates STIX documents against the STIX XML Schemas.
+
+The schemas are loaded from local directories, one per STIX version, and
+never from the network. Each ``.xsd`` file in a directory is indexed by its
+``targetNamespace``. Imports of ``http://`` schema locations are resolved to
+local files through the schema locations registered with
+``mixbox.namespaces`` (see :mod:`stix.utils.nsparser`), or by file name.
+
+Compiling the full schema set takes seconds, so each compiled schema is
+cached per STIX version and directory and reused by every later validation
+in the same process. :func:`validate_many` validates files in a pool of
+worker processes, each of which compiles the schemas at most once.
+
+Example:
+    >>> validator = Validator({"1.2": "/opt/schemas/stix-1.2"})
+    >>> result = validator.validate("package.xml")
+    >>> for issue in result.errors:
+    ...     print(issue.line, issue.message)
+
+"""
+
+# stdlib
+import collections
+import functools
+import multiprocessing
+import os
+from xml.sax.saxutils import quoteattr
+
+# external
+from lxml import etree
+from mixbox import namespaces
+from mixbox.xml import get_etree_root
+from mixbox.vendor.six import iteritems, string_types
+
+# internal
+import stix
+import stix.utils.nsparser  # noqa: registers the STIX schema locations
+
+#: Compiled schemas, keyed by ``(version, schema directory)``.
+_SCHEMAS = {}
+
+
+class ValidationIssue(collections.namedtuple("ValidationIssue",
+                                             "line column message")):
+    """A problem found while validating a document.
+
+    Attributes:
+        line: The line number of the problem, or ``None``.
+        column: The column number of the problem, or ``None``.
+        message: A description of the problem.
+
+    """
+    __slots__ = ()
+
+
+class ValidationResult(collections.namedtuple("ValidationResult",
+                                              "path version valid errors")):
+    """The outcome of validating one document.
+
+    Attributes:
+        path: The filename of the document, or ``None`` if the document was
+            not read from a file.
+        version: The STIX version the document was validated against, or
+            ``None`` if it could not be determined.
+        valid: ``True`` if the document is schema-valid.
+        errors: A list of :class:`ValidationIssue` tuples. Documents which
+            cannot be read or have an unsupported version have one issue
+            without a line number.
+
+    """
+    __slots__ = ()
+
+
+def _target_namespace(path):
+    """Returns the ``targetNamespace`` of the schema at `path`, or ``None`` if
+    it cannot be read.
+
+    """
+    try:
+        for _, element in etree.iterparse(path, events=("start",)):
+            return element.get("targetNamespace")
+    except (etree.XMLSyntaxError, IOError, OSError):
+        return None
+
+
+def _index(schema_dir):
+    """Returns a dictionary which maps namespaces to the sorted list of
+    schema files in `schema_dir` which define them.
+
+    """
+    index = collections.defaultdict(list)
+
+    for dirpath, dirnames, filenames in os.walk(schema_dir):
+        dirnames.sort()
+
+        for filename in sorted(filenames):
+            if not filename.endswith(".xsd"):
+                continue
+
+            path = os.path.join(dirpath, filename)
+            ns = _target_namespace(path)
+
+            if ns:
+                index[ns].append(path)
+
+    return index
+
+
+def _basename(url):
+    return url.rstrip("/").rsplit("/", 1)[-1]
+
+
+def _choose(paths, url):
+    """Returns the file in `paths` which best matches the schema location
+    `url`.
+
+    """
+    if url:
+        name = _basename(url)
+
+        for path in paths:
+            if os.path.basename(path) == name:
+                return path
+
+    return paths[0]
+
+
+class _Resolver(etree.Resolver):
+    """Resolves ``http://`` schema locations to local schema files."""
+
+    def __init__(self, by_url, by_name):
+        super(_Resolver, self).__init__()
+        self._by_url = by_url
+        self._by_name = by_name
+
+    def resolve(self, url, pubid, context):
+        if not url.startswith(("http://", "https://")):
+            return None
+
+        path = self._by_url.get(url) or self._by_name.get(_basename(url))
+
+        if path is None:
+            return None
+
+        return self.resolve_filename(path, context)
+
+
+def _compile(schema_dir):
+    """Compiles one ``xs:schema`` which imports every namespace defined by
+    the schema files in `schema_dir`.
+
+    Raises:
+        ValueError: If `schema_dir` contains no schemas.
+        lxml.etree.XMLSchemaParseError: If the schemas cannot be compiled.
+
+    """
+    index = _index(schema_dir)
+
+    if not index:
+        raise ValueError("No XML Schemas found in '%s'" % schema_dir)
+
+    locations = namespaces.get_full_schemaloc_map()
+    chosen = {}
+    by_url = {}
+    by_name = {}
+
+    for ns, paths in sorted(iteritems(index)):
+        url = locations.get(ns)
+        chosen[ns] = _choose(paths, url)
+
+        if url:
+            by_url[url] = chosen[ns]
+
+        for path in paths:
+            by_name.setdefault(os.path.basename(path), path)
+
+    imports = "".join(
+        "<xs:import namespace=%s schemaLocation=%s/>" % (
+            quoteattr(ns), quoteattr(os.path.abspath(path))
+        )
+        for ns, path in sorted(iteritems(chosen))
+    )
+
+    wrapper = (
+        '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">%s'
+        '</xs:schema>' % imports
+    )
+
+    parser = etree.XMLParser(no_network=True)
+    parser.resolvers.add(_Resolver(by_url, by_name))
+
+    base_url = os.path.join(os.path.abspath(schema_dir), "")
+    root = etree.fromstring(wrapper.encode("utf-8"), parser, base_url=base_url)
+    return etree.XMLSchema(root)
+
+
+def load_schema(schema_dir, version):
+    """Returns the compiled ``lxml.etree.XMLSchema`` for the schemas of the
+    STIX `version` in `schema_dir`.
+
+    Schemas are compiled once per version and directory, and cached for the
+    life of the process.
+
+    Raises:
+        ValueError: If `version` is not supported by python-stix or
+            `schema_dir` contains no schemas.
+        lxml.etree.XMLSchemaParseError: If the schemas cannot be compiled.
+
+    """
+    if version not in stix.supported_stix_version():
+        error = "Unsupported STIX version '{0}'. Expected one of {1}."
+        raise ValueError(error.format(version, stix.supported_stix_version()))
+
+    key = (version, os.path.realpath(schema_dir))
+
+    try:
+        return _SCHEMAS[key]
+    except KeyError:
+        pass
+
+    schema = _SCHEMAS[key] = _compile(schema_dir)
+    return schema
+
+
+def _issue(error):
+    """Returns a :class:`ValidationIssue` for an exception."""
+    return ValidationIssue(None, None, "%s: %s" % (type(error).__name__, error))
+
+
+class Validator(object):
+    """Validates STIX documents against locally stored XML Schemas.
+
+    Args:
+        schema_dirs: A dictionary which maps STIX versions (see
+            :func:`stix.supported_stix_version`) to the directory holding
+            the schemas for that version. A single directory is used for the
+            latest supported version.
+
+    Raises:
+        ValueError: If a version is not supported by python-stix.
+
+    """
+    def __init__(self, schema_dirs):
+        if isinstance(schema_dirs, string_types):
+            schema_dirs = {stix.supported_stix_version()[-1]: schema_dirs}
+
+        for version in schema_dirs:
+            if version not in stix.supported_stix_version():
+                error = "Unsupported STIX version '{0}'. Expected one of {1}."
+                error = error.format(version, stix.supported_stix_version())
+                raise ValueError(error)
+
+        self.schema_dirs = dict(schema_dirs)
+
+    def schema(self, version):
+        """Returns the compiled ``lxml.etree.XMLSchema`` for `version`. See
+        :func:`load_schema`.
+
+        Raises:
+            KeyError: If no schema directory was given for `version`.
+
+        """
+        return load_schema(self.schema_dirs[version], version)
+
+    def validate(self, doc, version=None):
+        """Validates a STIX document.
+
+        Args:
+            doc: A filename, a file-like object or an lxml element or
+                element tree.
+            version: The STIX version to validate against. If ``None``, the
+                ``version`` attribute of the root element is used.
+
+        Returns:
+            A :class:`ValidationResult`.
+
+        """
+        path = doc if isinstance(doc, string_types) else None
+
+        try:
+            root = get_etree_root(doc)
+        except Exception as ex:
+            return ValidationResult(path, version, False, [_issue(ex)])
+
+        version = version or root.get("version")
+
+        if version not in self.schema_dirs:
+            msg = "No schemas for STIX version '%s'" % version
+            issue = ValidationIssue(None, None, msg)
+            return ValidationResult(path, version, False, [issue])
+
+        schema = self.schema(version)
+
+        if schema.validate(root):
+            return ValidationResult(path, version, True, [])
+
+        errors = [
+            ValidationIssue(x.line, x.column, x.message)
+            for x in schema.error_log
+        ]
+
+        return ValidationResult(path, version, False, errors)
+
+
+def _validate_file(schema_dirs, path):
+    """Validates the file at `path`. This is the worker function of
+    :func:`validate_many`.
+
+    """
+    try:
+        return Validator(dict(schema_dirs)).validate(path)
+    except Exception as ex:
+        return ValidationResult(path, None, False, [_issue(ex)])
+
+
+def validate_many(paths, schema_dirs, workers=None, ordered=True,
+                  chunksize=1):
+    """Validates many STIX documents in worker processes and returns a
+    generator which yields a :class:`ValidationResult` for each file.
+
+    Each worker process compiles the schemas of a version the first time it
+    validates a document of that version.
+
+    Args:
+        paths: An iterable of filenames/paths of STIX documents.
+        schema_dirs: See :class:`Validator`.
+        workers: The number of worker processes. If ``None``, the number of
+            CPUs is used. If ``0``, files are validated in this process.
+        ordered: If ``True``, results are yielded in the order of `paths`.
+            Otherwise, results are yielded as soon as they are ready.
+        chunksize: The number of paths sent to a worker at once.
+
+    Raises:
+        ValueError: If a version in `schema_dirs` is not supported.
+
+    """
+    # Fail early on bad arguments and pass a picklable copy to the workers.
+    schema_dirs = tuple(sorted(iteritems(Validator(schema_dirs).schema_dirs)))
+    validate = functools.partial(_validate_file, schema_dirs)
+
+    if workers == 0:
+        return (validate(x) for x in paths)
+
+    return _iter_results(validate, paths, workers, ordered, chunksize)
+
+
+def _iter_results(validate, paths, workers, ordered, chunksize):
+    pool = multiprocessing.Pool(processes=workers)
+
+    try:
+        if ordered:
+            results = pool.imap(validate, paths, chunksize)
+        else:
+            results = pool.imap_unordered(validate, paths, chunksize)
+
+        for result in results:
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()